@@ -1,33 +1,43 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import TTLCache, VersionStamp
 from .database import get_db
+from .passwords import pwd_context, verify_and_update_password
 from .models import User
 from .schemas import TokenData
 from .config import settings
 import secrets
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+# Usuários autenticados, por username: evita o SELECT em users a cada requisição
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds)
+user_cache_version = VersionStamp("users", user_cache, settings.cache_version_check_seconds)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await db.scalar(select(User).filter(User.username == username))
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return False
     if not user.is_active:
         return False
+    if new_hash:
+        # Custo do bcrypt mudou: regrava o hash aproveitando a senha em texto puro
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -52,7 +62,26 @@ def verify_password_reset_token(token: str) -> Optional[str]:
     except JWTError:
         return None
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def _get_cached_user(db: AsyncSession, username: str) -> Optional[User]:
+    await user_cache_version.sync(db)
+    user = user_cache.get(username)
+    if user is None:
+        user = await db.scalar(select(User).filter(User.username == username))
+        if user is not None:
+            # O objeto é compartilhado entre requisições: desanexa da sessão atual
+            db.expunge(user)
+            user_cache.set(username, user)
+    return user
+
+async def mark_users_changed(db: AsyncSession):
+    """Avisa os outros workers que usuários foram alterados; chamar antes do commit"""
+    await user_cache_version.bump(db)
+
+def invalidate_cached_user(username: str):
+    """Remove o usuário do cache deste worker; chamar depois do commit"""
+    user_cache.invalidate(username)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -66,7 +95,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await _get_cached_user(db, token_data.username)
     if user is None:
         raise credentials_exception
     return user
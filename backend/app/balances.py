@@ -0,0 +1,126 @@
+"""
+Saldo devedor (fiado) de cada cliente, mantido incrementalmente.
+
+customer_balances guarda por cliente o valor em aberto (contas pending,
+partial e overdue), quanto desse valor está vencido e a data do último
+pagamento. O saldo é atualizado na mesma transação que cria as contas,
+registra pagamentos, edita contas ou marca contas como vencidas; assim o
+limite de crédito é conferido no checkout lendo uma única linha, sem somar o
+histórico de contas do cliente.
+
+check_balances.py compara os saldos com a soma das contas (e corrige com --fix).
+"""
+from sqlalchemy import select, func, case, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .database import dialect_insert
+from .models import AccountReceivable, Customer, CustomerBalance, Payment
+
+# Contas que ainda aceitam pagamento (entram no saldo em aberto)
+PAYABLE_STATUSES = ["pending", "partial", "overdue"]
+# Diferença de arredondamento aceita ao comparar valores em reais (meio centavo)
+BALANCE_TOLERANCE = 0.005
+
+def _remaining():
+    return AccountReceivable.amount - func.coalesce(AccountReceivable.paid_amount, 0)
+
+async def add_to_balances(db: AsyncSession, deltas: dict, last_payment_at=None):
+    """Soma {cliente: (valor em aberto, valor vencido)} aos saldos, criando os que faltam"""
+    rows = [
+        {"customer_id": customer_id, "open_amount": open_amount, "overdue_amount": overdue_amount,
+         "last_payment_at": last_payment_at}
+        for customer_id, (open_amount, overdue_amount) in sorted(deltas.items())
+    ]
+    if not rows:
+        return
+    stmt = dialect_insert(db, CustomerBalance)
+    set_ = {
+        "open_amount": CustomerBalance.open_amount + stmt.excluded.open_amount,
+        "overdue_amount": CustomerBalance.overdue_amount + stmt.excluded.overdue_amount,
+        "updated_at": func.now(),
+    }
+    if last_payment_at is not None:
+        set_["last_payment_at"] = stmt.excluded.last_payment_at
+    await db.execute(stmt.on_conflict_do_update(index_elements=["customer_id"], set_=set_), rows)
+
+async def credit_available(db: AsyncSession, customer_ids) -> dict:
+    """Crédito disponível ({cliente: valor}) dos clientes que têm limite de crédito.
+    Os saldos lidos ficam bloqueados até o commit: dois caixas vendendo fiado para
+    o mesmo cliente não passam juntos do limite."""
+    limits = dict((await db.execute(
+        select(Customer.id, Customer.credit_limit)
+        .filter(Customer.id.in_(customer_ids), Customer.credit_limit.isnot(None))
+    )).all())
+    if not limits:
+        return {}
+    # Cria vazio o saldo de quem ainda não tem: sem a linha, a primeira venda fiado
+    # do cliente não teria o que bloquear e dois caixas passariam juntos do limite
+    await db.execute(
+        dialect_insert(db, CustomerBalance).on_conflict_do_nothing(index_elements=["customer_id"]),
+        [{"customer_id": customer_id, "open_amount": 0, "overdue_amount": 0} for customer_id in sorted(limits)]
+    )
+    balances = dict((await db.execute(
+        select(CustomerBalance.customer_id, CustomerBalance.open_amount)
+        .filter(CustomerBalance.customer_id.in_(limits))
+        .order_by(CustomerBalance.customer_id)
+        .with_for_update()
+    )).all())
+    return {customer_id: limit - balances.get(customer_id, 0) for customer_id, limit in limits.items()}
+
+def _expected_balances(*filters):
+    """Saldo de cada cliente calculado a partir das contas a receber"""
+    remaining = _remaining()
+    last_payment = (
+        select(func.max(Payment.payment_date))
+        .join(AccountReceivable, AccountReceivable.id == Payment.account_receivable_id)
+        .filter(AccountReceivable.customer_id == Customer.id)
+        .scalar_subquery()
+    )
+    return select(
+        Customer.id.label("customer_id"),
+        func.coalesce(func.sum(remaining), 0).label("open_amount"),
+        func.coalesce(func.sum(case((AccountReceivable.status == "overdue", remaining), else_=0)), 0).label("overdue_amount"),
+        last_payment.label("last_payment_at")
+    ).outerjoin(AccountReceivable, and_(
+        AccountReceivable.customer_id == Customer.id,
+        AccountReceivable.status.in_(PAYABLE_STATUSES)
+    )).filter(*filters).group_by(Customer.id)
+
+def _refresh_statement(db, customer_ids):
+    columns = ["customer_id", "open_amount", "overdue_amount", "last_payment_at"]
+    stmt = dialect_insert(db, CustomerBalance).from_select(
+        columns, _expected_balances(Customer.id.in_(customer_ids))
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["customer_id"],
+        set_={**{column: getattr(stmt.excluded, column) for column in columns[1:]}, "updated_at": func.now()}
+    )
+
+async def refresh_balances(db: AsyncSession, customer_ids):
+    """Recalcula o saldo dos clientes a partir das contas (edições avulsas de contas)"""
+    await db.execute(_refresh_statement(db, list(customer_ids)))
+
+def check_balances(db: Session, fix: bool = False):
+    """Lista os clientes cujo saldo gravado difere da soma das contas; com fix=True, corrige"""
+    expected = _expected_balances().subquery()
+    mismatches = db.execute(
+        select(
+            expected.c.customer_id,
+            expected.c.open_amount,
+            expected.c.overdue_amount,
+            CustomerBalance.open_amount.label("stored_open_amount"),
+            CustomerBalance.overdue_amount.label("stored_overdue_amount")
+        ).outerjoin(CustomerBalance, CustomerBalance.customer_id == expected.c.customer_id).filter(or_(
+            # Cliente com contas em aberto e sem saldo gravado
+            and_(
+                CustomerBalance.customer_id.is_(None),
+                or_(expected.c.open_amount > BALANCE_TOLERANCE, expected.c.overdue_amount > BALANCE_TOLERANCE)
+            ),
+            func.abs(expected.c.open_amount - CustomerBalance.open_amount) > BALANCE_TOLERANCE,
+            func.abs(expected.c.overdue_amount - CustomerBalance.overdue_amount) > BALANCE_TOLERANCE
+        )).order_by(expected.c.customer_id)
+    ).all()
+    if fix and mismatches:
+        db.execute(_refresh_statement(db, [row.customer_id for row in mismatches]))
+        db.commit()
+    return mismatches
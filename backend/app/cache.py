@@ -0,0 +1,101 @@
+"""
+Caches em memória (por worker) com invalidação entre workers.
+
+Cada worker mantém seu próprio TTLCache. Quem altera os dados invalida a
+entrada local e incrementa uma versão na tabela cache_versions, na mesma
+transação da alteração; os outros workers consultam essa versão no máximo a
+cada check_interval segundos e limpam o cache local quando ela muda.
+"""
+import time
+from collections import OrderedDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import dialect_insert
+from .models import CacheVersion
+
+class TTLCache:
+    """Cache LRU de tamanho limitado com expiração por tempo"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+async def read_version(db: AsyncSession, name: str) -> int:
+    """Versão atual de name em cache_versions (0 se nunca foi incrementada)"""
+    return await db.scalar(select(CacheVersion.version).filter(CacheVersion.name == name)) or 0
+
+def version_bump(db, name: str):
+    """UPSERT que incrementa a versão de name, para sessões síncronas (scripts de
+    manutenção) ou assíncronas"""
+    stmt = dialect_insert(db, CacheVersion).values(name=name, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"version": CacheVersion.version + 1}
+    )
+
+async def bump_version(db: AsyncSession, name: str):
+    """Incrementa a versão de name na transação atual (o commit fica com quem chamou)"""
+    await db.execute(version_bump(db, name))
+
+class VersionStamp:
+    """Versão de um cache compartilhada entre workers pela tabela cache_versions"""
+
+    def __init__(self, name: str, cache: TTLCache, check_interval: float):
+        self.name = name
+        self.cache = cache
+        self.check_interval = check_interval
+        self.version = None
+        self._checked_at = float("-inf")
+
+    async def sync(self, db: AsyncSession):
+        """Limpa o cache local se outro worker alterou os dados desde a última consulta"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = await read_version(db, self.name)
+        if version != self.version:
+            self.cache.clear()
+            self.version = version
+        self._checked_at = now
+
+    async def bump(self, db: AsyncSession):
+        """Incrementa a versão na transação atual (o commit fica com quem chamou)"""
+        await bump_version(db, self.name)
+
+    def recheck(self):
+        """Força a consulta da versão na próxima chamada de sync()"""
+        self._checked_at = float("-inf")
+
+    def reset(self):
+        self.cache.clear()
+        self.version = None
+        self.recheck()
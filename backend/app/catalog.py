@@ -0,0 +1,103 @@
+"""
+Catálogo de produtos em memória (por worker) para os terminais do PDV.
+
+O catálogo inteiro (produtos com fornecedor, já serializados) é carregado em
+uma query na primeira leitura e servido da memória até a versão do catálogo
+mudar. Alterações de cadastro (produto, fornecedor, movimentação de estoque)
+incrementam a versão "products" na tabela cache_versions, e todos os workers
+recarregam o catálogo na próxima leitura.
+
+As vendas não mudam a versão (seria uma linha disputada por todos os caixas):
+o worker que registrou a venda ajusta o estoque no próprio catálogo, e nos
+demais o estoque exibido é atualizado em até catalog_cache_ttl_seconds. O
+checkout sempre confere o estoque no banco.
+"""
+import bisect
+import time
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import VersionStamp
+from .config import settings
+from .loaders import product_options
+from .models import Product
+from .schemas import Product as ProductSchema
+
+CATALOG_VERSION_HEADER = "X-Catalog-Version"
+
+class ProductCatalog:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._loaded_at = None
+        self._loaded_version = None
+        self._generation = 0
+        self._by_id = {}
+        self._active_ids = []
+
+    def clear(self):
+        self._loaded_at = None
+
+    async def ensure_loaded(self, db: AsyncSession):
+        """Carrega o catálogo se ainda não foi carregado, expirou ou a versão mudou"""
+        await catalog_version.sync(db)
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            self.hits += 1
+            return
+        self.misses += 1
+        products = (await db.scalars(select(Product).options(*product_options()).order_by(Product.id))).all()
+        self._by_id = {
+            product.id: jsonable_encoder(ProductSchema.model_validate(product))
+            for product in products
+        }
+        self._active_ids = [product.id for product in products if product.is_active]
+        self._loaded_at = time.monotonic()
+        # Recomeça a cada versão: workers que carregaram a mesma versão têm o mesmo ETag
+        if self._loaded_version != self.version:
+            self._loaded_version = self.version
+            self._generation = 0
+        else:
+            self._generation += 1
+
+    async def list(self, db: AsyncSession, after_id=None, skip: int = 0, limit: int = 100):
+        """Produtos ativos em ordem de id, a partir do cursor (after_id) ou do offset"""
+        await self.ensure_loaded(db)
+        start = bisect.bisect_right(self._active_ids, after_id) if after_id is not None else skip
+        return [self._by_id[product_id] for product_id in self._active_ids[start:start + limit]]
+
+    async def get(self, db: AsyncSession, product_id: int):
+        await self.ensure_loaded(db)
+        return self._by_id.get(product_id)
+
+    def adjust_stock(self, quantities):
+        """Aplica ao catálogo local a baixa de estoque de uma venda já confirmada"""
+        for product_id, quantity in quantities.items():
+            product = self._by_id.get(product_id)
+            if product is not None:
+                product["stock_quantity"] -= quantity
+        self._generation += 1
+
+    @property
+    def etag_parts(self):
+        """Identifica o conteúdo do catálogo para o ETag: a versão compartilhada em
+        cache_versions e a geração local (recargas pelo TTL e vendas deste worker).
+        Entre workers o estoque pode diferir na mesma geração, como no TTL"""
+        return (self.version, self._generation)
+
+    @property
+    def version(self) -> int:
+        return catalog_version.version or 0
+
+product_catalog = ProductCatalog(ttl=settings.catalog_cache_ttl_seconds)
+catalog_version = VersionStamp("products", product_catalog, settings.cache_version_check_seconds)
+
+async def mark_catalog_changed(db: AsyncSession):
+    """Incrementa a versão do catálogo na transação atual; chamar antes do commit"""
+    await catalog_version.bump(db)
+
+def invalidate_catalog():
+    """Descarta o catálogo deste worker; chamar depois do commit"""
+    product_catalog.clear()
+    # Relê a versão na próxima leitura em vez de esperar o intervalo de checagem
+    catalog_version.recheck()
@@ -6,8 +6,24 @@ class Settings(BaseSettings):
     secret_key: str = "your-secret-key-here"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    user_cache_size: int = 1024
+    user_cache_ttl_seconds: float = 300
+    cache_version_check_seconds: float = 2
+    catalog_cache_ttl_seconds: float = 30
+    stock_overview_cache_ttl_seconds: float = 300
+    event_queue_size: int = 100
+    dashboard_resync_seconds: float = 60
+    compression_minimum_size: int = 1024
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 256
+    overdue_check_interval_seconds: float = 300
+    metrics_token: Optional[str] = None
+    metrics_public: bool = False
     
     class Config:
         env_file = ".env"
 
-settings = Settings() 
\ No newline at end of file
+settings = Settings()
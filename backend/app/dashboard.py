@@ -0,0 +1,130 @@
+"""
+Feed do dashboard em tempo real (Server-Sent Events).
+
+Em vez de cada tela consultar periodicamente os resumos, a conexão recebe o
+estado completo ao conectar (snapshot: vendas do dia e, para admins, contas
+vencidas) e depois os eventos publicados pelos routers no barramento
+(app/events.py) como incrementos: sale_created, payment_received e
+stock_changed. Vendedores recebem o mesmo recorte de /sales e
+/accounts-receivable: só as próprias vendas (no snapshot e nos eventos) e
+nenhum pagamento. A cada dashboard_resync_seconds o snapshot é reenviado, para
+incluir o que foi feito em outros workers ou fora dos eventos (edição e
+cancelamento de vendas, contas vencidas). O snapshot é lido do banco no
+máximo uma vez por intervalo em cada worker, qualquer que seja o número de
+telas abertas, e é descartado a cada venda ou pagamento deste worker.
+"""
+import time
+from datetime import date
+from typing import Optional
+from sqlalchemy import select, func
+from .cache import TTLCache
+from .config import settings
+from .database import AsyncSessionLocal
+from .events import SSE_KEEPALIVE_SECONDS, event_bus, sse_message
+from .models import AccountReceivable, CustomerBalance, User
+from .rollups import daily_summary
+
+SNAPSHOT_CACHE_SIZE = 256
+
+# Um snapshot para os admins e um por vendedor
+snapshot_cache = TTLCache(maxsize=SNAPSHOT_CACHE_SIZE, ttl=settings.dashboard_resync_seconds)
+
+async def _overdue_totals(db) -> dict:
+    overdue_count = await db.scalar(
+        select(func.count(AccountReceivable.id)).filter(AccountReceivable.status == "overdue")
+    )
+    # Saldo vencido mantido por cliente (app/balances.py): soma sem percorrer as contas
+    total_overdue = await db.scalar(select(func.coalesce(func.sum(CustomerBalance.overdue_amount), 0)))
+    return {"overdue_count": overdue_count, "total_overdue_amount": round(total_overdue, 2)}
+
+def _seller_id(user: User) -> Optional[int]:
+    """Vendedor cujas vendas o usuário vê (None: admin, vê a loja toda)"""
+    return None if user.role == "admin" else user.id
+
+async def dashboard_snapshot(user: User) -> dict:
+    """Estado completo do dashboard, compartilhado pelas conexões do worker com o mesmo recorte"""
+    seller_id = _seller_id(user)
+    snapshot = snapshot_cache.get(seller_id)
+    if snapshot is None:
+        async with AsyncSessionLocal() as db:
+            snapshot = {
+                "daily_summary": await daily_summary(db, date.today(), seller_id),
+                # Vendedores veem só as próprias contas em /accounts-receivable/summary/overdue
+                "overdue": await _overdue_totals(db) if seller_id is None else None
+            }
+        snapshot_cache.set(seller_id, snapshot)
+    return snapshot
+
+def visible_event(user: User, event_type: str, data):
+    """Os dados do evento que o usuário pode ver, ou None se o evento não é para ele"""
+    seller_id = _seller_id(user)
+    if seller_id is None:
+        return data
+    if event_type == "payment_received":
+        return None
+    if event_type == "sale_created":
+        sales = [sale for sale in data["sales"] if sale["seller_id"] == seller_id]
+        return {"sales": sales} if sales else None
+    return data
+
+async def dashboard_events(request, user: User, resync_interval: Optional[float] = None):
+    """Stream SSE: snapshot ao conectar e a cada resync_interval segundos, e os
+    eventos do barramento visíveis para o usuário no meio. Se o cliente não
+    acompanha (fila cheia), o stream termina com o evento dropped e o cliente
+    deve reconectar."""
+    resync_interval = settings.dashboard_resync_seconds if resync_interval is None else resync_interval
+    subscription = event_bus.subscribe()
+    try:
+        yield sse_message("snapshot", await dashboard_snapshot(user))
+        synced_at = time.monotonic()
+        while not await request.is_disconnected():
+            if subscription.dropped:
+                yield sse_message("dropped", {"reason": "slow consumer"})
+                return
+            timeout = min(SSE_KEEPALIVE_SECONDS, max(resync_interval - (time.monotonic() - synced_at), 0.01))
+            event = await subscription.get(timeout)
+            if event is not None:
+                event_type, data = event
+                data = visible_event(user, event_type, data)
+                if data is not None:
+                    yield sse_message(event_type, data)
+            elif time.monotonic() - synced_at >= resync_interval:
+                yield sse_message("snapshot", await dashboard_snapshot(user))
+                synced_at = time.monotonic()
+            else:
+                yield ": keepalive\n\n"
+    finally:
+        subscription.close()
+
+def publish_sales(sales):
+    """Evento sale_created com as vendas gravadas; chamar depois do commit"""
+    # Quem conectar depois recebe um snapshot que já inclui as vendas
+    snapshot_cache.clear()
+    event_bus.publish("sale_created", {"sales": [
+        {
+            "id": sale["id"],
+            "customer_id": sale["customer_id"],
+            "seller_id": sale["seller_id"],
+            "payment_method": sale["payment_method"],
+            "total_amount": sale["total_amount"],
+            "status": sale["status"]
+        }
+        for sale in sales
+    ]})
+
+def publish_stock(stock_levels: dict):
+    """Evento stock_changed com o estoque atual ({product_id: quantidade}) dos produtos alterados"""
+    event_bus.publish("stock_changed", {"products": [
+        {"id": product_id, "stock_quantity": quantity}
+        for product_id, quantity in sorted(stock_levels.items())
+    ]})
+
+def publish_payment(customer_id: int, amount: float, payment_method: str, account_ids):
+    """Evento payment_received com o valor recebido e as contas quitadas (total ou parcialmente)"""
+    snapshot_cache.clear()
+    event_bus.publish("payment_received", {
+        "customer_id": customer_id,
+        "amount": amount,
+        "payment_method": payment_method,
+        "account_ids": sorted(account_ids)
+    })
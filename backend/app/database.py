@@ -1,16 +1,105 @@
-from sqlalchemy import create_engine
+from pathlib import Path
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.database_url)
+# Drivers assíncronos usados pela API para cada banco suportado
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Converte a DATABASE_URL (síncrona) para o driver assíncrono equivalente"""
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database dialect: {dialect}")
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
+def _engine_kwargs(url: str) -> dict:
+    # SQLite não usa pool de conexões configurável (usado apenas em testes/dev)
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_pre_ping": True,
+    }
+
+# Engine síncrona: usada apenas por scripts de linha de comando (init_db, check_data)
+engine = create_engine(settings.database_url, **_engine_kwargs(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona: usada pelos routers da API
+async_engine = create_async_engine(
+    get_async_database_url(settings.database_url),
+    **_engine_kwargs(settings.database_url)
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+# INSERT com suporte a ON CONFLICT (upsert) para cada banco suportado
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def dialect_insert(db, model):
+    """INSERT do dialeto da sessão (síncrona ou assíncrona), com on_conflict_do_update"""
+    return DIALECT_INSERTS[db.bind.dialect.name](model)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+# Schema inicial das migrations (o que o create_all criava antes delas)
+BASELINE_REVISION = "0001"
+
+def _alembic_config():
+    from alembic.config import Config
+    return Config(str(ALEMBIC_INI))
+
+def upgrade_database(connection):
+    """Aplica as migrations pendentes (alembic upgrade head) na conexão. É um
+    passo do deploy (python migrate.py), rodado uma vez antes de subir os
+    workers; a API só confere a revisão (check_database_revision)"""
+    from alembic import command
+
+    config = _alembic_config()
+    config.attributes["connection"] = connection
+    tables = inspect(connection).get_table_names()
+    if tables and "alembic_version" not in tables:
+        # Banco criado com create_all antes das migrations: já tem o schema inicial
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+def check_database_revision(connection):
+    """Falha se o banco não estiver na última migration: cada worker só confere
+    a revisão na inicialização, sem aplicar DDL"""
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    current = MigrationContext.configure(connection).get_current_revision()
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+    if current != head:
+        raise RuntimeError(
+            f"Database is at revision {current}, expected {head}: run 'python migrate.py' before starting the API"
+        )
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
+
+async def release_db(db: AsyncSession):
+    """Devolve ao pool a conexão da sessão da requisição antes de uma resposta em
+    streaming: as dependências com yield (get_db) só terminam quando o streaming
+    acaba, e a autenticação já abriu uma transação nessa sessão. Os geradores
+    que precisam do banco abrem a própria sessão."""
+    await db.close()
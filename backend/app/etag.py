@@ -0,0 +1,46 @@
+"""
+ETags e GET condicional (If-None-Match -> 304) para as listagens de cadastro.
+
+O ETag não é o hash do corpo da resposta: é calculado a partir de uma
+assinatura barata das tabelas envolvidas (quantidade de linhas, maior id e
+maiores created_at/updated_at) ou da linha retornada, mais a URL da
+requisição. Quando o cliente já tem a versão atual, a resposta 304 sai sem
+carregar nem serializar os registros.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# O navegador guarda a resposta mas revalida sempre (enviando If-None-Match)
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(request: Request, *parts) -> str:
+    raw = repr((request.url.path, request.url.query, parts))
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+async def table_etag(db: AsyncSession, request: Request, *models) -> str:
+    """ETag de uma listagem: muda quando qualquer linha das tabelas é criada, alterada ou removida"""
+    signature = select(*[
+        select(column).scalar_subquery()
+        for model in models
+        for column in (func.count(model.id), func.max(model.id), func.max(model.created_at), func.max(model.updated_at))
+    ])
+    return make_etag(request, *(await db.execute(signature)).one())
+
+def row_etag(request: Request, *rows) -> str:
+    """ETag de um registro (e dos registros relacionados serializados com ele)"""
+    return make_etag(request, *[
+        (type(row).__name__, row.id, row.created_at, row.updated_at)
+        for row in rows if row is not None
+    ])
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Define o ETag da resposta e devolve um 304 se o cliente já tem essa versão"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
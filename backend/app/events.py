@@ -0,0 +1,68 @@
+"""
+Pub/sub em memória (por worker) para os feeds em tempo real.
+
+Os routers publicam eventos (sale_created, payment_received, stock_changed)
+depois do commit; cada conexão SSE assina o barramento com uma fila limitada.
+publish() nunca espera: se a fila de um assinante está cheia (cliente lento
+ou parado), o assinante é descartado e o stream é encerrado, e o cliente
+reconecta recebendo de novo o estado completo.
+
+Os eventos só chegam às conexões do worker que os publicou; os feeds enviam
+periodicamente o estado completo para corrigir o que veio de outros workers.
+"""
+import asyncio
+import orjson
+from .config import settings
+
+# Comentário enviado periodicamente para manter as conexões SSE abertas em proxies
+SSE_KEEPALIVE_SECONDS = 15
+
+class Subscription:
+    def __init__(self, bus: "EventBus", queue_size: int):
+        self.bus = bus
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    async def get(self, timeout: float):
+        """Próximo evento (tipo, dados), ou None se nada chegou em timeout segundos"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus._subscribers.discard(self)
+
+class EventBus:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped_subscribers = 0
+        self._subscribers = set()
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def publish(self, event_type: str, data):
+        """Entrega o evento a todos os assinantes sem bloquear; chamar depois do commit"""
+        self.published += 1
+        event = (event_type, data)
+        for subscription in list(self._subscribers):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                subscription.close()
+                self.dropped_subscribers += 1
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+event_bus = EventBus(queue_size=settings.event_queue_size)
+
+def sse_message(event: str, data) -> str:
+    """Mensagem no formato Server-Sent Events"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
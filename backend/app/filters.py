@@ -0,0 +1,22 @@
+"""
+Filtros de período usados pelas listagens, relatórios e exportações.
+
+As datas viram um intervalo semiaberto [início, fim + 1 dia) comparado
+diretamente com a coluna de data/hora, sem funções sobre a coluna
+(func.date(...)) nem concatenação de strings (end_date + " 23:59:59"):
+a comparação usa o índice da coluna e inclui o último segundo do dia.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from fastapi import HTTPException
+
+def date_range(column, start_date: Optional[date], end_date: Optional[date]):
+    """Condições para column em [start_date, end_date + 1 dia); datas ausentes não limitam o intervalo"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    filters = []
+    if start_date:
+        filters.append(column >= datetime.combine(start_date, time.min))
+    if end_date:
+        filters.append(column < datetime.combine(end_date + timedelta(days=1), time.min))
+    return filters
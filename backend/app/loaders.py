@@ -0,0 +1,60 @@
+"""
+Opções de carregamento (eager loading) compartilhadas pelos routers.
+
+Com AsyncSession não existe lazy loading implícito: todo relacionamento
+serializado pelos schemas de resposta precisa ser carregado na própria query.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from .models import (
+    Product, Sale, SaleItem, AccountReceivable, Payment,
+    ProductLocation, SupplierBox, BoxMovement
+)
+
+def product_options():
+    return (joinedload(Product.supplier),)
+
+def sale_options():
+    return (
+        joinedload(Sale.seller),
+        joinedload(Sale.customer),
+        selectinload(Sale.items).joinedload(SaleItem.product).joinedload(Product.supplier),
+    )
+
+def account_receivable_options():
+    return (
+        joinedload(AccountReceivable.customer),
+        joinedload(AccountReceivable.sale).options(*sale_options()),
+    )
+
+def payment_options():
+    return (
+        joinedload(Payment.user),
+        joinedload(Payment.account_receivable).options(*account_receivable_options()),
+    )
+
+def product_location_options():
+    return (
+        joinedload(ProductLocation.product).joinedload(Product.supplier),
+        joinedload(ProductLocation.location),
+    )
+
+def supplier_box_options():
+    return (joinedload(SupplierBox.supplier),)
+
+def box_movement_options():
+    return (
+        joinedload(BoxMovement.user),
+        joinedload(BoxMovement.supplier_box).joinedload(SupplierBox.supplier),
+    )
+
+async def reload(db: AsyncSession, model, object_id: int, options=()):
+    """Recarrega um objeto (colunas com default do servidor + relacionamentos) após o commit"""
+    result = await db.execute(
+        select(model)
+        .options(*options)
+        .filter(model.id == object_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().one()
@@ -1,18 +1,38 @@
-from fastapi import FastAPI
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine
-from .models import Base
-from .routers import auth, products, sales, customers, suppliers, accounts_receivable, users, locations, supplier_boxes
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware, instrument_engine, render_metrics
+from .config import settings
+from .database import async_engine, check_database_revision
+from .pagination import NEXT_CURSOR_HEADER
+from .overdue import OverdueScheduler
+from .catalog import CATALOG_VERSION_HEADER
+from .routers import auth, products, sales, customers, suppliers, accounts_receivable, users, locations, supplier_boxes, search, exports, stock_alerts, dashboard
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # As migrations são aplicadas no deploy (python migrate.py); aqui só confere a revisão
+    async with async_engine.connect() as conn:
+        await conn.run_sync(check_database_revision)
+    overdue_scheduler = OverdueScheduler(settings.overdue_check_interval_seconds)
+    overdue_scheduler.start()
+    yield
+    await overdue_scheduler.stop()
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Hortifruti PDV API",
     description="API para sistema de PDV de hortifruti",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -20,8 +40,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, CATALOG_VERSION_HEADER, "ETag"],
 )
 
+# Por último: mede a requisição inteira, incluindo compressão e CORS
+app.add_middleware(MetricsMiddleware)
+instrument_engine(async_engine)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(products.router)
@@ -32,6 +57,10 @@ app.include_router(accounts_receivable.router)
 app.include_router(users.router)
 app.include_router(locations.router)
 app.include_router(supplier_boxes.router)
+app.include_router(search.router)
+app.include_router(exports.router)
+app.include_router(stock_alerts.router)
+app.include_router(dashboard.router)
 
 @app.get("/")
 async def root():
@@ -39,4 +68,16 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"} 
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # O Prometheus envia Authorization: Bearer <METRICS_TOKEN>; sem token o endpoint
+    # só responde com METRICS_PUBLIC=true (ex.: porta acessível apenas pela rede interna)
+    if settings.metrics_token:
+        authorization = request.headers.get("authorization", "")
+        if not secrets.compare_digest(authorization, f"Bearer {settings.metrics_token}"):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    elif not settings.metrics_public:
+        raise HTTPException(status_code=403, detail="Metrics are disabled: set METRICS_TOKEN or METRICS_PUBLIC")
+    return PlainTextResponse(render_metrics(async_engine), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,232 @@
+"""
+Métricas da API no formato texto do Prometheus (GET /metrics).
+
+O MetricsMiddleware mede cada requisição: latência por rota (o template, ex.
+/sales/{sale_id}, para não criar uma série por id), contagem por status e
+requisições em andamento. Os eventos da engine do SQLAlchemy somam os
+statements e o tempo no banco da requisição atual (por um ContextVar), sem
+consultas extras. As vendas contam quantas foram feitas e quantos itens cada
+uma tem; vendas por minuto e itens por venda saem dessas séries no Prometheus
+(rate(hortifruti_sales_total[1m]) * 60).
+
+Tudo é mantido em memória por worker e alterado apenas pelo event loop (o
+custo por requisição é de algumas somas em dicts). Os outros contadores da
+API (senhas, contas vencidas, caches e barramento de eventos) são lidos dos
+próprios módulos na hora da coleta.
+"""
+import bisect
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from starlette.types import ASGIApp, Receive, Scope, Send
+from . import overdue, passwords
+from .auth import user_cache
+from .catalog import product_catalog
+from .dashboard import snapshot_cache
+from .events import event_bus
+from .stock_overview import overview_cache
+
+PREFIX = "hortifruti"
+# Limites dos buckets (segundos) da latência das requisições
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Limites dos buckets de itens por venda
+SALE_ITEMS_BUCKETS = (1, 2, 3, 5, 10, 20, 50)
+# Rótulo das requisições que não casaram com nenhuma rota (404)
+UNMATCHED_ROUTE = "unmatched"
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+# (statements, segundos no banco) da requisição em andamento
+_request_db = ContextVar("request_db", default=None)
+
+in_flight = 0
+request_latency = {}  # (método, rota) -> Histogram
+request_db = {}  # (método, rota) -> [statements, segundos]
+responses = {}  # (método, rota, status) -> contagem
+db_totals = {"statements": 0, "seconds": 0.0}
+sales = {"count": 0, "amount": 0.0, "items": Histogram(SALE_ITEMS_BUCKETS)}
+
+_route_paths = {}
+
+def _route(scope: Scope) -> str:
+    """Template da rota que atendeu a requisição (o router grava o endpoint no scope)"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return UNMATCHED_ROUTE
+    if endpoint not in _route_paths:
+        for route in scope["app"].routes:
+            if getattr(route, "endpoint", None) is not None:
+                _route_paths.setdefault(route.endpoint, route.path)
+    return _route_paths.get(endpoint, UNMATCHED_ROUTE)
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        global in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            in_flight -= 1
+            _request_db.reset(token)
+            key = (scope["method"], _route(scope))
+            if key not in request_latency:
+                request_latency[key] = Histogram(LATENCY_BUCKETS)
+                request_db[key] = [0, 0.0]
+            request_latency[key].observe(elapsed)
+            request_db[key][0] += db[0]
+            request_db[key][1] += db[1]
+            responses[key + (status,)] = responses.get(key + (status,), 0) + 1
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_started_at"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info.pop("metrics_started_at", None)
+    if started_at is None:
+        return
+    elapsed = time.perf_counter() - started_at
+    db_totals["statements"] += 1
+    db_totals["seconds"] += elapsed
+    db = _request_db.get()
+    if db is not None:
+        db[0] += 1
+        db[1] += elapsed
+
+def instrument_engine(async_engine):
+    """Registra os eventos que contam statements e tempo no banco da engine"""
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def record_sales(item_counts, amount: float):
+    """Conta as vendas gravadas (item_counts: itens de cada venda); chamar depois do commit"""
+    for items in item_counts:
+        sales["count"] += 1
+        sales["items"].observe(items)
+    sales["amount"] += amount
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Exposition:
+    def __init__(self):
+        self.lines = []
+
+    def metric(self, name: str, kind: str, help_text: str, samples):
+        """samples: lista de (rótulos, valor)"""
+        name = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, histograms):
+        """histograms: lista de (rótulos, Histogram)"""
+        name = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms:
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                cumulative += count
+                self.lines.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {cumulative}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            self.lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def _cache_samples(**caches):
+    return [({"cache": name}, cache) for name, cache in caches.items()]
+
+def render_metrics(async_engine) -> str:
+    out = _Exposition()
+
+    out.metric("http_requests_in_flight", "gauge", "Requisições em andamento", [({}, in_flight)])
+    out.histogram("http_request_duration_seconds", "Latência das requisições por rota", [
+        ({"method": method, "route": route}, histogram)
+        for (method, route), histogram in sorted(request_latency.items())
+    ])
+    out.metric("http_responses_total", "counter", "Respostas por rota e status", [
+        ({"method": method, "route": route, "status": status}, count)
+        for (method, route, status), count in sorted(responses.items())
+    ])
+    out.metric("http_request_db_statements_total", "counter", "Statements SQL executados pelas requisições, por rota", [
+        ({"method": method, "route": route}, db[0]) for (method, route), db in sorted(request_db.items())
+    ])
+    out.metric("http_request_db_seconds_total", "counter", "Tempo no banco das requisições, por rota", [
+        ({"method": method, "route": route}, db[1]) for (method, route), db in sorted(request_db.items())
+    ])
+
+    out.metric("db_statements_total", "counter", "Statements SQL executados pela API", [({}, db_totals["statements"])])
+    out.metric("db_seconds_total", "counter", "Tempo total no banco", [({}, db_totals["seconds"])])
+    pool = async_engine.pool
+    # SQLite (testes/dev) não usa o pool com tamanho configurável
+    if isinstance(pool, QueuePool):
+        out.metric("db_pool_size", "gauge", "Tamanho do pool de conexões", [({}, pool.size())])
+        out.metric("db_pool_checked_out", "gauge", "Conexões em uso", [({}, pool.checkedout())])
+        out.metric("db_pool_overflow", "gauge", "Conexões abertas além do pool_size", [({}, max(pool.overflow(), 0))])
+
+    out.metric("sales_total", "counter", "Vendas registradas", [({}, sales["count"])])
+    out.metric("sales_amount_total", "counter", "Valor das vendas registradas", [({}, sales["amount"])])
+    out.histogram("sale_items", "Itens por venda", [({}, sales["items"])])
+
+    caches = _cache_samples(
+        users=user_cache, catalog=product_catalog, stock_overview=overview_cache, dashboard=snapshot_cache
+    )
+    out.metric("cache_hits_total", "counter", "Acertos dos caches em memória", [
+        (labels, cache.hits) for labels, cache in caches
+    ])
+    out.metric("cache_misses_total", "counter", "Faltas dos caches em memória", [
+        (labels, cache.misses) for labels, cache in caches
+    ])
+
+    out.metric("password_hash_in_flight", "gauge", "Operações de bcrypt em andamento", [({}, passwords.stats["in_flight"])])
+    out.metric("password_hash_completed_total", "counter", "Operações de bcrypt concluídas", [({}, passwords.stats["completed"])])
+    out.metric("password_hash_rejected_total", "counter", "Operações de bcrypt recusadas (503)", [({}, passwords.stats["rejected"])])
+    out.metric("password_hash_wait_seconds_total", "counter", "Espera na fila do bcrypt", [({}, passwords.stats["wait_seconds_total"])])
+    out.metric("password_hash_run_seconds_total", "counter", "Tempo de execução do bcrypt", [({}, passwords.stats["run_seconds_total"])])
+
+    out.metric("overdue_check_runs_total", "counter", "Execuções da manutenção de contas vencidas", [({}, overdue.stats["runs"])])
+    out.metric("overdue_check_errors_total", "counter", "Falhas da manutenção de contas vencidas", [({}, overdue.stats["errors"])])
+    out.metric("overdue_accounts_marked_total", "counter", "Contas marcadas como vencidas", [({}, overdue.stats["rows_updated_total"])])
+
+    out.metric("events_published_total", "counter", "Eventos publicados no barramento", [({}, event_bus.published)])
+    out.metric("event_subscribers", "gauge", "Conexões assinando o barramento", [({}, event_bus.subscribers)])
+    out.metric("event_subscribers_dropped_total", "counter", "Assinantes descartados por fila cheia", [({}, event_bus.dropped_subscribers)])
+    return out.text()
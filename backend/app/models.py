@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 import enum
 
+# Índice parcial: só as linhas ativas, que são as que as listagens percorrem
+ACTIVE_ONLY = {"postgresql_where": text("is_active"), "sqlite_where": text("is_active = 1")}
+
 class UserRole(str, enum.Enum):
     admin = "admin"
     vendedor = "vendedor"
@@ -26,6 +29,7 @@ class User(Base):
 
 class Supplier(Base):
     __tablename__ = "suppliers"
+    __table_args__ = (Index("ix_suppliers_active_id", "id", **ACTIVE_ONLY),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -41,6 +45,7 @@ class Supplier(Base):
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (Index("ix_customers_active_id", "id", **ACTIVE_ONLY),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -48,6 +53,7 @@ class Customer(Base):
     phone = Column(String)
     email = Column(String)
     address = Column(Text)
+    credit_limit = Column(Float, nullable=True)  # Limite para compras fiado (sem limite quando vazio)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -78,6 +84,11 @@ class Product(Base):
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_seller_id_created_at", "seller_id", "created_at"),
+        Index("ix_sales_created_at", "created_at"),
+        Index("ix_sales_customer_id", "customer_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
@@ -94,6 +105,10 @@ class Sale(Base):
 
 class SaleItem(Base):
     __tablename__ = "sale_items"
+    __table_args__ = (
+        Index("ix_sale_items_sale_id", "sale_id"),
+        Index("ix_sale_items_product_id", "product_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sale_id = Column(Integer, ForeignKey("sales.id"))
@@ -107,13 +122,16 @@ class SaleItem(Base):
 
 class StockMovement(Base):
     __tablename__ = "stock_movements"
+    __table_args__ = (Index("ix_stock_movements_product_id_created_at", "product_id", "created_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
-    movement_type = Column(String)  # entrada, saída, ajuste, transferência
+    movement_type = Column(String)  # entrada, saída, venda, ajuste, transferência
     quantity = Column(Float)
+    stock_change = Column(Float, nullable=False, default=0)  # Efeito no estoque do produto (negativo nas saídas)
     reason = Column(Text)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=True)
     from_location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
     to_location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -123,8 +141,39 @@ class StockMovement(Base):
     from_location = relationship("Location", foreign_keys=[from_location_id])
     to_location = relationship("Location", foreign_keys=[to_location_id])
 
+# Estoque de um produto em um instante: ponto de partida do replay do ledger (app/stock.py)
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (Index("ix_stock_snapshots_product_id_taken_at", "product_id", "taken_at", unique=True),)
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Float, nullable=False)
+    taken_at = Column(DateTime(timezone=True), nullable=False)
+
+# Alerta de estoque baixo de um produto (no total ou em uma localização), mantido em app/stock_alerts.py
+class StockAlert(Base):
+    __tablename__ = "stock_alerts"
+    __table_args__ = (
+        Index("ix_stock_alerts_open_product_id", "product_id",
+              postgresql_where=text("resolved_at IS NULL"), sqlite_where=text("resolved_at IS NULL")),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)  # None: estoque total (min_stock)
+    quantity = Column(Float, nullable=False)  # Quantidade quando o alerta foi aberto
+    threshold = Column(Float, nullable=False)  # Mínimo configurado quando o alerta foi aberto
+    opened_at = Column(DateTime(timezone=True), server_default=func.now())
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
+
 class AccountReceivable(Base):
     __tablename__ = "accounts_receivable"
+    __table_args__ = (
+        Index("ix_accounts_receivable_customer_id_status_due_date", "customer_id", "status", "due_date"),
+        Index("ix_accounts_receivable_status_due_date", "status", "due_date"),
+        Index("ix_accounts_receivable_sale_id", "sale_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
@@ -140,9 +189,11 @@ class AccountReceivable(Base):
     
     sale = relationship("Sale")
     customer = relationship("Customer")
+    payments = relationship("Payment", back_populates="account_receivable", order_by="Payment.payment_date")
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (Index("ix_payments_account_receivable_id_payment_date", "account_receivable_id", "payment_date"),)
     
     id = Column(Integer, primary_key=True, index=True)
     account_receivable_id = Column(Integer, ForeignKey("accounts_receivable.id"), nullable=False)
@@ -152,11 +203,12 @@ class Payment(Base):
     notes = Column(Text)  # Observações sobre o pagamento
     created_by = Column(Integer, ForeignKey("users.id"))
     
-    account_receivable = relationship("AccountReceivable")
+    account_receivable = relationship("AccountReceivable", back_populates="payments")
     user = relationship("User")
 
 class Location(Base):
     __tablename__ = "locations"
+    __table_args__ = (Index("ix_locations_active_id", "id", **ACTIVE_ONLY),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)  # Ex: "Câmara Fria 1", "Câmara Fria 2", "Depósito", "Área Externa"
@@ -172,6 +224,10 @@ class Location(Base):
 
 class ProductLocation(Base):
     __tablename__ = "product_locations"
+    __table_args__ = (
+        Index("ix_product_locations_location_id", "location_id"),
+        Index("ix_product_locations_product_id_location_id", "product_id", "location_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -188,6 +244,7 @@ class ProductLocation(Base):
 
 class SupplierBox(Base):
     __tablename__ = "supplier_boxes"
+    __table_args__ = (Index("ix_supplier_boxes_active_created_at", "created_at", **ACTIVE_ONLY),)
     
     id = Column(Integer, primary_key=True, index=True)
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
@@ -217,4 +274,48 @@ class BoxMovement(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     supplier_box = relationship("SupplierBox", back_populates="box_movements")
-    user = relationship("User") 
\ No newline at end of file
+    user = relationship("User") 
+
+# Tabelas de consolidação (rollup) das vendas, mantidas incrementalmente em app/rollups.py
+class DailySalesRollup(Base):
+    __tablename__ = "daily_sales_rollups"
+    __table_args__ = (UniqueConstraint("day", "seller_id", "payment_method"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    payment_method = Column(String, nullable=False)
+    sales_count = Column(Integer, default=0)
+    total_amount = Column(Float, default=0)
+
+class DailyProductRollup(Base):
+    __tablename__ = "daily_product_rollups"
+    __table_args__ = (UniqueConstraint("day", "seller_id", "payment_method", "product_id"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    payment_method = Column(String, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    items_count = Column(Integer, default=0)
+    quantity = Column(Float, default=0)
+    total_amount = Column(Float, default=0)
+    
+    product = relationship("Product")
+
+# Versões dos caches em memória dos workers (ver app/cache.py)
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Saldo devedor de cada cliente, mantido incrementalmente em app/balances.py
+class CustomerBalance(Base):
+    __tablename__ = "customer_balances"
+    
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+    open_amount = Column(Float, nullable=False, default=0)  # Contas em aberto (pending, partial, overdue)
+    overdue_amount = Column(Float, nullable=False, default=0)  # Parte do valor em aberto já vencida
+    last_payment_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,101 @@
+"""
+Manutenção do status "overdue" das contas a receber.
+
+Um único UPDATE marca como vencidas todas as contas em aberto com vencimento
+já passado, sem carregar as contas no Python. Roda em segundo plano dentro
+da API a cada overdue_check_interval_seconds (0 desativa) e também pela linha
+de comando (mark_overdue.py). Com vários workers cada um roda o UPDATE; como
+ele é idempotente, execuções simultâneas só encontram menos linhas.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from .balances import add_to_balances
+from .database import AsyncSessionLocal
+from .models import AccountReceivable
+
+logger = logging.getLogger(__name__)
+
+# Contas em aberto que passam a vencidas depois do vencimento
+OPEN_STATUSES = ["pending", "partial"]
+
+# Métricas das execuções (alteradas apenas pelo event loop)
+stats = {
+    "runs": 0,
+    "errors": 0,
+    "rows_updated_total": 0,
+    "last_rows_updated": 0,
+    "last_duration_seconds": 0.0,
+    "last_run_at": None,
+}
+
+async def mark_overdue_accounts(db: AsyncSession, now: Optional[datetime] = None) -> int:
+    """Marca como overdue as contas em aberto vencidas antes de now; retorna quantas mudaram"""
+    now = now or datetime.now()
+    updated = (await db.execute(
+        update(AccountReceivable)
+        .where(AccountReceivable.due_date < now, AccountReceivable.status.in_(OPEN_STATUSES))
+        .values(status="overdue", updated_at=now)
+        .returning(
+            AccountReceivable.customer_id,
+            AccountReceivable.amount - func.coalesce(AccountReceivable.paid_amount, 0)
+        )
+        .execution_options(synchronize_session=False)
+    )).all()
+    
+    # O valor das contas que venceram passa a contar como vencido no saldo dos clientes
+    overdue = {}
+    for customer_id, remaining in updated:
+        overdue[customer_id] = overdue.get(customer_id, 0) + remaining
+    await add_to_balances(db, {customer_id: (0, amount) for customer_id, amount in overdue.items()})
+    return len(updated)
+
+async def run_overdue_check() -> int:
+    """Executa a manutenção em uma transação própria e registra duração e linhas alteradas"""
+    started_at = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        rows = await mark_overdue_accounts(db)
+        await db.commit()
+    duration = time.perf_counter() - started_at
+    stats["runs"] += 1
+    stats["rows_updated_total"] += rows
+    stats["last_rows_updated"] = rows
+    stats["last_duration_seconds"] = duration
+    stats["last_run_at"] = datetime.now()
+    logger.info("Marked %d accounts receivable as overdue in %.3fs", rows, duration)
+    return rows
+
+async def run_periodically(interval: float):
+    """Laço do agendador: roda na inicialização e depois a cada interval segundos"""
+    while True:
+        try:
+            await run_overdue_check()
+        except Exception:
+            stats["errors"] += 1
+            logger.exception("Overdue accounts check failed")
+        await asyncio.sleep(interval)
+
+class OverdueScheduler:
+    """Tarefa de segundo plano da API (iniciada e parada no lifespan)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(run_periodically(self.interval))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,43 @@
+"""
+Paginação por cursor (keyset) para as listagens.
+
+O cursor é opaco para o cliente: codifica os valores da chave de ordenação da
+última linha da página. A próxima página é buscada com WHERE (chave) > cursor
+em vez de OFFSET, então a página 500 custa o mesmo que a página 1.
+"""
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def apply_cursor(query, columns, cursor: str, descending: bool = False):
+    """Filtra a query para começar logo após o cursor, na ordem das colunas informadas"""
+    values = decode_cursor(cursor, columns)
+    if descending:
+        return query.filter(tuple_(*columns) < tuple(values))
+    return query.filter(tuple_(*columns) > tuple(values))
+
+def set_next_cursor(response: Response, rows, limit: int, key):
+    """Publica o cursor da próxima página no header X-Next-Cursor quando a página veio cheia"""
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
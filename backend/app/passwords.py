@@ -0,0 +1,62 @@
+"""
+Hash e verificação de senhas (bcrypt) fora do event loop.
+
+O bcrypt é intencionalmente lento (dezenas a centenas de ms por operação);
+rodando direto em um handler async ele trava todas as outras requisições do
+worker. Aqui as operações vão para um pool de threads dedicado e limitado (o
+bcrypt libera o GIL) e o número de operações em espera é limitado: acima de
+password_hash_max_pending a requisição recebe 503 em vez de enfileirar sem fim.
+"""
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from .config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt")
+
+# Métricas do pool (alteradas apenas pelo event loop)
+stats = {
+    "in_flight": 0,
+    "completed": 0,
+    "rejected": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "run_seconds_total": 0.0,
+}
+
+def _timed(func, submitted_at, *args):
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, started_at - submitted_at, time.perf_counter() - started_at
+
+async def _run(func, *args):
+    if stats["in_flight"] >= settings.password_hash_max_pending:
+        stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations, try again",
+            headers={"Retry-After": "1"},
+        )
+    stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result, waited, ran = await loop.run_in_executor(_executor, _timed, func, time.perf_counter(), *args)
+    finally:
+        stats["in_flight"] -= 1
+    stats["completed"] += 1
+    stats["wait_seconds_total"] += waited
+    stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+    stats["run_seconds_total"] += ran
+    return result
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+async def verify_and_update_password(password: str, hashed_password: str):
+    """Retorna (senha válida, novo hash); o novo hash vem preenchido quando o
+    hash salvo usa um custo (bcrypt_rounds) diferente do configurado"""
+    return await _run(pwd_context.verify_and_update, password, hashed_password)
@@ -0,0 +1,128 @@
+"""
+Manutenção das tabelas de rollup de vendas (dia x vendedor x forma de pagamento,
+e o mesmo recorte por produto).
+
+As vendas são somadas (ou subtraídas) nos rollups com INSERT ... SELECT ...
+ON CONFLICT DO UPDATE, na mesma transação que cria/altera a venda. Vendas
+canceladas não entram nos rollups.
+"""
+from datetime import date
+from typing import Optional
+from sqlalchemy import Date, select, delete, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .database import dialect_insert
+from .models import Sale, SaleItem, DailySalesRollup, DailyProductRollup
+
+SALES_KEYS = ["day", "seller_id", "payment_method"]
+SALES_VALUES = ["sales_count", "total_amount"]
+PRODUCT_KEYS = ["day", "seller_id", "payment_method", "product_id"]
+PRODUCT_VALUES = ["items_count", "quantity", "total_amount"]
+
+def _sale_day():
+    # date() existe no PostgreSQL e no SQLite e usa o mesmo relógio do server_default now()
+    return func.date(Sale.created_at, type_=Date)
+
+def _sales_select(sale_filter, sign: int):
+    day = _sale_day()
+    return select(
+        day,
+        Sale.seller_id,
+        Sale.payment_method,
+        func.count(Sale.id) * sign,
+        func.sum(Sale.total_amount) * sign
+    ).filter(
+        sale_filter,
+        Sale.status != "cancelled",
+        Sale.seller_id.isnot(None)
+    ).group_by(day, Sale.seller_id, Sale.payment_method)
+
+def _products_select(sale_filter, sign: int):
+    day = _sale_day()
+    return select(
+        day,
+        Sale.seller_id,
+        Sale.payment_method,
+        SaleItem.product_id,
+        func.count(SaleItem.id) * sign,
+        func.sum(SaleItem.quantity) * sign,
+        func.sum(SaleItem.total_price) * sign
+    ).join(Sale, Sale.id == SaleItem.sale_id).filter(
+        sale_filter,
+        Sale.status != "cancelled",
+        Sale.seller_id.isnot(None)
+    ).group_by(day, Sale.seller_id, Sale.payment_method, SaleItem.product_id)
+
+def _upsert(db, model, keys, values, rows):
+    stmt = dialect_insert(db, model).from_select(keys + values, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={column: getattr(model, column) + getattr(stmt.excluded, column) for column in values}
+    )
+
+def _increment_statements(db, sale_ids, sign: int):
+    sale_filter = Sale.id.in_(sale_ids)
+    return [
+        _upsert(db, DailySalesRollup, SALES_KEYS, SALES_VALUES, _sales_select(sale_filter, sign)),
+        _upsert(db, DailyProductRollup, PRODUCT_KEYS, PRODUCT_VALUES, _products_select(sale_filter, sign)),
+    ]
+
+async def add_sales_to_rollups(db: AsyncSession, sale_ids):
+    """Soma as vendas (já gravadas na transação atual) aos rollups"""
+    for stmt in _increment_statements(db, sale_ids, 1):
+        await db.execute(stmt)
+
+async def daily_summary(db: AsyncSession, day: date, seller_id: Optional[int] = None) -> dict:
+    """Resumo das vendas do dia (total, quantidade e por forma de pagamento), lido do rollup;
+    com seller_id, só as vendas desse vendedor"""
+    query = select(
+        DailySalesRollup.payment_method,
+        func.sum(DailySalesRollup.total_amount).label('total'),
+        func.sum(DailySalesRollup.sales_count).label('count')
+    ).filter(
+        DailySalesRollup.day == day,
+        DailySalesRollup.sales_count > 0
+    )
+    if seller_id is not None:
+        query = query.filter(DailySalesRollup.seller_id == seller_id)
+    payment_methods = (await db.execute(query.group_by(DailySalesRollup.payment_method))).all()
+    
+    return {
+        "date": day.isoformat(),
+        "total_sales": float(sum(pm.total for pm in payment_methods)),
+        "total_count": int(sum(pm.count for pm in payment_methods)),
+        "payment_methods": [
+            {
+                "method": pm.payment_method,
+                "total": float(pm.total),
+                "count": int(pm.count)
+            }
+            for pm in payment_methods
+        ]
+    }
+
+async def remove_sales_from_rollups(db: AsyncSession, sale_ids):
+    """Subtrai dos rollups o estado atual das vendas (antes de alterá-las)"""
+    for stmt in _increment_statements(db, sale_ids, -1):
+        await db.execute(stmt)
+
+def rebuild_rollups(db: Session, start: Optional[date] = None, end: Optional[date] = None):
+    """Recalcula os rollups a partir das vendas (backfill), opcionalmente para um intervalo de dias"""
+    day = _sale_day()
+    sale_filter = true()
+    if start:
+        sale_filter = sale_filter & (day >= start)
+    if end:
+        sale_filter = sale_filter & (day <= end)
+
+    for model in (DailySalesRollup, DailyProductRollup):
+        stmt = delete(model)
+        if start:
+            stmt = stmt.where(model.day >= start)
+        if end:
+            stmt = stmt.where(model.day <= end)
+        db.execute(stmt)
+
+    db.execute(dialect_insert(db, DailySalesRollup).from_select(SALES_KEYS + SALES_VALUES, _sales_select(sale_filter, 1)))
+    db.execute(dialect_insert(db, DailyProductRollup).from_select(PRODUCT_KEYS + PRODUCT_VALUES, _products_select(sale_filter, 1)))
+    db.commit()
@@ -1,17 +1,26 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select, insert, update, case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
 from ..database import get_db
-from ..models import AccountReceivable, Payment, Sale, Customer, User
+from ..dashboard import publish_payment
+from ..balances import PAYABLE_STATUSES, BALANCE_TOLERANCE, add_to_balances, refresh_balances
+from ..filters import date_range
+from ..loaders import account_receivable_options, payment_options, reload
+from ..pagination import apply_cursor, set_next_cursor
+from ..serialization import model_response
+from ..models import AccountReceivable, CustomerBalance, Payment, Sale, Customer, User
 from ..schemas import (
     AccountReceivableCreate, 
     AccountReceivableUpdate, 
     AccountReceivable as AccountReceivableSchema,
+    AccountReceivableListItem,
     PaymentCreate,
     Payment as PaymentSchema
 )
 from ..auth import get_current_active_user, get_current_admin_user
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 router = APIRouter(
     prefix="/accounts-receivable",
@@ -19,20 +28,90 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.get("/", response_model=List[AccountReceivableSchema])
+def _remaining():
+    return AccountReceivable.amount - func.coalesce(AccountReceivable.paid_amount, 0)
+
+async def _lock_accounts(db: AsyncSession, *filters):
+    """Saldo das contas com SELECT ... FOR UPDATE, em ordem FIFO (vencimento, id).
+    Dois caixas recebendo do mesmo cliente bloqueiam as contas na mesma ordem."""
+    return await db.execute(
+        select(
+            AccountReceivable.id,
+            AccountReceivable.customer_id,
+            AccountReceivable.status,
+            _remaining().label("remaining")
+        )
+        .filter(*filters)
+        .order_by(AccountReceivable.due_date.asc(), AccountReceivable.id.asc())
+        .with_for_update()
+    )
+
+async def _apply_payments(db: AsyncSession, accounts, allocations: dict, now: datetime):
+    """Soma os valores ({conta: valor}) em paid_amount com um único UPDATE atômico,
+    quita as vendas das contas pagas e desconta os valores do saldo dos clientes.
+    O UPDATE só aplica o valor se ele ainda cabe no saldo da conta; se alguma conta
+    mudou desde a leitura (accounts, de _lock_accounts), nada é aplicado (409)."""
+    amount = case(allocations, value=AccountReceivable.id)
+    paid_amount = func.coalesce(AccountReceivable.paid_amount, 0)
+    fully_paid = paid_amount + amount >= AccountReceivable.amount - BALANCE_TOLERANCE
+    updated = (await db.execute(
+        update(AccountReceivable)
+        .where(
+            AccountReceivable.id.in_(list(allocations)),
+            AccountReceivable.amount - paid_amount >= amount - BALANCE_TOLERANCE
+        )
+        .values(
+            paid_amount=paid_amount + amount,
+            status=case((fully_paid, "paid"), (AccountReceivable.due_date < now, "overdue"), else_="partial"),
+            paid_at=case((fully_paid, now), else_=AccountReceivable.paid_at),
+            updated_at=now
+        )
+        .returning(AccountReceivable.id, AccountReceivable.customer_id, AccountReceivable.status, _remaining())
+        .execution_options(synchronize_session=False)
+    )).all()
+    if len(updated) != len(allocations):
+        raise HTTPException(status_code=409, detail="Account balance changed, try again")
+    
+    # Atualizar também a data de quitação das vendas
+    await db.execute(
+        update(Sale)
+        .where(Sale.id.in_(
+            select(AccountReceivable.sale_id).filter(
+                AccountReceivable.id.in_(list(allocations)),
+                AccountReceivable.status == "paid"
+            )
+        ))
+        .values(status="completed", paid_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    
+    before = {account.id: account for account in accounts}
+    deltas = {}
+    for account_id, customer_id, status, remaining in updated:
+        previous = before[account_id]
+        overdue_delta = (remaining if status == "overdue" else 0) - (previous.remaining if previous.status == "overdue" else 0)
+        open_delta, overdue_total = deltas.get(customer_id, (0, 0))
+        deltas[customer_id] = (open_delta - allocations[account_id], overdue_total + overdue_delta)
+    await add_to_balances(db, deltas, last_payment_at=now)
+
+@router.get("/", response_model=List[AccountReceivableListItem])
 async def get_accounts_receivable(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     status: Optional[str] = None,
     customer_name: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    query = db.query(AccountReceivable).options(
+    # Número constante de queries: contas (com cliente e venda) + pagamentos (selectin)
+    query = select(AccountReceivable).options(
+        joinedload(AccountReceivable.customer),
         joinedload(AccountReceivable.sale),
-        joinedload(AccountReceivable.customer)
+        selectinload(AccountReceivable.payments).joinedload(Payment.user)
     )
     
     if status:
@@ -41,66 +120,31 @@ async def get_accounts_receivable(
     if customer_name:
         query = query.join(Customer).filter(Customer.name.ilike(f"%{customer_name}%"))
     
-    if start_date:
-        query = query.filter(AccountReceivable.due_date >= start_date)
-    
-    if end_date:
-        query = query.filter(AccountReceivable.due_date <= end_date + " 23:59:59")
+    query = query.filter(*date_range(AccountReceivable.due_date, start_date, end_date))
     
     if current_user.role != "admin":
         # Vendedores só veem contas de vendas que eles fizeram
         query = query.join(Sale).filter(Sale.seller_id == current_user.id)
     
-    accounts = query.order_by(AccountReceivable.due_date.asc()).offset(skip).limit(limit).all()
+    # Paginação por cursor (due_date, id); skip continua aceito como alternativa
+    if cursor:
+        query = apply_cursor(query, (AccountReceivable.due_date, AccountReceivable.id), cursor)
+    else:
+        query = query.offset(skip)
     
-    # Buscar pagamentos para cada conta
-    result = []
-    for account in accounts:
-        payments = db.query(Payment).options(
-            joinedload(Payment.user)
-        ).filter(Payment.account_receivable_id == account.id).order_by(Payment.payment_date.asc()).all()
-        
-        account_dict = {
-            "id": account.id,
-            "sale_id": account.sale_id,
-            "customer_id": account.customer_id,
-            "amount": account.amount,
-            "paid_amount": account.paid_amount,
-            "due_date": account.due_date,
-            "status": account.status,
-            "paid_at": account.paid_at,
-            "notes": account.notes,
-            "created_at": account.created_at,
-            "updated_at": account.updated_at,
-            "sale": account.sale,
-            "customer": account.customer,
-            "payments": [
-                {
-                    "id": payment.id,
-                    "amount": payment.amount,
-                    "payment_method": payment.payment_method,
-                    "payment_date": payment.payment_date,
-                    "notes": payment.notes,
-                    "created_by": payment.created_by,
-                    "user": payment.user
-                }
-                for payment in payments
-            ]
-        }
-        result.append(account_dict)
-    
-    return result
+    accounts = (await db.scalars(
+        query.order_by(AccountReceivable.due_date.asc(), AccountReceivable.id.asc()).limit(limit)
+    )).all()
+    set_next_cursor(response, accounts, limit, lambda account: (account.due_date, account.id))
+    return model_response(List[AccountReceivableListItem], accounts, response)
 
 @router.get("/{account_id}", response_model=AccountReceivableSchema)
 async def get_account_receivable(
     account_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    account = db.query(AccountReceivable).options(
-        joinedload(AccountReceivable.sale),
-        joinedload(AccountReceivable.customer)
-    ).filter(AccountReceivable.id == account_id).first()
+    account = await db.get(AccountReceivable, account_id, options=account_receivable_options())
     
     if not account:
         raise HTTPException(status_code=404, detail="Account receivable not found")
@@ -115,37 +159,37 @@ async def get_account_receivable(
 @router.post("/", response_model=AccountReceivableSchema, status_code=201)
 async def create_account_receivable(
     account: AccountReceivableCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     # Verificar se a venda existe
-    sale = db.query(Sale).filter(Sale.id == account.sale_id).first()
+    sale = await db.get(Sale, account.sale_id)
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
     
     # Verificar se a venda já tem uma conta a receber
-    existing_account = db.query(AccountReceivable).filter(
+    existing_account = await db.scalar(select(AccountReceivable).filter(
         AccountReceivable.sale_id == account.sale_id
-    ).first()
+    ))
     if existing_account:
         raise HTTPException(status_code=400, detail="Sale already has an account receivable")
     
     # Criar a conta a receber
     db_account = AccountReceivable(**account.dict())
     db.add(db_account)
-    db.commit()
-    db.refresh(db_account)
+    await add_to_balances(db, {account.customer_id: (account.amount, 0)})
+    await db.commit()
     
-    return db_account
+    return await reload(db, AccountReceivable, db_account.id, account_receivable_options())
 
 @router.put("/{account_id}", response_model=AccountReceivableSchema)
 async def update_account_receivable(
     account_id: int,
     account_update: AccountReceivableUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    db_account = db.query(AccountReceivable).filter(AccountReceivable.id == account_id).first()
+    db_account = await db.get(AccountReceivable, account_id)
     if not db_account:
         raise HTTPException(status_code=404, detail="Account receivable not found")
     
@@ -164,7 +208,7 @@ async def update_account_receivable(
         
         # Atualizar também a data de quitação da venda
         if db_account.sale_id:
-            sale = db.query(Sale).filter(Sale.id == db_account.sale_id).first()
+            sale = await db.get(Sale, db_account.sale_id)
             if sale:
                 sale.paid_at = datetime.now()
                 sale.status = "completed"
@@ -173,102 +217,148 @@ async def update_account_receivable(
     elif db_account.due_date < datetime.now():
         db_account.status = "overdue"
     
-    db.commit()
-    db.refresh(db_account)
-    return db_account
+    # Edição avulsa: recalcula o saldo do cliente a partir das contas
+    await db.flush()
+    await refresh_balances(db, [db_account.customer_id])
+    await db.commit()
+    return await reload(db, AccountReceivable, db_account.id, account_receivable_options())
 
 @router.post("/{account_id}/payments", response_model=PaymentSchema, status_code=201)
 async def create_payment(
     account_id: int,
     payment: PaymentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    # Verificar se a conta a receber existe
-    account = db.query(AccountReceivable).filter(AccountReceivable.id == account_id).first()
+    # Bloqueia a conta até o commit: outro pagamento da mesma conta espera este terminar
+    account = (await _lock_accounts(db, AccountReceivable.id == account_id)).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account receivable not found")
     
     # Verificar se o valor do pagamento não excede o valor restante
-    remaining_amount = account.amount - account.paid_amount
-    if payment.amount > remaining_amount:
+    if payment.amount > account.remaining + BALANCE_TOLERANCE:
         raise HTTPException(status_code=400, detail="Payment amount exceeds remaining balance")
     
+    now = datetime.now()
+    await _apply_payments(db, [account], {account_id: payment.amount}, now)
+    
     # Criar o pagamento (sem account_receivable_id no body, pois vem da URL)
     payment_data = payment.dict()
     payment_data.pop('account_receivable_id', None)  # Remove se existir no body
     
-    db_payment = Payment(**payment_data, account_receivable_id=account_id, created_by=current_user.id)
+    db_payment = Payment(**payment_data, account_receivable_id=account_id, payment_date=now, created_by=current_user.id)
     db.add(db_payment)
-    
-    # Atualizar o valor pago na conta
-    account.paid_amount += payment.amount
-    
-    # Atualizar status da conta
-    if account.paid_amount >= account.amount:
-        account.status = "paid"
-        account.paid_at = datetime.now()  # Definir data de quitação
-        
-        # Atualizar também a data de quitação da venda
-        if account.sale_id:
-            sale = db.query(Sale).filter(Sale.id == account.sale_id).first()
-            if sale:
-                sale.paid_at = datetime.now()
-                sale.status = "completed"
-    else:
-        account.status = "partial"
-    
-    db.commit()
-    db.refresh(db_payment)
-    return db_payment
+    await db.commit()
+    publish_payment(account.customer_id, payment.amount, payment.payment_method, [account_id])
+    return await reload(db, Payment, db_payment.id, payment_options())
 
 @router.get("/{account_id}/payments", response_model=List[PaymentSchema])
 async def get_account_payments(
     account_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     # Verificar se a conta a receber existe
-    account = db.query(AccountReceivable).filter(AccountReceivable.id == account_id).first()
+    account = await db.get(AccountReceivable, account_id)
     if not account:
         raise HTTPException(status_code=404, detail="Account receivable not found")
     
-    payments = db.query(Payment).options(
-        joinedload(Payment.user)
-    ).filter(Payment.account_receivable_id == account_id).order_by(Payment.payment_date.desc()).all()
+    payments = (await db.scalars(
+        select(Payment).options(*payment_options())
+        .filter(Payment.account_receivable_id == account_id).order_by(Payment.payment_date.desc())
+    )).all()
     
     return payments
 
+def _overdue_query(current_user: User, *columns):
+    """SELECT sobre as contas vencidas (com o cliente), restrito às vendas do vendedor"""
+    query = select(*columns).select_from(AccountReceivable).join(
+        Customer, Customer.id == AccountReceivable.customer_id
+    ).filter(AccountReceivable.status == "overdue")
+    if current_user.role != "admin":
+        query = query.join(Sale, Sale.id == AccountReceivable.sale_id).filter(Sale.seller_id == current_user.id)
+    return query
+
 @router.get("/summary/overdue")
 async def get_overdue_summary(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    customers_limit: int = 20,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Retorna um resumo das contas vencidas"""
-    query = db.query(AccountReceivable).filter(
-        AccountReceivable.status == "overdue"
+    """Retorna um resumo das contas vencidas: totais, subtotais dos clientes com
+    mais valor em atraso e uma página das contas, das mais atrasadas para as mais recentes"""
+    remaining = _remaining()
+    
+    totals = (await db.execute(_overdue_query(
+        current_user,
+        func.count(AccountReceivable.id).label("overdue_count"),
+        func.coalesce(func.sum(remaining), 0).label("total_overdue_amount"),
+        func.count(func.distinct(AccountReceivable.customer_id)).label("customers_count")
+    ))).one()
+    
+    customer_remaining = func.sum(remaining)
+    customers = (await db.execute(
+        _overdue_query(
+            current_user,
+            Customer.id,
+            Customer.name,
+            func.count(AccountReceivable.id).label("accounts_count"),
+            customer_remaining.label("remaining"),
+            func.min(AccountReceivable.due_date).label("oldest_due_date")
+        )
+        .group_by(Customer.id, Customer.name)
+        .order_by(customer_remaining.desc(), Customer.id)
+        .limit(customers_limit)
+    )).all()
+    
+    # Paginação por cursor (due_date, id): as contas mais atrasadas primeiro
+    query = _overdue_query(
+        current_user,
+        AccountReceivable.id,
+        AccountReceivable.customer_id,
+        Customer.name.label("customer_name"),
+        AccountReceivable.amount,
+        AccountReceivable.paid_amount,
+        remaining.label("remaining"),
+        AccountReceivable.due_date
     )
-    
-    if current_user.role != "admin":
-        query = query.join(Sale).filter(Sale.seller_id == current_user.id)
-    
-    overdue_accounts = query.all()
-    
-    total_overdue = sum(account.amount - account.paid_amount for account in overdue_accounts)
-    
+    if cursor:
+        query = apply_cursor(query, (AccountReceivable.due_date, AccountReceivable.id), cursor)
+    accounts = (await db.execute(
+        query.order_by(AccountReceivable.due_date.asc(), AccountReceivable.id.asc()).limit(limit)
+    )).all()
+    set_next_cursor(response, accounts, limit, lambda account: (account.due_date, account.id))
+    
+    today = date.today()
     return {
-        "total_overdue_amount": total_overdue,
-        "overdue_count": len(overdue_accounts),
+        "total_overdue_amount": totals.total_overdue_amount,
+        "overdue_count": totals.overdue_count,
+        "customers_count": totals.customers_count,
+        "customers": [
+            {
+                "customer_id": customer.id,
+                "customer_name": customer.name,
+                "accounts_count": customer.accounts_count,
+                "remaining": customer.remaining,
+                "oldest_due_date": customer.oldest_due_date
+            }
+            for customer in customers
+        ],
         "accounts": [
             {
                 "id": account.id,
-                "customer_name": account.customer.name,
+                "customer_id": account.customer_id,
+                "customer_name": account.customer_name,
                 "amount": account.amount,
                 "paid_amount": account.paid_amount,
-                "remaining": account.amount - account.paid_amount,
-                "due_date": account.due_date
+                "remaining": account.remaining,
+                "due_date": account.due_date,
+                "days_overdue": (today - account.due_date.date()).days
             }
-            for account in overdue_accounts
+            for account in accounts
         ]
     }
 
@@ -276,92 +366,107 @@ async def get_overdue_summary(
 async def create_customer_payment(
     customer_id: int,
     payment: PaymentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Criar pagamento avulso para um cliente (sistema FIFO)"""
     # Verificar se o cliente existe
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     
-    # Buscar todas as contas a receber pendentes do cliente (FIFO - mais antigas primeiro)
-    pending_accounts = db.query(AccountReceivable).filter(
+    # Contas em aberto do cliente, bloqueadas em ordem FIFO (mais antigas primeiro)
+    pending_accounts = (await _lock_accounts(
+        db,
         AccountReceivable.customer_id == customer_id,
-        AccountReceivable.status.in_(["pending", "partial", "overdue"])
-    ).order_by(AccountReceivable.due_date.asc()).all()
+        AccountReceivable.status.in_(PAYABLE_STATUSES)
+    )).all()
     
     if not pending_accounts:
         raise HTTPException(status_code=400, detail="Customer has no pending accounts receivable")
     
     # Calcular total devido
-    total_due = sum(account.amount - account.paid_amount for account in pending_accounts)
-    if payment.amount > total_due:
+    total_due = sum(account.remaining for account in pending_accounts)
+    if payment.amount > total_due + BALANCE_TOLERANCE:
         raise HTTPException(status_code=400, detail=f"Payment amount exceeds total due (R$ {total_due:.2f})")
     
     # Aplicar pagamento usando FIFO
+    allocations = {}
     remaining_payment = payment.amount
-    payments_created = []
-    
     for account in pending_accounts:
-        if remaining_payment <= 0:
+        if remaining_payment <= BALANCE_TOLERANCE:
             break
-            
-        account_remaining = account.amount - account.paid_amount
-        payment_amount = min(remaining_payment, account_remaining)
-        
-        # Criar pagamento para esta conta
-        db_payment = Payment(
-            amount=payment_amount,
-            payment_method=payment.payment_method,
-            payment_date=datetime.now(),
-            notes=payment.notes or f"Pagamento avulso - {payment_amount:.2f} aplicado",
-            account_receivable_id=account.id,
-            created_by=current_user.id
-        )
-        db.add(db_payment)
-        payments_created.append(db_payment)
-        
-        # Atualizar conta a receber
-        account.paid_amount += payment_amount
-        
-        # Atualizar status da conta
-        if account.paid_amount >= account.amount:
-            account.status = "paid"
-            account.paid_at = datetime.now()  # Definir data de quitação
-            
-            # Atualizar também a data de quitação da venda
-            if account.sale_id:
-                sale = db.query(Sale).filter(Sale.id == account.sale_id).first()
-                if sale:
-                    sale.paid_at = datetime.now()
-                    sale.status = "completed"
-        else:
-            account.status = "partial"
-        
-        remaining_payment -= payment_amount
+        allocations[account.id] = min(remaining_payment, account.remaining)
+        remaining_payment -= allocations[account.id]
     
-    db.commit()
+    now = datetime.now()
+    await _apply_payments(db, pending_accounts, allocations, now)
+    
+    # Um pagamento por conta, inseridos de uma vez
+    payment_ids = (await db.scalars(
+        insert(Payment).returning(Payment.id, sort_by_parameter_order=True),
+        [
+            {
+                "amount": amount,
+                "payment_method": payment.payment_method,
+                "payment_date": now,
+                "notes": payment.notes or f"Pagamento avulso - {amount:.2f} aplicado",
+                "account_receivable_id": account_id,
+                "created_by": current_user.id
+            }
+            for account_id, amount in allocations.items()
+        ]
+    )).all()
+    await db.commit()
+    publish_payment(customer_id, payment.amount, payment.payment_method, allocations)
     
     # Retornar o primeiro pagamento criado (representativo)
-    return payments_created[0] if payments_created else None
+    return await reload(db, Payment, payment_ids[0], payment_options())
+
+@router.get("/customer/{customer_id}/balance")
+async def get_customer_balance(
+    customer_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Saldo devedor do cliente e crédito disponível (lidos do saldo mantido, sem somar as contas)"""
+    row = (await db.execute(
+        select(Customer.id, Customer.credit_limit, CustomerBalance)
+        .outerjoin(CustomerBalance, CustomerBalance.customer_id == Customer.id)
+        .filter(Customer.id == customer_id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    
+    _, credit_limit, balance = row
+    open_amount = balance.open_amount if balance else 0
+    return {
+        "customer_id": customer_id,
+        "open_amount": open_amount,
+        "overdue_amount": balance.overdue_amount if balance else 0,
+        "last_payment_at": balance.last_payment_at if balance else None,
+        "credit_limit": credit_limit,
+        "available_credit": credit_limit - open_amount if credit_limit is not None else None
+    }
 
 @router.get("/customer/{customer_id}/summary")
 async def get_customer_summary(
     customer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Retorna resumo das contas a receber de um cliente específico"""
     # Verificar se o cliente existe
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
     
     # Buscar todas as contas a receber do cliente
-    accounts = db.query(AccountReceivable).options(
-        joinedload(AccountReceivable.sale)
-    ).filter(AccountReceivable.customer_id == customer_id).order_by(AccountReceivable.due_date.asc()).all()
+    accounts = (await db.scalars(
+        select(AccountReceivable).options(
+            joinedload(AccountReceivable.sale)
+        ).filter(AccountReceivable.customer_id == customer_id).order_by(AccountReceivable.due_date.asc())
+    )).all()
     
     # Calcular totais
     total_amount = sum(account.amount for account in accounts)
@@ -1,20 +1,23 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..models import User
 from ..schemas import Token, UserCreate, User as UserSchema, PasswordResetRequest, PasswordReset
 from ..auth import (
     authenticate_user, 
     create_access_token, 
-    get_password_hash, 
     get_current_active_user,
     get_current_admin_user,
+    mark_users_changed,
+    invalidate_cached_user,
     create_password_reset_token,
     verify_password_reset_token
 )
 from ..config import settings
+from ..passwords import hash_password
 from ..utils import send_email  # Precisaremos criar este utilitário
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
@@ -22,9 +25,9 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,16 +41,16 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/users", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).filter(User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -56,13 +59,13 @@ def create_user(
         role=user.role
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/password-recovery/{email}", status_code=status.HTTP_200_OK)
-async def recover_password(email: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == email).first()
+async def recover_password(email: str, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,22 +82,24 @@ async def recover_password(email: str, background_tasks: BackgroundTasks, db: Se
     return {"msg": "Password recovery email sent"}
 
 @router.post("/reset-password", status_code=status.HTTP_200_OK)
-def reset_password(body: PasswordReset, db: Session = Depends(get_db)):
+async def reset_password(body: PasswordReset, db: AsyncSession = Depends(get_db)):
     email = verify_password_reset_token(body.token)
     if not email:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
     
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="The user with this email does not exist in the system.",
         )
     
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await hash_password(body.new_password)
     user.hashed_password = hashed_password
     db.add(user)
-    db.commit()
+    await mark_users_changed(db)
+    await db.commit()
+    invalidate_cached_user(user.username)
     return {"msg": "Password updated successfully"}
 
 @router.get("/me", response_model=UserSchema)
@@ -1,7 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
+from ..pagination import apply_cursor, set_next_cursor
+from ..etag import table_etag, row_etag, not_modified
 from ..models import Customer
 from ..schemas import CustomerCreate, CustomerUpdate, Customer as CustomerSchema
 from ..auth import get_current_active_user, get_current_admin_user
@@ -11,76 +14,88 @@ router = APIRouter(prefix="/customers", tags=["customers"])
 
 @router.get("/", response_model=List[CustomerSchema])
 async def get_customers(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    query = db.query(Customer).filter(Customer.is_active == True)
+    cached = not_modified(request, response, await table_etag(db, request, Customer))
+    if cached:
+        return cached
+    
+    query = select(Customer).filter(Customer.is_active == True)
     
     if name:
         query = query.filter(Customer.name.ilike(f"%{name}%"))
     
-    customers = query.offset(skip).limit(limit).all()
+    query = apply_cursor(query, (Customer.id,), cursor) if cursor else query.offset(skip)
+    
+    customers = (await db.scalars(query.order_by(Customer.id).limit(limit))).all()
+    set_next_cursor(response, customers, limit, lambda row: (row.id,))
     return customers
 
 @router.get("/{customer_id}", response_model=CustomerSchema)
 async def get_customer(
     customer_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    customer = await db.get(Customer, customer_id)
     if customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return customer
+    return not_modified(request, response, row_etag(request, customer)) or customer
 
 @router.post("/", response_model=CustomerSchema)
 async def create_customer(
     customer: CustomerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     # Check if CPF already exists
-    db_customer = db.query(Customer).filter(Customer.cpf == customer.cpf).first()
+    db_customer = await db.scalar(select(Customer).filter(Customer.cpf == customer.cpf))
     if db_customer:
         raise HTTPException(status_code=400, detail="CPF already registered")
     
     db_customer = Customer(**customer.dict())
     db.add(db_customer)
-    db.commit()
-    db.refresh(db_customer)
+    await db.commit()
+    await db.refresh(db_customer)
     return db_customer
 
 @router.put("/{customer_id}", response_model=CustomerSchema)
 async def update_customer(
     customer_id: int,
     customer: CustomerUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    db_customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    db_customer = await db.get(Customer, customer_id)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     
     for field, value in customer.dict(exclude_unset=True).items():
         setattr(db_customer, field, value)
     
-    db.commit()
-    db.refresh(db_customer)
+    await db.commit()
+    await db.refresh(db_customer)
     return db_customer
 
 @router.delete("/{customer_id}")
 async def delete_customer(
     customer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_customer = db.query(Customer).filter(Customer.id == customer_id).first()
+    db_customer = await db.get(Customer, customer_id)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     
     db_customer.is_active = False
-    db.commit()
+    await db.commit()
     return {"message": "Customer deleted successfully"} 
\ No newline at end of file
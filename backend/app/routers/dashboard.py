@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db, release_db
+from ..dashboard import dashboard_events
+from ..auth import get_current_active_user
+from ..models import User
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["dashboard"],
+)
+
+@router.get("/stream")
+async def stream_dashboard(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Server-Sent Events do dashboard: snapshot e depois sale_created,
+    payment_received e stock_changed; vendedores só recebem as próprias
+    vendas e nenhum pagamento (ver app/dashboard.py)"""
+    # A tela pode ficar aberta por horas: não segura a conexão usada pela autenticação
+    await release_db(db)
+    return StreamingResponse(
+        dashboard_events(request, current_user),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
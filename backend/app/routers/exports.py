@@ -0,0 +1,176 @@
+import csv
+import io
+from datetime import date, datetime
+from typing import Optional
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncSessionLocal, get_db, release_db
+from ..filters import date_range
+from ..models import Sale, SaleItem, Product, Customer, User, AccountReceivable, StockMovement
+from ..auth import get_current_active_user, get_current_admin_user
+
+# Linhas buscadas por vez no cursor do servidor (e enviadas por pedaço da resposta)
+EXPORT_CHUNK_ROWS = 1000
+
+router = APIRouter(
+    prefix="/exports",
+    tags=["exports"],
+    dependencies=[Depends(get_current_active_user)],
+)
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+async def _partitions(query):
+    # Sessão própria: o streaming continua depois que o endpoint retorna
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        async for partition in result.partitions():
+            yield partition
+
+async def _csv_chunks(query, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # O cabeçalho sai antes da primeira consulta: o download começa na hora
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    async for partition in _partitions(query):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+
+async def _ndjson_chunks(query, columns):
+    async for partition in _partitions(query):
+        yield b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in partition)
+
+async def _export_response(db: AsyncSession, query, format: str, name: str, start_date: Optional[date], end_date: Optional[date]):
+    # O export lê com sessão própria (_partitions): a sessão da requisição, usada
+    # pela autenticação, só fecharia no fim do download
+    await release_db(db)
+    columns = [column.name for column in query.selected_columns]
+    period = f"_{start_date or 'inicio'}_{end_date or 'hoje'}" if start_date or end_date else ""
+    filename = f"{name}{period}.{format}"
+    if format == "csv":
+        body, media_type = _csv_chunks(query, columns), "text/csv"
+    else:
+        body, media_type = _ndjson_chunks(query, columns), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/sales")
+async def export_sales(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    items: bool = False,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exporta as vendas do período (uma linha por venda ou, com items=true, por item vendido)"""
+    seller = aliased(User)
+    if items:
+        query = select(
+            Sale.id.label("sale_id"),
+            Sale.created_at,
+            Customer.name.label("customer_name"),
+            seller.full_name.label("seller_name"),
+            Sale.payment_method,
+            Sale.status,
+            SaleItem.product_id,
+            Product.name.label("product_name"),
+            SaleItem.quantity,
+            SaleItem.unit_price,
+            SaleItem.total_price
+        ).join(SaleItem, SaleItem.sale_id == Sale.id).join(Product, Product.id == SaleItem.product_id)
+        order = (Sale.id, SaleItem.id)
+    else:
+        query = select(
+            Sale.id,
+            Sale.created_at,
+            Sale.customer_id,
+            Customer.name.label("customer_name"),
+            Sale.seller_id,
+            seller.full_name.label("seller_name"),
+            Sale.payment_method,
+            Sale.status,
+            Sale.total_amount,
+            Sale.paid_at
+        )
+        order = (Sale.id,)
+    query = query.join(Customer, Customer.id == Sale.customer_id).outerjoin(seller, seller.id == Sale.seller_id)
+    query = query.filter(*date_range(Sale.created_at, start_date, end_date))
+    if current_user.role != "admin":
+        query = query.filter(Sale.seller_id == current_user.id)
+
+    name = "vendas_itens" if items else "vendas"
+    return await _export_response(db, query.order_by(*order), format, name, start_date, end_date)
+
+@router.get("/accounts-receivable")
+async def export_accounts_receivable(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status: Optional[str] = None,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Exporta as contas a receber criadas no período"""
+    query = select(
+        AccountReceivable.id,
+        AccountReceivable.sale_id,
+        AccountReceivable.customer_id,
+        Customer.name.label("customer_name"),
+        AccountReceivable.amount,
+        AccountReceivable.paid_amount,
+        (AccountReceivable.amount - func.coalesce(AccountReceivable.paid_amount, 0)).label("remaining"),
+        AccountReceivable.status,
+        AccountReceivable.due_date,
+        AccountReceivable.paid_at,
+        AccountReceivable.created_at
+    ).join(Customer, Customer.id == AccountReceivable.customer_id).filter(
+        *date_range(AccountReceivable.created_at, start_date, end_date)
+    )
+    if status:
+        query = query.filter(AccountReceivable.status == status)
+    if current_user.role != "admin":
+        # Vendedores só exportam contas de vendas que eles fizeram
+        query = query.join(Sale, Sale.id == AccountReceivable.sale_id).filter(Sale.seller_id == current_user.id)
+
+    return await _export_response(db, query.order_by(AccountReceivable.id), format, "contas_a_receber", start_date, end_date)
+
+@router.get("/stock-movements", dependencies=[Depends(get_current_admin_user)])
+async def export_stock_movements(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    product_id: Optional[int] = None,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Exporta as movimentações de estoque do período (apenas para admins)"""
+    query = select(
+        StockMovement.id,
+        StockMovement.created_at,
+        StockMovement.product_id,
+        Product.name.label("product_name"),
+        StockMovement.movement_type,
+        StockMovement.quantity,
+        StockMovement.reason,
+        StockMovement.from_location_id,
+        StockMovement.to_location_id,
+        StockMovement.user_id,
+        User.username
+    ).join(Product, Product.id == StockMovement.product_id).outerjoin(
+        User, User.id == StockMovement.user_id
+    ).filter(*date_range(StockMovement.created_at, start_date, end_date))
+    if product_id:
+        query = query.filter(StockMovement.product_id == product_id)
+
+    return await _export_response(db, query.order_by(StockMovement.id), format, "movimentacoes_estoque", start_date, end_date)
@@ -1,65 +1,155 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
-from ..models import Location, ProductLocation, Product, Supplier
-from ..schemas import LocationCreate, LocationUpdate, Location as LocationSchema, ProductLocationCreate, ProductLocation as ProductLocationSchema, ProductLocationUpdate
+from ..catalog import mark_catalog_changed, invalidate_catalog
+from ..stock import STOCK_TOLERANCE, record_movements
+from ..stock_overview import stock_overview, mark_stock_changed, invalidate_stock_overview
+from ..stock_alerts import alerts_query, check_stock_alerts, notify_stock_alerts
+from ..dashboard import publish_stock
+from ..pagination import apply_cursor, decode_cursor, set_next_cursor
+from ..etag import table_etag, row_etag, not_modified
+from ..loaders import product_location_options, reload
+from ..models import Location, ProductLocation, Product, Supplier, StockAlert
+from ..schemas import LocationCreate, LocationUpdate, Location as LocationSchema, ProductLocationCreate, ProductLocation as ProductLocationSchema, ProductLocationUpdate, StockTransfer, StockTransferBatch, StockTransferResponse
 from ..auth import get_current_active_user, get_current_admin_user
 from ..models import User
 
+MAX_TRANSFER_LINES = 1000
+
 router = APIRouter(
     prefix="/locations",
     tags=["locations"],
     responses={404: {"description": "Not found"}},
 )
 
+async def _adjust_product_stock(db: AsyncSession, product_location, difference: float, user_id: int, reason: str):
+    """Reflete no estoque do produto (e no ledger) a alteração de quantidade em
+    uma localização, sem deixar a soma das localizações passar do total do
+    produto. Um aumento usa primeiro o estoque ainda sem localização
+    (transferência, sem mudar o total) e só o excedente entra como ajuste;
+    retorna o produto alterado (None se o total não mudou)"""
+    if not difference:
+        return None
+    product = await db.get(Product, product_location.product_id, with_for_update=True)
+    movements = []
+    if difference > 0:
+        # A linha editada ainda não foi gravada: as outras localizações vêm do banco
+        others = select(func.coalesce(func.sum(ProductLocation.quantity), 0)).filter(
+            ProductLocation.product_id == product.id
+        )
+        if product_location.id is not None:
+            others = others.filter(ProductLocation.id != product_location.id)
+        allocated = await db.scalar(others) + (product_location.quantity or 0) - difference
+        placed = min(difference, max(product.stock_quantity - allocated, 0))
+        if placed > STOCK_TOLERANCE:
+            movements.append({
+                "product_id": product.id,
+                "user_id": user_id,
+                "movement_type": "transferência",
+                "quantity": placed,
+                "to_location_id": product_location.location_id,
+                "reason": reason
+            })
+            difference -= placed
+    if abs(difference) <= STOCK_TOLERANCE:
+        await record_movements(db, movements)
+        return None
+    product.stock_quantity += difference
+    location = {"to_location_id" if difference > 0 else "from_location_id": product_location.location_id}
+    movements.append({
+        "product_id": product.id,
+        "user_id": user_id,
+        "movement_type": "ajuste",
+        "quantity": abs(difference),
+        "stock_change": difference,
+        "reason": reason,
+        **location
+    })
+    await record_movements(db, movements)
+    await mark_catalog_changed(db)
+    return product
+
+async def _lock_product_location(db: AsyncSession, location_id: int, product_location_id: int):
+    """Bloqueia o produto e depois a sua quantidade na localização, na mesma
+    ordem de _apply_transfers, e relê a quantidade já bloqueada"""
+    product_id = await db.scalar(select(ProductLocation.product_id).filter(
+        ProductLocation.id == product_location_id,
+        ProductLocation.location_id == location_id
+    ))
+    if product_id is not None:
+        await db.get(Product, product_id, with_for_update=True, populate_existing=True)
+        product_location = await db.scalar(
+            select(ProductLocation).filter(ProductLocation.id == product_location_id)
+            .with_for_update().execution_options(populate_existing=True)
+        )
+        if product_location is not None:
+            return product_location
+    raise HTTPException(status_code=404, detail="Product location not found")
+
 @router.get("/", response_model=List[LocationSchema])
 async def get_locations(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     location_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    query = db.query(Location).filter(Location.is_active == True)
+    cached = not_modified(request, response, await table_etag(db, request, Location))
+    if cached:
+        return cached
+    
+    query = select(Location).filter(Location.is_active == True)
     
     if location_type:
         query = query.filter(Location.location_type == location_type)
     
-    locations = query.offset(skip).limit(limit).all()
+    query = apply_cursor(query, (Location.id,), cursor) if cursor else query.offset(skip)
+    
+    locations = (await db.scalars(query.order_by(Location.id).limit(limit))).all()
+    set_next_cursor(response, locations, limit, lambda row: (row.id,))
     return locations
 
 @router.get("/{location_id}", response_model=LocationSchema)
 async def get_location(
     location_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
-    return location
+    return not_modified(request, response, row_etag(request, location)) or location
 
 @router.post("/", response_model=LocationSchema, status_code=201)
 async def create_location(
     location: LocationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     db_location = Location(**location.dict())
     db.add(db_location)
-    db.commit()
-    db.refresh(db_location)
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
+    await db.refresh(db_location)
     return db_location
 
 @router.put("/{location_id}", response_model=LocationSchema)
 async def update_location(
     location_id: int,
     location_update: LocationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_location = db.query(Location).filter(Location.id == location_id).first()
+    db_location = await db.get(Location, location_id)
     if not db_location:
         raise HTTPException(status_code=404, detail="Location not found")
     
@@ -67,183 +157,323 @@ async def update_location(
     for key, value in update_data.items():
         setattr(db_location, key, value)
     
-    db.commit()
-    db.refresh(db_location)
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
+    await db.refresh(db_location)
     return db_location
 
 @router.delete("/{location_id}", status_code=204)
 async def delete_location(
     location_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_location = db.query(Location).filter(Location.id == location_id).first()
+    db_location = await db.get(Location, location_id)
     if not db_location:
         raise HTTPException(status_code=404, detail="Location not found")
     
     db_location.is_active = False
-    db.commit()
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
     return
 
 # Product Location endpoints (Estoque)
 @router.get("/{location_id}/products", response_model=List[ProductLocationSchema])
 async def get_location_products(
     location_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    product_locations = db.query(ProductLocation).options(
-        joinedload(ProductLocation.product).joinedload(Product.supplier),
-        joinedload(ProductLocation.location)
-    ).filter(
-        ProductLocation.location_id == location_id
-    ).all()
+    product_locations = (await db.scalars(
+        select(ProductLocation).options(*product_location_options()).filter(
+            ProductLocation.location_id == location_id
+        )
+    )).all()
     return product_locations
 
 @router.post("/{location_id}/products", response_model=ProductLocationSchema, status_code=201)
 async def add_product_to_location(
     location_id: int,
     product_location: ProductLocationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     # Verificar se a localização existe
-    location = db.query(Location).filter(Location.id == location_id).first()
+    location = await db.get(Location, location_id)
     if not location:
         raise HTTPException(status_code=404, detail="Location not found")
     
-    # Verificar se o produto existe
-    product = db.query(Product).filter(Product.id == product_location.product_id).first()
+    # Verificar se o produto existe (bloqueado antes das localizações, como nas transferências)
+    product = await db.get(Product, product_location.product_id, with_for_update=True)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Verificar se já existe um registro para este produto nesta localização
-    existing = db.query(ProductLocation).filter(
+    existing = await db.scalar(select(ProductLocation).filter(
         ProductLocation.product_id == product_location.product_id,
         ProductLocation.location_id == location_id
-    ).first()
+    ))
     
     if existing:
         raise HTTPException(status_code=400, detail="Product already exists in this location")
     
-    db_product_location = ProductLocation(**product_location.dict(), location_id=location_id)
+    db_product_location = ProductLocation(**dict(product_location.dict(), location_id=location_id))
     db.add(db_product_location)
-    db.commit()
-    db.refresh(db_product_location)
-    return db_product_location
+    adjusted = await _adjust_product_stock(db, db_product_location, product_location.quantity or 0, current_user.id,
+                                           f"Entrada do produto em {location.name}")
+    await db.flush()
+    alerts_changed = await check_stock_alerts(db, [product_location.product_id])
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
+    invalidate_catalog()
+    if alerts_changed:
+        notify_stock_alerts()
+    if adjusted is not None:
+        publish_stock({adjusted.id: adjusted.stock_quantity})
+    return await reload(db, ProductLocation, db_product_location.id, product_location_options())
 
 @router.put("/{location_id}/products/{product_location_id}", response_model=ProductLocationSchema)
 async def update_product_location(
     location_id: int,
     product_location_id: int,
     product_location_update: ProductLocationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_product_location = db.query(ProductLocation).filter(
-        ProductLocation.id == product_location_id,
-        ProductLocation.location_id == location_id
-    ).first()
-    
-    if not db_product_location:
-        raise HTTPException(status_code=404, detail="Product location not found")
+    db_product_location = await _lock_product_location(db, location_id, product_location_id)
     
     update_data = product_location_update.dict(exclude_unset=True)
+    new_quantity = update_data.get("quantity")
+    difference = new_quantity - (db_product_location.quantity or 0) if new_quantity is not None else 0
     for key, value in update_data.items():
         setattr(db_product_location, key, value)
+    adjusted = await _adjust_product_stock(db, db_product_location, difference, current_user.id, "Quantidade alterada na localização")
     
-    db.commit()
-    db.refresh(db_product_location)
-    return db_product_location
+    await db.flush()
+    alerts_changed = await check_stock_alerts(db, [db_product_location.product_id])
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
+    invalidate_catalog()
+    if alerts_changed:
+        notify_stock_alerts()
+    if adjusted is not None:
+        publish_stock({adjusted.id: adjusted.stock_quantity})
+    return await reload(db, ProductLocation, db_product_location.id, product_location_options())
 
 @router.delete("/{location_id}/products/{product_location_id}", status_code=204)
 async def remove_product_from_location(
     location_id: int,
     product_location_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_product_location = db.query(ProductLocation).filter(
-        ProductLocation.id == product_location_id,
-        ProductLocation.location_id == location_id
-    ).first()
-    
-    if not db_product_location:
-        raise HTTPException(status_code=404, detail="Product location not found")
+    db_product_location = await _lock_product_location(db, location_id, product_location_id)
     
-    db.delete(db_product_location)
-    db.commit()
+    # O que ainda estava na localização continua no estoque do produto, sem localização
+    if db_product_location.quantity:
+        await record_movements(db, [{
+            "product_id": db_product_location.product_id,
+            "user_id": current_user.id,
+            "movement_type": "transferência",
+            "quantity": db_product_location.quantity,
+            "from_location_id": location_id,
+            "reason": "Produto retirado da localização"
+        }])
+    await db.delete(db_product_location)
+    await db.flush()
+    alerts_changed = await check_stock_alerts(db, [db_product_location.product_id])
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
+    if alerts_changed:
+        notify_stock_alerts()
     return
 
+async def _apply_transfers(db: AsyncSession, lines, user_id: int, reason: Optional[str]):
+    """Aplica as transferências em uma transação: bloqueia os produtos e as
+    quantidades por localização, confere todas as linhas em memória e grava as
+    novas quantidades e as movimentações com poucos comandos. Qualquer linha
+    inválida rejeita a requisição inteira."""
+    product_ids = {line.product_id for line in lines}
+    location_ids = {
+        location_id for line in lines
+        for location_id in (line.from_location_id, line.to_location_id) if location_id is not None
+    }
+    locations = set((await db.scalars(
+        select(Location.id).filter(Location.id.in_(location_ids), Location.is_active == True)
+    )).all())
+    # Produtos antes das localizações, sempre em ordem de id (evita deadlock entre transferências)
+    products = {product.id: product for product in await db.scalars(
+        select(Product).filter(Product.id.in_(product_ids)).order_by(Product.id).with_for_update()
+    )}
+    stored = {
+        (row.product_id, row.location_id): row
+        for row in await db.scalars(
+            select(ProductLocation).filter(ProductLocation.product_id.in_(product_ids))
+            .order_by(ProductLocation.id).with_for_update()
+        )
+    }
+    quantities = {key: row.quantity or 0 for key, row in stored.items()}
+    # Estoque de cada produto ainda sem localização. Vendas e saídas baixam só o
+    # total do produto, então esse saldo pode estar negativo (mercadoria vendida
+    # das localizações ainda não baixada nelas) e não pode ser transferido
+    unallocated = {product_id: product.stock_quantity or 0 for product_id, product in products.items()}
+    for (product_id, _), quantity in quantities.items():
+        unallocated[product_id] -= quantity
+
+    for index, line in enumerate(lines):
+        error = None
+        product = products.get(line.product_id)
+        source = (line.product_id, line.from_location_id)
+        if product is None:
+            error = f"Product with id {line.product_id} not found"
+        elif line.quantity <= 0:
+            error = "Quantity must be positive"
+        elif line.from_location_id == line.to_location_id:
+            error = "Source and destination locations must be different"
+        else:
+            for location_id in (line.from_location_id, line.to_location_id):
+                if location_id is not None and location_id not in locations:
+                    error = f"Location with id {location_id} not found"
+                    break
+        if error is None:
+            available = unallocated[line.product_id] if line.from_location_id is None else quantities.get(source)
+            if available is None:
+                error = f"{product.name} is not stored in location {line.from_location_id}"
+            elif available + STOCK_TOLERANCE < line.quantity:
+                error = f"Insufficient stock for {product.name}"
+        if error:
+            raise HTTPException(status_code=400, detail=f"Line {index}: {error}")
+
+        if line.from_location_id is None:
+            unallocated[line.product_id] -= line.quantity
+        else:
+            quantities[source] -= line.quantity
+        if line.to_location_id is None:
+            unallocated[line.product_id] += line.quantity
+        else:
+            destination = (line.product_id, line.to_location_id)
+            quantities[destination] = quantities.get(destination, 0) + line.quantity
+
+    touched = {
+        (line.product_id, location_id) for line in lines
+        for location_id in (line.from_location_id, line.to_location_id) if location_id is not None
+    }
+    changed = [
+        {"id": stored[key].id, "quantity": quantities[key]}
+        for key in sorted(touched) if key in stored and quantities[key] != stored[key].quantity
+    ]
+    if changed:
+        await db.execute(update(ProductLocation), changed)
+    created = [
+        {"product_id": product_id, "location_id": location_id, "quantity": quantities[(product_id, location_id)]}
+        for product_id, location_id in sorted(touched) if (product_id, location_id) not in stored
+    ]
+    if created:
+        await db.execute(insert(ProductLocation), created)
+    # O total dos produtos não muda: as movimentações só registram as localizações
+    await record_movements(db, [
+        {
+            "product_id": line.product_id,
+            "user_id": user_id,
+            "movement_type": "transferência",
+            "quantity": line.quantity,
+            "from_location_id": line.from_location_id,
+            "to_location_id": line.to_location_id,
+            "reason": reason or "Transferência entre localizações"
+        }
+        for line in lines
+    ])
+    alerts_changed = await check_stock_alerts(db, products)
+    await mark_stock_changed(db)
+    await db.commit()
+    invalidate_stock_overview()
+    if alerts_changed:
+        notify_stock_alerts()
+    return {
+        "transferred": len(lines),
+        "balances": [
+            {"product_id": product_id, "location_id": location_id, "quantity": quantities[(product_id, location_id)]}
+            for product_id, location_id in sorted(touched)
+        ]
+    }
+
+@router.post("/transfer", response_model=StockTransferResponse)
+async def transfer_stock(
+    transfer: StockTransfer,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Transfere um produto entre localizações (sem localização de origem ou de
+    destino: estoque do produto ainda não guardado em nenhuma)"""
+    return await _apply_transfers(db, [transfer], current_user.id, transfer.reason)
+
+@router.post("/transfers", response_model=StockTransferResponse)
+async def transfer_stock_batch(
+    batch: StockTransferBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Transfere várias linhas (produto, origem, destino, quantidade) de uma vez,
+    tudo ou nada; as linhas são aplicadas em ordem"""
+    if len(batch.items) > MAX_TRANSFER_LINES:
+        raise HTTPException(status_code=400, detail=f"Transfer exceeds the maximum of {MAX_TRANSFER_LINES} lines")
+    return await _apply_transfers(db, batch.items, current_user.id, batch.reason)
+
 # Estoque geral - visão consolidada
 @router.get("/stock/overview")
 async def get_stock_overview(
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    location_type: Optional[str] = None,
+    products_limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Retorna uma visão geral do estoque por localização"""
-    stock_data = db.query(ProductLocation).options(
-        joinedload(ProductLocation.product).joinedload(Product.supplier),
-        joinedload(ProductLocation.location)
-    ).all()
-    
-    # Agrupar por localização
-    locations_stock = {}
-    for item in stock_data:
-        location_name = item.location.name
-        if location_name not in locations_stock:
-            locations_stock[location_name] = {
-                "location": {
-                    "id": item.location.id,
-                    "name": item.location.name,
-                    "type": item.location.location_type,
-                    "temperature": item.location.temperature
-                },
-                "products": []
-            }
-        
-        locations_stock[location_name]["products"].append({
-            "id": item.product.id,
-            "name": item.product.name,
-            "supplier": item.product.supplier.name,
-            "quantity": item.quantity,
-            "min_quantity": item.min_quantity,
-            "max_quantity": item.max_quantity,
-            "unit": item.product.unit,
-            "notes": item.notes
-        })
-    
-    return list(locations_stock.values())
+    """Retorna uma visão geral do estoque por localização: totais de cada
+    localização e os seus produtos (ver app/stock_overview.py). A paginação é
+    opcional: com limit, o header X-Next-Cursor aponta a próxima página, e
+    products_limit corta os produtos de cada localização"""
+    after_id = decode_cursor(cursor, (Location.id,))[0] if cursor else None
+    page = await stock_overview(db, location_type, after_id, limit, products_limit)
+    if limit is not None:
+        set_next_cursor(response, page, limit, lambda item: (item["location"]["id"],))
+    return ORJSONResponse(page, headers=dict(response.headers))
 
 # Produtos com estoque baixo
 @router.get("/stock/low-stock")
 async def get_low_stock_products(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Retorna produtos com estoque abaixo do mínimo"""
-    low_stock = db.query(ProductLocation).options(
-        joinedload(ProductLocation.product).joinedload(Product.supplier),
-        joinedload(ProductLocation.location)
-    ).filter(
-        ProductLocation.quantity <= ProductLocation.min_quantity,
-        ProductLocation.min_quantity > 0
-    ).all()
+    """Retorna os alertas de estoque baixo abertos (ver app/stock_alerts.py): produtos
+    no mínimo ou abaixo dele em uma localização ou, sem localização, no estoque total"""
+    alerts = (await db.execute(
+        alerts_query().add_columns(Supplier.name.label("supplier_name")).outerjoin(
+            Supplier, Supplier.id == Product.supplier_id
+        ).filter(StockAlert.resolved_at.is_(None)).order_by(StockAlert.id)
+    )).all()
     
     return [
         {
             "product": {
-                "id": item.product.id,
-                "name": item.product.name,
-                "supplier": item.product.supplier.name
+                "id": alert.product_id,
+                "name": alert.product_name,
+                "supplier": alert.supplier_name
             },
             "location": {
-                "id": item.location.id,
-                "name": item.location.name
-            },
-            "current_quantity": item.quantity,
-            "min_quantity": item.min_quantity,
-            "unit": item.product.unit
+                "id": alert.location_id,
+                "name": alert.location_name
+            } if alert.location_id is not None else None,
+            "current_quantity": alert.current_quantity,
+            "min_quantity": alert.threshold,
+            "unit": alert.unit,
+            "opened_at": alert.opened_at
         }
-        for item in low_stock
-    ] 
\ No newline at end of file
+        for alert in alerts
+    ]
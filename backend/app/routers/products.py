@@ -1,9 +1,20 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from datetime import date, datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
+from ..filters import date_range
+from ..loaders import product_options, reload
+from ..pagination import apply_cursor, decode_cursor, set_next_cursor
+from ..catalog import CATALOG_VERSION_HEADER, product_catalog, mark_catalog_changed, invalidate_catalog
+from ..etag import make_etag, not_modified
 from ..models import Product, StockMovement
-from ..schemas import ProductCreate, ProductUpdate, Product as ProductSchema, StockMovementCreate, StockMovement as StockMovementSchema
+from ..schemas import ProductCreate, ProductUpdate, Product as ProductSchema, StockMovementCreate, StockMovement as StockMovementSchema, StockAsOf
+from ..stock import MOVEMENT_SIGNS, record_movements, stock_as_of, stock_change
+from ..stock_alerts import check_stock_alerts, notify_stock_alerts
+from ..dashboard import publish_stock
 from ..auth import get_current_active_user, get_current_admin_user
 from ..models import User
 
@@ -13,96 +24,206 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+@router.get("/catalog/version", dependencies=[Depends(get_current_active_user)])
+async def get_catalog_version(db: AsyncSession = Depends(get_db)):
+    """Versão do catálogo: se não mudou, o terminal não precisa buscar /products de novo"""
+    # Confere a versão compartilhada (e recarrega o catálogo se ela mudou)
+    await product_catalog.ensure_loaded(db)
+    return {
+        "version": product_catalog.version,
+        "hits": product_catalog.hits,
+        "misses": product_catalog.misses
+    }
+
 @router.get("/", response_model=List[ProductSchema], dependencies=[Depends(get_current_active_user)])
 async def get_products(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    products = db.query(Product).options(joinedload(Product.supplier)).filter(Product.is_active == True).offset(skip).limit(limit).all()
-    return products
+    # Servido do catálogo em memória (ver app/catalog.py)
+    after_id = decode_cursor(cursor, (Product.id,))[0] if cursor else None
+    products = await product_catalog.list(db, after_id=after_id, skip=skip, limit=limit)
+    set_next_cursor(response, products, limit, lambda product: (product["id"],))
+    response.headers[CATALOG_VERSION_HEADER] = str(product_catalog.version)
+    # Os itens do catálogo já estão serializados: não passam de novo pelo response_model
+    return (
+        not_modified(request, response, make_etag(request, *product_catalog.etag_parts))
+        or ORJSONResponse(products, headers=dict(response.headers))
+    )
 
 @router.get("/{product_id}", response_model=ProductSchema, dependencies=[Depends(get_current_active_user)])
 async def get_product(
     product_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
-    db_product = db.query(Product).options(joinedload(Product.supplier)).filter(Product.id == product_id).first()
-    if db_product is None:
+    product = await product_catalog.get(db, product_id)
+    if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+    response.headers[CATALOG_VERSION_HEADER] = str(product_catalog.version)
+    return (
+        not_modified(request, response, make_etag(request, *product_catalog.etag_parts))
+        or ORJSONResponse(product, headers=dict(response.headers))
+    )
 
 @router.post("/", response_model=ProductSchema, status_code=201, dependencies=[Depends(get_current_admin_user)])
 async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
     db_product = Product(**product.dict())
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-    return db_product
+    await db.flush()
+    # O estoque inicial entra no ledger como a primeira movimentação do produto
+    if product.stock_quantity:
+        await record_movements(db, [{
+            "product_id": db_product.id,
+            "user_id": current_user.id,
+            "movement_type": "entrada",
+            "quantity": product.stock_quantity,
+            "reason": "Estoque inicial"
+        }])
+    alerts_changed = await check_stock_alerts(db, [db_product.id])
+    await mark_catalog_changed(db)
+    await db.commit()
+    invalidate_catalog()
+    if alerts_changed:
+        notify_stock_alerts()
+    return await reload(db, Product, db_product.id, product_options())
 
 @router.put("/{product_id}", response_model=ProductSchema, dependencies=[Depends(get_current_admin_user)])
 async def update_product(
     product_id: int,
     product: ProductUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id, with_for_update=True)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
     update_data = product.dict(exclude_unset=True)
+    # Estoque alterado pelo cadastro: a diferença vira um ajuste no ledger
+    new_stock = update_data.get("stock_quantity")
+    if new_stock is not None and new_stock != db_product.stock_quantity:
+        difference = new_stock - (db_product.stock_quantity or 0)
+        await record_movements(db, [{
+            "product_id": product_id,
+            "user_id": current_user.id,
+            "movement_type": "ajuste",
+            "quantity": abs(difference),
+            "stock_change": difference,
+            "reason": "Estoque alterado no cadastro do produto"
+        }])
     for key, value in update_data.items():
         setattr(db_product, key, value)
+    await db.flush()
+    alerts_changed = await check_stock_alerts(db, [product_id])
     
-    db.commit()
-    db.refresh(db_product)
-    return db_product
+    await mark_catalog_changed(db)
+    await db.commit()
+    invalidate_catalog()
+    if alerts_changed:
+        notify_stock_alerts()
+    if new_stock is not None:
+        publish_stock({product_id: db_product.stock_quantity})
+    return await reload(db, Product, db_product.id, product_options())
 
 @router.delete("/{product_id}", status_code=204, dependencies=[Depends(get_current_admin_user)])
 async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = await db.get(Product, product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     
     db_product.is_active = False
-    db.commit()
+    await db.flush()
+    # Produto desativado não tem mais alertas abertos
+    alerts_changed = await check_stock_alerts(db, [product_id])
+    await mark_catalog_changed(db)
+    await db.commit()
+    invalidate_catalog()
+    if alerts_changed:
+        notify_stock_alerts()
     return
 
 @router.post("/{product_id}/stock-movement", response_model=StockMovementSchema, dependencies=[Depends(get_current_admin_user)])
 async def create_stock_movement(
     product_id: int,
     movement: StockMovementCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id, with_for_update=True)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    # Baixas por venda são registradas apenas pelo checkout
+    if movement.movement_type not in MOVEMENT_SIGNS or movement.movement_type == "venda":
+        raise HTTPException(status_code=400, detail=f"Invalid movement type: {movement.movement_type}")
 
-    db_movement = StockMovement(**movement.dict(), product_id=product_id, user_id=current_user.id)
-    db.add(db_movement)
+    change = stock_change(movement.movement_type, movement.quantity)
+    if product.stock_quantity + change < 0:
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+    product.stock_quantity += change
 
-    if movement.movement_type == "entrada":
-        product.stock_quantity += movement.quantity
-    elif movement.movement_type == "saída":
-        if product.stock_quantity < movement.quantity:
-            raise HTTPException(status_code=400, detail="Insufficient stock")
-        product.stock_quantity -= movement.quantity
+    db_movement = StockMovement(
+        **dict(movement.dict(), product_id=product_id),
+        user_id=current_user.id,
+        stock_change=change
+    )
+    db.add(db_movement)
+    await db.flush()
+    alerts_changed = await check_stock_alerts(db, [product_id])
     
-    db.commit()
-    db.refresh(db_movement)
+    await mark_catalog_changed(db)
+    await db.commit()
+    invalidate_catalog()
+    if alerts_changed:
+        notify_stock_alerts()
+    if change:
+        publish_stock({product_id: product.stock_quantity})
+    await db.refresh(db_movement)
     return db_movement
 
 @router.get("/{product_id}/stock-movements", response_model=List[StockMovementSchema], dependencies=[Depends(get_current_admin_user)])
 async def get_product_stock_movements(
     product_id: int,
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    movements = db.query(StockMovement).filter(StockMovement.product_id == product_id).all()
-    return movements 
\ No newline at end of file
+    """Movimentações do produto na ordem em que foram gravadas (ledger), paginadas por cursor"""
+    query = select(StockMovement).filter(
+        StockMovement.product_id == product_id,
+        *date_range(StockMovement.created_at, start_date, end_date)
+    )
+    if cursor:
+        query = apply_cursor(query, (StockMovement.id,), cursor)
+    movements = (await db.scalars(query.order_by(StockMovement.id).limit(limit))).all()
+    set_next_cursor(response, movements, limit, lambda row: (row.id,))
+    return movements
+
+@router.get("/{product_id}/stock", response_model=StockAsOf, dependencies=[Depends(get_current_admin_user)])
+async def get_product_stock_as_of(
+    product_id: int,
+    as_of: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Estoque do produto em as_of (padrão: agora), refeito a partir do snapshot
+    mais recente até essa data e das movimentações seguintes"""
+    as_of = as_of or datetime.now()
+    rows = await stock_as_of(db, [product_id], as_of)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"as_of": as_of, **rows[0]._mapping} 
\ No newline at end of file
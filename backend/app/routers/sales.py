@@ -1,11 +1,31 @@
+import orjson
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload, selectinload
-from ..database import get_db
-from ..models import Sale, SaleItem, Product, Customer, User, AccountReceivable
-from ..schemas import SaleCreate, SaleUpdate, Sale as SaleSchema
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select, insert, update, bindparam, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from ..database import get_db, release_db, AsyncSessionLocal
+from ..filters import date_range
+from ..loaders import sale_options, reload
+from ..pagination import apply_cursor, set_next_cursor
+from ..serialization import model_response
+from ..models import Sale, SaleItem, Product, Customer, User, AccountReceivable, DailySalesRollup, DailyProductRollup
+from ..schemas import SaleCreate, SaleUpdate, Sale as SaleSchema, SaleBatchCreate, SaleBatchResponse
+from ..rollups import add_sales_to_rollups, remove_sales_from_rollups, daily_summary
+from ..balances import BALANCE_TOLERANCE, add_to_balances, credit_available
+from ..stock import record_movements
+from ..stock_alerts import check_stock_alerts, notify_stock_alerts
+from ..dashboard import publish_sales, publish_stock
+from ..metrics import record_sales
+from ..catalog import product_catalog
 from ..auth import get_current_active_user
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+CREDIT_PAYMENT_METHODS = ["fiado", "credito", "a prazo"]
+MAX_BATCH_SIZE = 1000
+GROUPED_STREAM_CHUNK_SIZE = 100
+SUMMARY_DEFAULT_DAYS = 30
 
 router = APIRouter(
     prefix="/sales",
@@ -13,22 +33,95 @@ router = APIRouter(
     dependencies=[Depends(get_current_active_user)], # Todos os usuários ativos podem acessar
 )
 
+async def _lock_products(db: AsyncSession, product_ids):
+    """Carrega os produtos do carrinho em uma única query com SELECT ... FOR UPDATE.
+    As linhas são bloqueadas em ordem de id para evitar deadlock entre caixas."""
+    result = await db.scalars(
+        select(Product).filter(Product.id.in_(product_ids)).order_by(Product.id).with_for_update()
+    )
+    return {product.id: product for product in result}
+
+async def _decrement_stock(db: AsyncSession, quantities):
+    """Baixa o estoque de todos os produtos com um único UPDATE (executemany)"""
+    if not quantities:
+        return
+    products = Product.__table__
+    await db.execute(
+        update(products)
+        .where(products.c.id == bindparam("product_id"))
+        .values(stock_quantity=products.c.stock_quantity - bindparam("quantity")),
+        [
+            {"product_id": product_id, "quantity": quantity}
+            for product_id, quantity in sorted(quantities.items())
+        ]
+    )
+
+def _sale_movements(sale_id: int, quantities, user_id: int):
+    """Linhas do ledger de estoque com a baixa de cada produto da venda"""
+    return [
+        {
+            "product_id": product_id,
+            "user_id": user_id,
+            "sale_id": sale_id,
+            "movement_type": "venda",
+            "quantity": quantity,
+            "reason": f"Venda #{sale_id}"
+        }
+        for product_id, quantity in sorted(quantities.items())
+    ]
+
+def _cart_quantities(items):
+    """Soma as quantidades por produto (o mesmo produto pode aparecer mais de uma vez no carrinho)"""
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    return quantities
+
+def _build_sale_items(items, products):
+    """Monta as linhas de sale_items (sem sale_id) e o total da venda"""
+    total_amount = 0
+    rows = []
+    for item in items:
+        unit_price = products[item.product_id].price
+        item_total = unit_price * item.quantity
+        total_amount += item_total
+        rows.append({
+            "product_id": item.product_id,
+            "quantity": item.quantity,
+            "unit_price": unit_price,
+            "total_price": item_total
+        })
+    return rows, total_amount
+
+def _is_credit_sale(payment_method: str) -> bool:
+    return payment_method.lower() in CREDIT_PAYMENT_METHODS
+
+def _sale_status(payment_method: str) -> dict:
+    # Vendas fiado ficam pendentes até a quitação da conta a receber
+    if _is_credit_sale(payment_method):
+        return {"status": "pending", "paid_at": None}
+    return {"status": "completed", "paid_at": datetime.now()}
+
+def _due_date(sale: SaleCreate) -> datetime:
+    # Usar data de vencimento fornecida ou padrão de 30 dias
+    if sale.due_date:
+        return datetime.fromisoformat(sale.due_date.replace('Z', '+00:00'))
+    return datetime.now() + timedelta(days=30)
+
 @router.get("/", response_model=List[SaleSchema])
 async def get_sales(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     customer_name: Optional[str] = None,
     seller_id: Optional[int] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    db: Session = Depends(get_db),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    query = db.query(Sale).options(
-        joinedload(Sale.seller), 
-        joinedload(Sale.customer),
-        joinedload(Sale.items).joinedload(SaleItem.product)
-    )
+    query = select(Sale).options(*sale_options())
     
     if customer_name:
         query = query.join(Customer).filter(Customer.name.ilike(f"%{customer_name}%"))
@@ -36,42 +129,25 @@ async def get_sales(
     if seller_id and current_user.role == "admin":
         query = query.filter(Sale.seller_id == seller_id)
     
-    if start_date:
-        query = query.filter(Sale.created_at >= start_date)
-    
-    if end_date:
-        query = query.filter(Sale.created_at <= end_date + " 23:59:59")
+    query = query.filter(*date_range(Sale.created_at, start_date, end_date))
     
-    if current_user.role == "admin":
-        sales = query.order_by(Sale.created_at.desc()).offset(skip).limit(limit).all()
-    else: # Vendedor
-        sales = query.filter(Sale.seller_id == current_user.id).order_by(Sale.created_at.desc()).offset(skip).limit(limit).all()
-    return sales
-
-@router.get("/grouped-by-customer")
-async def get_sales_grouped_by_customer(
-    customer_name: Optional[str] = None,
-    seller_id: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    status: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    """Retorna vendas agrupadas por cliente com filtros"""
-    from sqlalchemy import func
+    if current_user.role != "admin": # Vendedor
+        query = query.filter(Sale.seller_id == current_user.id)
     
-    # Query base
-    query = db.query(
-        Customer.id,
-        Customer.name,
-        Customer.cpf,
-        func.count(Sale.id).label('sales_count'),
-        func.sum(Sale.total_amount).label('total_amount'),
-        func.avg(Sale.total_amount).label('avg_amount')
-    ).join(Sale, Customer.id == Sale.customer_id)
+    # Paginação por cursor (created_at, id); skip continua aceito como alternativa
+    if cursor:
+        query = apply_cursor(query, (Sale.created_at, Sale.id), cursor, descending=True)
+    else:
+        query = query.offset(skip)
     
-    # Aplicar filtros
+    sales = (await db.scalars(query.order_by(Sale.created_at.desc(), Sale.id.desc()).limit(limit))).all()
+    set_next_cursor(response, sales, limit, lambda sale: (sale.created_at, sale.id))
+    return model_response(List[SaleSchema], sales, response)
+
+def _filter_grouped_sales(query, customer_name, seller_id, period, status, current_user, until_sale_id=None):
+    """Aplica os filtros do relatório de vendas agrupadas por cliente"""
+    if until_sale_id is not None:
+        query = query.filter(Sale.id <= until_sale_id)
     if customer_name:
         query = query.filter(Customer.name.ilike(f"%{customer_name}%"))
     
@@ -86,58 +162,58 @@ async def get_sales_grouped_by_customer(
         # Vendedores só veem suas próprias vendas
         query = query.filter(Sale.seller_id == current_user.id)
     
-    if start_date:
-        query = query.filter(Sale.created_at >= start_date)
-    
-    if end_date:
-        query = query.filter(Sale.created_at <= end_date + " 23:59:59")
+    query = query.filter(*period)
     
     if status:
         query = query.filter(Sale.status == status)
     
-    # Agrupar e ordenar
-    grouped_sales = query.group_by(Customer.id, Customer.name, Customer.cpf)\
-        .order_by(func.sum(Sale.total_amount).desc()).all()
+    return query
+
+async def _grouped_sales(db: AsyncSession, filters: dict, skip: int, limit: Optional[int]):
+    """Agregado por cliente (maior total primeiro); todos os clientes com limit None"""
+    grouped_query = select(
+        Customer.id,
+        Customer.name,
+        Customer.cpf,
+        func.count(Sale.id).label('sales_count'),
+        func.sum(Sale.total_amount).label('total_amount'),
+        func.avg(Sale.total_amount).label('avg_amount')
+    ).join(Sale, Customer.id == Sale.customer_id)
+    return (await db.execute(
+        _filter_grouped_sales(grouped_query, **filters)
+        .group_by(Customer.id, Customer.name, Customer.cpf)
+        .order_by(func.sum(Sale.total_amount).desc(), Customer.id)
+        .offset(skip).limit(limit)
+    )).all()
+
+async def _grouped_sales_details(db: AsyncSession, filters: dict, grouped_sales):
+    """Monta o relatório dos clientes informados, com os detalhes das vendas de
+    todos eles em uma query"""
+    if not grouped_sales:
+        return []
+    
+    sales_query = select(Sale).join(Customer, Customer.id == Sale.customer_id).options(
+        joinedload(Sale.seller),
+        selectinload(Sale.items).joinedload(SaleItem.product)
+    ).filter(Sale.customer_id.in_([group.id for group in grouped_sales]))
+    sales = (await db.scalars(
+        _filter_grouped_sales(sales_query, **filters).order_by(Sale.created_at.desc(), Sale.id.desc())
+    )).all()
+    
+    sales_by_customer = {}
+    for sale in sales:
+        sales_by_customer.setdefault(sale.customer_id, []).append(sale)
     
-    # Buscar detalhes das vendas para cada cliente
     result = []
     for group in grouped_sales:
-        # Buscar vendas detalhadas para este cliente
-        sales_query = db.query(Sale).options(
-            joinedload(Sale.seller),
-            joinedload(Sale.items).joinedload(SaleItem.product)
-        ).filter(Sale.customer_id == group.id)
-        
-        # Aplicar mesmos filtros
-        if seller_id and current_user.role == "admin":
-            try:
-                seller_id_int = int(seller_id)
-                sales_query = sales_query.filter(Sale.seller_id == seller_id_int)
-            except ValueError:
-                pass
-        elif current_user.role != "admin":
-            # Vendedores só veem suas próprias vendas
-            sales_query = sales_query.filter(Sale.seller_id == current_user.id)
-        
-        if start_date:
-            sales_query = sales_query.filter(Sale.created_at >= start_date)
-        
-        if end_date:
-            sales_query = sales_query.filter(Sale.created_at <= end_date + " 23:59:59")
-        
-        if status:
-            sales_query = sales_query.filter(Sale.status == status)
-        
-        sales = sales_query.order_by(Sale.created_at.desc()).all()
+        customer_sales = sales_by_customer.get(group.id, [])
         
         # Calcular estatísticas por status
         status_stats = {}
-        for sale in sales:
-            status = sale.status
-            if status not in status_stats:
-                status_stats[status] = {"count": 0, "amount": 0}
-            status_stats[status]["count"] += 1
-            status_stats[status]["amount"] += sale.total_amount
+        for sale in customer_sales:
+            stats = status_stats.setdefault(sale.status, {"count": 0, "amount": 0})
+            stats["count"] += 1
+            stats["amount"] += sale.total_amount
         
         result.append({
             "customer": {
@@ -160,7 +236,7 @@ async def get_sales_grouped_by_customer(
                     "created_at": sale.created_at,
                     "seller": {
                         "id": sale.seller.id,
-                        "name": sale.seller.name
+                        "name": sale.seller.full_name
                     } if sale.seller else None,
                     "items": [
                         {
@@ -172,23 +248,195 @@ async def get_sales_grouped_by_customer(
                         for item in sale.items
                     ]
                 }
-                for sale in sales
+                for sale in customer_sales
             ]
         })
     
-    return result 
+    return result
+
+async def _grouped_sales_page(db: AsyncSession, filters: dict, skip: int, limit: Optional[int]):
+    """Uma página do relatório com duas queries: o agregado por cliente e
+    os detalhes das vendas de todos os clientes da página."""
+    return await _grouped_sales_details(db, filters, await _grouped_sales(db, filters, skip, limit))
+
+@router.get("/grouped-by-customer")
+async def get_sales_grouped_by_customer(
+    customer_name: Optional[str] = None,
+    seller_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Retorna vendas agrupadas por cliente com filtros (todos os clientes, ou
+    skip/limit quando limit é informado).
+    Com format=ndjson, transmite um cliente por linha (a partir de skip, sem limite),
+    carregando os detalhes de GROUPED_STREAM_CHUNK_SIZE clientes por vez."""
+    filters = {
+        "customer_name": customer_name,
+        "seller_id": seller_id,
+        "period": date_range(Sale.created_at, start_date, end_date),
+        "status": status,
+        "current_user": current_user,
+    }
+    
+    if format == "json":
+        return ORJSONResponse(await _grouped_sales_page(db, filters, skip, limit))
+    
+    async def stream_groups():
+        # Sessão própria, aberta só quando o streaming começa
+        async with AsyncSessionLocal() as stream_db:
+            # A ordem dos clientes é lida uma vez só (uma linha pequena por cliente):
+            # paginar com OFFSET sobre o total, que muda com as vendas novas, pularia
+            # ou repetiria clientes entre os lotes. As vendas gravadas depois do
+            # início do relatório ficam de fora dos totais e dos detalhes.
+            stream_filters = dict(filters, until_sale_id=await stream_db.scalar(select(func.max(Sale.id))) or 0)
+            grouped_sales = await _grouped_sales(stream_db, stream_filters, skip, None)
+            for start in range(0, len(grouped_sales), GROUPED_STREAM_CHUNK_SIZE):
+                chunk = grouped_sales[start:start + GROUPED_STREAM_CHUNK_SIZE]
+                for group in await _grouped_sales_details(stream_db, stream_filters, chunk):
+                    yield orjson.dumps(group) + b"\n"
+                # Libera os objetos do lote anterior para manter a memória constante
+                stream_db.expunge_all()
+    
+    # A sessão da requisição (get_db) só fecharia no fim do streaming: devolve a
+    # conexão ao pool agora em vez de segurar duas conexões durante o relatório
+    await release_db(db)
+    return StreamingResponse(stream_groups(), media_type="application/x-ndjson")
+
+def _summary_range(start_date: Optional[date], end_date: Optional[date]):
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=SUMMARY_DEFAULT_DAYS - 1)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    return start_date, end_date
+
+def _summary_seller(current_user: User, seller_id: Optional[int]) -> Optional[int]:
+    # Vendedores só veem os próprios números
+    if current_user.role != "admin":
+        return current_user.id
+    return seller_id
+
+@router.get("/daily-summary")
+async def get_daily_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    # Lê o rollup do dia (uma linha por vendedor x forma de pagamento)
+    return await daily_summary(db, date.today(), _summary_seller(current_user, None))
+
+@router.get("/summary/daily")
+async def get_sales_summary_by_day(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    seller_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Totais de vendas por dia e forma de pagamento no intervalo (padrão: últimos 30 dias)"""
+    start_date, end_date = _summary_range(start_date, end_date)
+    seller_id = _summary_seller(current_user, seller_id)
+    
+    query = select(
+        DailySalesRollup.day,
+        DailySalesRollup.payment_method,
+        func.sum(DailySalesRollup.total_amount).label('total'),
+        func.sum(DailySalesRollup.sales_count).label('count')
+    ).filter(
+        DailySalesRollup.day >= start_date,
+        DailySalesRollup.day <= end_date,
+        DailySalesRollup.sales_count > 0
+    )
+    if seller_id is not None:
+        query = query.filter(DailySalesRollup.seller_id == seller_id)
+    rows = (await db.execute(
+        query.group_by(DailySalesRollup.day, DailySalesRollup.payment_method)
+        .order_by(DailySalesRollup.day, DailySalesRollup.payment_method)
+    )).all()
+    
+    days = {}
+    for row in rows:
+        day = days.setdefault(row.day, {
+            "date": row.day.isoformat(),
+            "total_sales": 0.0,
+            "total_count": 0,
+            "payment_methods": []
+        })
+        day["total_sales"] += float(row.total)
+        day["total_count"] += int(row.count)
+        day["payment_methods"].append({
+            "method": row.payment_method,
+            "total": float(row.total),
+            "count": int(row.count)
+        })
+    
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "total_sales": sum(day["total_sales"] for day in days.values()),
+        "total_count": sum(day["total_count"] for day in days.values()),
+        "days": list(days.values())
+    }
+
+@router.get("/summary/products")
+async def get_sales_summary_by_product(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    seller_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Produtos mais vendidos (por valor) no intervalo (padrão: últimos 30 dias)"""
+    start_date, end_date = _summary_range(start_date, end_date)
+    seller_id = _summary_seller(current_user, seller_id)
+    
+    total = func.sum(DailyProductRollup.total_amount).label('total')
+    query = select(
+        DailyProductRollup.product_id,
+        Product.name,
+        func.sum(DailyProductRollup.quantity).label('quantity'),
+        func.sum(DailyProductRollup.items_count).label('items_count'),
+        total
+    ).join(Product, Product.id == DailyProductRollup.product_id).filter(
+        DailyProductRollup.day >= start_date,
+        DailyProductRollup.day <= end_date,
+        DailyProductRollup.items_count > 0
+    )
+    if seller_id is not None:
+        query = query.filter(DailyProductRollup.seller_id == seller_id)
+    rows = (await db.execute(
+        query.group_by(DailyProductRollup.product_id, Product.name)
+        .order_by(total.desc(), DailyProductRollup.product_id)
+        .limit(limit)
+    )).all()
+    
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "products": [
+            {
+                "product_id": row.product_id,
+                "product_name": row.name,
+                "quantity": float(row.quantity),
+                "items_count": int(row.items_count),
+                "total": float(row.total)
+            }
+            for row in rows
+        ]
+    }
 
 @router.get("/{sale_id}", response_model=SaleSchema)
 async def get_sale(
     sale_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    db_sale = db.query(Sale).options(
-        joinedload(Sale.seller), 
-        joinedload(Sale.customer),
-        joinedload(Sale.items).joinedload(SaleItem.product)
-    ).filter(Sale.id == sale_id).first()
+    db_sale = await db.get(Sale, sale_id, options=sale_options())
     if db_sale is None:
         raise HTTPException(status_code=404, detail="Sale not found")
     
@@ -200,132 +448,239 @@ async def get_sale(
 @router.post("/", response_model=SaleSchema, status_code=201)
 async def create_sale(
     sale: SaleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    total_amount = 0
-    sale_items_to_create = []
+    if not sale.items:
+        raise HTTPException(status_code=400, detail="Sale must have at least one item")
+    quantities = _cart_quantities(sale.items)
     
+    products = await _lock_products(db, quantities.keys())
     for item in sale.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
+        product = products.get(item.product_id)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product with id {item.product_id} not found")
-        if product.stock_quantity < item.quantity:
+        if product.stock_quantity < quantities[item.product_id]:
             raise HTTPException(status_code=400, detail=f"Insufficient stock for {product.name}")
-        
-        item_total = product.price * item.quantity
-        total_amount += item_total
-        
-        sale_items_to_create.append(SaleItem(
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=product.price,
-            total_price=item_total
-        ))
-        
-        product.stock_quantity -= item.quantity
-
-    # Definir status da venda
-    sale_status = "completed"
-    paid_at = None
-    if sale.payment_method.lower() in ["fiado", "credito", "a prazo"]:
-        sale_status = "pending"
-    else:
-        paid_at = datetime.now()
+    
+    sale_items_to_create, total_amount = _build_sale_items(sale.items, products)
+    
+    # Limite de crédito: confere o saldo mantido do cliente (uma linha, bloqueada até o commit)
+    if _is_credit_sale(sale.payment_method):
+        available = (await credit_available(db, [sale.customer_id])).get(sale.customer_id)
+        if available is not None and total_amount > available + BALANCE_TOLERANCE:
+            raise HTTPException(status_code=400, detail="Credit limit exceeded")
+    
+    await _decrement_stock(db, quantities)
 
     db_sale = Sale(
         seller_id=current_user.id,
         customer_id=sale.customer_id,
         payment_method=sale.payment_method,
         total_amount=total_amount,
-        status=sale_status,
-        items=sale_items_to_create,
-        paid_at=paid_at
+        **_sale_status(sale.payment_method)
     )
-    
     db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
-    
-    # Se o pagamento for "fiado", criar uma conta a receber
-    if sale.payment_method.lower() in ["fiado", "credito", "a prazo"]:
-        # Usar data de vencimento fornecida ou padrão de 30 dias
-        if hasattr(sale, 'due_date') and sale.due_date:
-            due_date = datetime.fromisoformat(sale.due_date.replace('Z', '+00:00'))
-        else:
-            due_date = datetime.now() + timedelta(days=30)
-        
-        account_receivable = AccountReceivable(
+    await db.flush()
+    
+    if sale_items_to_create:
+        await db.execute(
+            insert(SaleItem),
+            [dict(item, sale_id=db_sale.id) for item in sale_items_to_create]
+        )
+    await record_movements(db, _sale_movements(db_sale.id, quantities, current_user.id))
+    alerts_changed = await check_stock_alerts(db, quantities)
+    await add_sales_to_rollups(db, [db_sale.id])
+    
+    # Se o pagamento for "fiado", criar uma conta a receber na mesma transação
+    if _is_credit_sale(sale.payment_method):
+        db.add(AccountReceivable(
             sale_id=db_sale.id,
             customer_id=sale.customer_id,
             amount=total_amount,
-            due_date=due_date,
+            due_date=_due_date(sale),
             notes=f"Fiado da venda #{db_sale.id}",
             status="pending"
-        )
+        ))
+        await add_to_balances(db, {sale.customer_id: (total_amount, 0)})
+    
+    await db.commit()
+    product_catalog.adjust_stock(quantities)
+    if alerts_changed:
+        notify_stock_alerts()
+    record_sales([len(sale.items)], total_amount)
+    publish_sales([{
+        "id": db_sale.id,
+        "customer_id": db_sale.customer_id,
+        "seller_id": db_sale.seller_id,
+        "payment_method": db_sale.payment_method,
+        "total_amount": db_sale.total_amount,
+        "status": db_sale.status
+    }])
+    # Os produtos bloqueados ainda têm o estoque anterior à baixa (UPDATE sem o ORM)
+    publish_stock({
+        product_id: products[product_id].stock_quantity - quantity
+        for product_id, quantity in quantities.items()
+    })
+    
+    return await reload(db, Sale, db_sale.id, sale_options())
+
+@router.post("/batch", response_model=SaleBatchResponse)
+async def create_sales_batch(
+    batch: SaleBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Registra em lote as vendas feitas offline pelos terminais do PDV.
+    Cada venda é aceita ou rejeitada individualmente; as aceitas são gravadas
+    em uma única transação."""
+    if len(batch.sales) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds the maximum of {MAX_BATCH_SIZE} sales")
+    
+    # Carrega (e bloqueia) todos os produtos e clientes do lote de uma só vez
+    product_ids = {item.product_id for sale in batch.sales for item in sale.items}
+    products = await _lock_products(db, product_ids)
+    customer_ids = set((await db.scalars(
+        select(Customer.id).filter(Customer.id.in_({sale.customer_id for sale in batch.sales}))
+    )).all())
+    
+    credit = await credit_available(db, {sale.customer_id for sale in batch.sales if _is_credit_sale(sale.payment_method)})
+    
+    # Valida o lote em ordem, consumindo um estoque (e um crédito) em memória
+    available = {product_id: product.stock_quantity for product_id, product in products.items()}
+    results = []
+    accepted = []
+    for index, sale in enumerate(batch.sales):
+        quantities = _cart_quantities(sale.items)
+        reason = None
+        if not sale.items:
+            reason = "Sale has no items"
+        elif sale.customer_id not in customer_ids:
+            reason = f"Customer with id {sale.customer_id} not found"
+        else:
+            for item in sale.items:
+                if item.product_id not in products:
+                    reason = f"Product with id {item.product_id} not found"
+                    break
+                if available[item.product_id] < quantities[item.product_id]:
+                    reason = f"Insufficient stock for {products[item.product_id].name}"
+                    break
+        if reason is None and _is_credit_sale(sale.payment_method):
+            try:
+                _due_date(sale)
+            except ValueError:
+                reason = f"Invalid due date: {sale.due_date}"
+        credit_used = 0
+        if reason is None and _is_credit_sale(sale.payment_method) and sale.customer_id in credit:
+            _, credit_used = _build_sale_items(sale.items, products)
+            if credit_used > credit[sale.customer_id] + BALANCE_TOLERANCE:
+                reason = "Credit limit exceeded"
+        
+        if reason:
+            results.append({"index": index, "status": "rejected", "reason": reason})
+            continue
         
-        db.add(account_receivable)
-        db.commit()
+        for product_id, quantity in quantities.items():
+            available[product_id] -= quantity
+        if credit_used:
+            credit[sale.customer_id] -= credit_used
+        accepted.append((index, sale, quantities))
     
-    return db_sale
+    if accepted:
+        stock_used = {}
+        sale_rows = []
+        sale_items = []
+        for _, sale, quantities in accepted:
+            for product_id, quantity in quantities.items():
+                stock_used[product_id] = stock_used.get(product_id, 0) + quantity
+            items, total_amount = _build_sale_items(sale.items, products)
+            sale_items.append(items)
+            sale_rows.append({
+                "seller_id": current_user.id,
+                "customer_id": sale.customer_id,
+                "payment_method": sale.payment_method,
+                "total_amount": total_amount,
+                **_sale_status(sale.payment_method)
+            })
+        
+        await _decrement_stock(db, stock_used)
+        
+        sale_ids = (await db.scalars(
+            insert(Sale).returning(Sale.id, sort_by_parameter_order=True),
+            sale_rows
+        )).all()
+        
+        item_rows = [
+            dict(item, sale_id=sale_id)
+            for sale_id, items in zip(sale_ids, sale_items)
+            for item in items
+        ]
+        if item_rows:
+            await db.execute(insert(SaleItem), item_rows)
+        await record_movements(db, [
+            movement
+            for sale_id, (_, _, quantities) in zip(sale_ids, accepted)
+            for movement in _sale_movements(sale_id, quantities, current_user.id)
+        ])
+        alerts_changed = await check_stock_alerts(db, stock_used)
+        await add_sales_to_rollups(db, sale_ids)
+        
+        account_rows = [
+            {
+                "sale_id": sale_id,
+                "customer_id": sale.customer_id,
+                "amount": row["total_amount"],
+                "due_date": _due_date(sale),
+                "notes": f"Fiado da venda #{sale_id}",
+                "status": "pending"
+            }
+            for sale_id, row, (_, sale, _) in zip(sale_ids, sale_rows, accepted)
+            if _is_credit_sale(sale.payment_method)
+        ]
+        if account_rows:
+            await db.execute(insert(AccountReceivable), account_rows)
+            opened = {}
+            for row in account_rows:
+                opened[row["customer_id"]] = opened.get(row["customer_id"], 0) + row["amount"]
+            await add_to_balances(db, {customer_id: (amount, 0) for customer_id, amount in opened.items()})
+        
+        await db.commit()
+        product_catalog.adjust_stock(stock_used)
+        if alerts_changed:
+            notify_stock_alerts()
+        record_sales([len(sale.items) for _, sale, _ in accepted], sum(row["total_amount"] for row in sale_rows))
+        publish_sales([dict(row, id=sale_id) for sale_id, row in zip(sale_ids, sale_rows)])
+        # available já tem o estoque depois das vendas aceitas
+        publish_stock({product_id: available[product_id] for product_id in stock_used})
+        
+        for sale_id, (index, _, _) in zip(sale_ids, accepted):
+            results.append({"index": index, "status": "accepted", "sale_id": sale_id})
+    
+    results.sort(key=lambda result: result["index"])
+    return {
+        "accepted": len(accepted),
+        "rejected": len(batch.sales) - len(accepted),
+        "results": results
+    }
 
 @router.put("/{sale_id}", response_model=SaleSchema)
 async def update_sale(
     sale_id: int,
     sale: SaleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    db_sale = db.query(Sale).filter(Sale.id == sale_id).first()
+    db_sale = await db.get(Sale, sale_id)
     if db_sale is None:
         raise HTTPException(status_code=404, detail="Sale not found")
     
+    # Retira a venda dos rollups e soma de novo com os valores atualizados
+    # (cancelamento só retira)
+    await remove_sales_from_rollups(db, [sale_id])
     for field, value in sale.dict(exclude_unset=True).items():
         setattr(db_sale, field, value)
+    await db.flush()
+    await add_sales_to_rollups(db, [sale_id])
     
-    db.commit()
-    db.refresh(db_sale)
-    return db_sale
-
-@router.get("/daily-summary")
-async def get_daily_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
-):
-    from sqlalchemy import func
-    from datetime import datetime, date
-    
-    today = date.today()
-    
-    # Total sales today
-    daily_sales = db.query(func.sum(Sale.total_amount)).filter(
-        func.date(Sale.created_at) == today
-    ).scalar() or 0
-    
-    # Number of sales today
-    daily_count = db.query(func.count(Sale.id)).filter(
-        func.date(Sale.created_at) == today
-    ).scalar() or 0
-    
-    # Sales by payment method
-    payment_methods = db.query(
-        Sale.payment_method,
-        func.sum(Sale.total_amount).label('total'),
-        func.count(Sale.id).label('count')
-    ).filter(
-        func.date(Sale.created_at) == today
-    ).group_by(Sale.payment_method).all()
-    
-    return {
-        "date": today.isoformat(),
-        "total_sales": float(daily_sales),
-        "total_count": daily_count,
-        "payment_methods": [
-            {
-                "method": pm.payment_method,
-                "total": float(pm.total),
-                "count": pm.count
-            }
-            for pm in payment_methods
-        ]
-    } 
\ No newline at end of file
+    await db.commit()
+    return await reload(db, Sale, db_sale.id, sale_options())
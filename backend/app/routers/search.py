@@ -0,0 +1,31 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db
+from ..schemas import Customer as CustomerSchema, ProductSearchResult
+from ..search import search_customers, search_products
+from ..auth import get_current_active_user
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+    dependencies=[Depends(get_current_active_user)],
+)
+
+@router.get("/customers", response_model=List[CustomerSchema])
+async def search_customers_endpoint(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Autocomplete de clientes por nome (sem acentos) ou CPF, mais relevantes primeiro"""
+    return await search_customers(db, q, limit)
+
+@router.get("/products", response_model=List[ProductSearchResult])
+async def search_products_endpoint(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Autocomplete de produtos por nome ou categoria (sem acentos), mais relevantes primeiro"""
+    return await search_products(db, q, limit)
@@ -0,0 +1,45 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_db, release_db
+from ..pagination import apply_cursor, set_next_cursor
+from ..models import StockAlert
+from ..stock_alerts import alerts_query, alert_json, stock_alert_events
+from ..auth import get_current_admin_user
+
+router = APIRouter(
+    prefix="/stock-alerts",
+    tags=["stock-alerts"],
+    dependencies=[Depends(get_current_admin_user)],
+)
+
+@router.get("/")
+async def get_stock_alerts(
+    response: Response,
+    include_resolved: bool = False,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Alertas de estoque baixo, do mais recente para o mais antigo (por padrão só os abertos)"""
+    query = alerts_query()
+    if not include_resolved:
+        query = query.filter(StockAlert.resolved_at.is_(None))
+    if cursor:
+        query = apply_cursor(query, (StockAlert.id,), cursor, descending=True)
+    rows = (await db.execute(query.order_by(StockAlert.id.desc()).limit(limit))).all()
+    set_next_cursor(response, rows, limit, lambda row: (row.id,))
+    return ORJSONResponse([alert_json(row) for row in rows], headers=dict(response.headers))
+
+@router.get("/stream")
+async def stream_stock_alerts(request: Request, db: AsyncSession = Depends(get_db)):
+    """Server-Sent Events: evento snapshot com os alertas abertos e depois
+    opened/resolved a cada alerta aberto ou resolvido (ver app/stock_alerts.py)"""
+    # O stream lê os alertas com sessões próprias: não segura a conexão da autenticação
+    await release_db(db)
+    return StreamingResponse(
+        stock_alert_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,10 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
+from ..loaders import supplier_box_options, box_movement_options, reload
+from ..etag import table_etag, row_etag, not_modified
 from ..models import SupplierBox, BoxMovement, Supplier
 from ..schemas import SupplierBoxCreate, SupplierBoxUpdate, SupplierBox as SupplierBoxSchema, BoxMovementCreate, BoxMovement as BoxMovementSchema
 from ..auth import get_current_active_user, get_current_admin_user
@@ -15,13 +18,20 @@ router = APIRouter(
 
 @router.get("/", response_model=List[SupplierBoxSchema])
 async def get_supplier_boxes(
+    request: Request,
+    response: Response,
     supplier_id: int = None,
     status: str = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Lista caixas de fornecedores com filtros opcionais"""
-    query = db.query(SupplierBox).options(joinedload(SupplierBox.supplier))
+    # As caixas são serializadas com o fornecedor
+    cached = not_modified(request, response, await table_etag(db, request, SupplierBox, Supplier))
+    if cached:
+        return cached
+    
+    query = select(SupplierBox).options(*supplier_box_options())
     
     if supplier_id:
         query = query.filter(SupplierBox.supplier_id == supplier_id)
@@ -29,57 +39,58 @@ async def get_supplier_boxes(
     if status:
         query = query.filter(SupplierBox.status == status)
     
-    boxes = query.filter(SupplierBox.is_active == True).order_by(SupplierBox.created_at.desc()).all()
+    boxes = (await db.scalars(query.filter(SupplierBox.is_active == True).order_by(SupplierBox.created_at.desc()))).all()
     return boxes
 
 @router.get("/{box_id}", response_model=SupplierBoxSchema)
 async def get_supplier_box(
     box_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtém uma caixa específica"""
-    box = db.query(SupplierBox).options(joinedload(SupplierBox.supplier)).filter(SupplierBox.id == box_id).first()
+    box = await db.get(SupplierBox, box_id, options=supplier_box_options())
     if not box:
         raise HTTPException(status_code=404, detail="Supplier box not found")
-    return box
+    return not_modified(request, response, row_etag(request, box, box.supplier)) or box
 
 @router.post("/", response_model=SupplierBoxSchema, status_code=201)
 async def create_supplier_box(
     box: SupplierBoxCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Cria uma nova caixa de fornecedor (apenas para admins)"""
     # Verificar se o fornecedor existe
-    supplier = db.query(Supplier).filter(Supplier.id == box.supplier_id).first()
+    supplier = await db.get(Supplier, box.supplier_id)
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
     # Verificar se o número da caixa já existe para este fornecedor
-    existing_box = db.query(SupplierBox).filter(
+    existing_box = await db.scalar(select(SupplierBox).filter(
         SupplierBox.supplier_id == box.supplier_id,
         SupplierBox.box_number == box.box_number
-    ).first()
+    ))
     
     if existing_box:
         raise HTTPException(status_code=400, detail="Box number already exists for this supplier")
     
     db_box = SupplierBox(**box.dict())
     db.add(db_box)
-    db.commit()
-    db.refresh(db_box)
-    return db_box
+    await db.commit()
+    return await reload(db, SupplierBox, db_box.id, supplier_box_options())
 
 @router.put("/{box_id}", response_model=SupplierBoxSchema)
 async def update_supplier_box(
     box_id: int,
     box_update: SupplierBoxUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Atualiza uma caixa de fornecedor (apenas para admins)"""
-    db_box = db.query(SupplierBox).filter(SupplierBox.id == box_id).first()
+    db_box = await db.get(SupplierBox, box_id)
     if not db_box:
         raise HTTPException(status_code=404, detail="Supplier box not found")
     
@@ -87,48 +98,48 @@ async def update_supplier_box(
     for key, value in update_data.items():
         setattr(db_box, key, value)
     
-    db.commit()
-    db.refresh(db_box)
-    return db_box
+    await db.commit()
+    return await reload(db, SupplierBox, db_box.id, supplier_box_options())
 
 @router.delete("/{box_id}", status_code=204)
 async def delete_supplier_box(
     box_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Desativa uma caixa de fornecedor (apenas para admins)"""
-    db_box = db.query(SupplierBox).filter(SupplierBox.id == box_id).first()
+    db_box = await db.get(SupplierBox, box_id)
     if not db_box:
         raise HTTPException(status_code=404, detail="Supplier box not found")
     
     db_box.is_active = False
-    db.commit()
+    await db.commit()
     return
 
 # Box Movement endpoints
 @router.get("/{box_id}/movements", response_model=List[BoxMovementSchema])
 async def get_box_movements(
     box_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Lista movimentações de uma caixa específica"""
-    movements = db.query(BoxMovement).options(
-        joinedload(BoxMovement.user)
-    ).filter(BoxMovement.supplier_box_id == box_id).order_by(BoxMovement.created_at.desc()).all()
+    movements = (await db.scalars(
+        select(BoxMovement).options(*box_movement_options())
+        .filter(BoxMovement.supplier_box_id == box_id).order_by(BoxMovement.created_at.desc())
+    )).all()
     return movements
 
 @router.post("/{box_id}/movements", response_model=BoxMovementSchema, status_code=201)
 async def create_box_movement(
     box_id: int,
     movement: BoxMovementCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Registra uma movimentação de caixa"""
     # Verificar se a caixa existe
-    box = db.query(SupplierBox).filter(SupplierBox.id == box_id).first()
+    box = await db.get(SupplierBox, box_id)
     if not box:
         raise HTTPException(status_code=404, detail="Supplier box not found")
     
@@ -150,20 +161,21 @@ async def create_box_movement(
     elif box.current_weight > 0:
         box.status = "em_uso"
     
-    db.commit()
-    db.refresh(db_movement)
-    return db_movement
+    await db.commit()
+    return await reload(db, BoxMovement, db_movement.id, box_movement_options())
 
 @router.get("/summary/status")
 async def get_boxes_summary(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Retorna um resumo das caixas por status"""
-    summary = db.query(
-        SupplierBox.status,
-        db.func.count(SupplierBox.id).label('count')
-    ).filter(SupplierBox.is_active == True).group_by(SupplierBox.status).all()
+    summary = (await db.execute(
+        select(
+            SupplierBox.status,
+            func.count(SupplierBox.id).label('count')
+        ).filter(SupplierBox.is_active == True).group_by(SupplierBox.status)
+    )).all()
     
     return {
         "summary": [
@@ -1,10 +1,14 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
+from ..pagination import apply_cursor, set_next_cursor
+from ..etag import table_etag, row_etag, not_modified
 from ..models import Supplier
 from ..schemas import SupplierCreate, SupplierUpdate, Supplier as SupplierSchema
 from ..auth import get_current_admin_user
+from ..catalog import mark_catalog_changed, invalidate_catalog
 
 router = APIRouter(
     prefix="/suppliers",
@@ -15,52 +19,64 @@ router = APIRouter(
 
 @router.get("/", response_model=List[SupplierSchema])
 async def get_suppliers(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     name: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Supplier).filter(Supplier.is_active == True)
+    cached = not_modified(request, response, await table_etag(db, request, Supplier))
+    if cached:
+        return cached
+    
+    query = select(Supplier).filter(Supplier.is_active == True)
     
     if name:
         query = query.filter(Supplier.name.ilike(f"%{name}%"))
     
-    suppliers = query.offset(skip).limit(limit).all()
+    query = apply_cursor(query, (Supplier.id,), cursor) if cursor else query.offset(skip)
+    
+    suppliers = (await db.scalars(query.order_by(Supplier.id).limit(limit))).all()
+    set_next_cursor(response, suppliers, limit, lambda row: (row.id,))
     return suppliers
 
 @router.get("/{supplier_id}", response_model=SupplierSchema)
 async def get_supplier(
     supplier_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
 ):
-    supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    supplier = await db.get(Supplier, supplier_id)
     if supplier is None:
         raise HTTPException(status_code=404, detail="Supplier not found")
-    return supplier
+    return not_modified(request, response, row_etag(request, supplier)) or supplier
 
 @router.post("/", response_model=SupplierSchema, status_code=201)
 async def create_supplier(
     supplier: SupplierCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Check if CNPJ already exists
-    db_supplier = db.query(Supplier).filter(Supplier.cnpj == supplier.cnpj).first()
+    db_supplier = await db.scalar(select(Supplier).filter(Supplier.cnpj == supplier.cnpj))
     if db_supplier:
         raise HTTPException(status_code=400, detail="CNPJ already registered")
     
     db_supplier = Supplier(**supplier.dict())
     db.add(db_supplier)
-    db.commit()
-    db.refresh(db_supplier)
+    await db.commit()
+    await db.refresh(db_supplier)
     return db_supplier
 
 @router.put("/{supplier_id}", response_model=SupplierSchema)
 async def update_supplier(
     supplier_id: int,
     supplier: SupplierUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    db_supplier = await db.get(Supplier, supplier_id)
     if db_supplier is None:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
@@ -68,19 +84,24 @@ async def update_supplier(
     for key, value in update_data.items():
         setattr(db_supplier, key, value)
     
-    db.commit()
-    db.refresh(db_supplier)
+    # Os produtos do catálogo trazem os dados do fornecedor
+    await mark_catalog_changed(db)
+    await db.commit()
+    invalidate_catalog()
+    await db.refresh(db_supplier)
     return db_supplier
 
 @router.delete("/{supplier_id}", status_code=204)
 async def delete_supplier(
     supplier_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    db_supplier = await db.get(Supplier, supplier_id)
     if db_supplier is None:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
     db_supplier.is_active = False
-    db.commit()
+    await mark_catalog_changed(db)
+    await db.commit()
+    invalidate_catalog()
     return 
\ No newline at end of file
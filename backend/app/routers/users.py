@@ -1,10 +1,12 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..models import User
 from ..schemas import UserCreate, UserUpdate, User as UserSchema
-from ..auth import get_current_admin_user, get_password_hash
+from ..auth import get_current_admin_user, mark_users_changed, invalidate_cached_user
+from ..passwords import hash_password
 
 router = APIRouter(
     prefix="/users",
@@ -14,21 +16,21 @@ router = APIRouter(
 
 @router.get("/", response_model=List[UserSchema])
 async def get_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Lista todos os usuários (apenas para admins)"""
-    users = db.query(User).order_by(User.created_at.desc()).all()
+    users = (await db.scalars(select(User).order_by(User.created_at.desc()))).all()
     return users
 
 @router.get("/{user_id}", response_model=UserSchema)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Obtém um usuário específico (apenas para admins)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -36,22 +38,22 @@ async def get_user(
 @router.post("/", response_model=UserSchema, status_code=201)
 async def create_user(
     user: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Cria um novo usuário (apenas para admins)"""
     # Verificar se o username já existe
-    existing_user = db.query(User).filter(User.username == user.username).first()
+    existing_user = await db.scalar(select(User).filter(User.username == user.username))
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Verificar se o email já existe
-    existing_email = db.query(User).filter(User.email == user.email).first()
+    existing_email = await db.scalar(select(User).filter(User.email == user.email))
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Criar o usuário
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -61,31 +63,25 @@ async def create_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.put("/{user_id}", response_model=UserSchema)
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Atualiza um usuário (apenas para admins)"""
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Verificar se o username já existe (se foi alterado)
-    if user_update.username and user_update.username != db_user.username:
-        existing_user = db.query(User).filter(User.username == user_update.username).first()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already registered")
-    
     # Verificar se o email já existe (se foi alterado)
     if user_update.email and user_update.email != db_user.email:
-        existing_email = db.query(User).filter(User.email == user_update.email).first()
+        existing_email = await db.scalar(select(User).filter(User.email == user_update.email))
         if existing_email:
             raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -94,29 +90,33 @@ async def update_user(
     
     # Se uma nova senha foi fornecida, fazer o hash
     if "password" in update_data and update_data["password"]:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password(update_data.pop("password"))
     
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
-    db.commit()
-    db.refresh(db_user)
+    await mark_users_changed(db)
+    await db.commit()
+    invalidate_cached_user(db_user.username)
+    await db.refresh(db_user)
     return db_user
 
 @router.delete("/{user_id}", status_code=204)
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Desativa um usuário (apenas para admins)"""
     if user_id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot deactivate your own account")
     
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     db_user.is_active = False
-    db.commit()
+    await mark_users_changed(db)
+    await db.commit()
+    invalidate_cached_user(db_user.username)
     return 
\ No newline at end of file
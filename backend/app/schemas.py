@@ -78,6 +78,7 @@ class CustomerBase(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     address: Optional[str] = None
+    credit_limit: Optional[float] = None  # Limite para compras fiado
 
 class CustomerCreate(CustomerBase):
     pass
@@ -95,6 +96,7 @@ class CustomerUpdate(BaseModel):
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
     address: Optional[str] = None
+    credit_limit: Optional[float] = None
     is_active: Optional[bool] = None
 
 # Product schemas
@@ -103,6 +105,7 @@ class ProductBase(BaseModel):
     description: Optional[str] = None
     price: float
     stock_quantity: float
+    min_stock: Optional[float] = 0  # Estoque mínimo do produto (0: sem alerta)
     unit: str
     supplier_id: int
     category: Optional[str] = None
@@ -124,6 +127,7 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     price: Optional[float] = None
     stock_quantity: Optional[float] = None
+    min_stock: Optional[float] = None
     unit: Optional[str] = None
     category: Optional[str] = None
     supplier_id: Optional[int] = None
@@ -173,6 +177,20 @@ class SaleUpdate(BaseModel):
     payment_method: Optional[str] = None
     status: Optional[str] = None
 
+class SaleBatchCreate(BaseModel):
+    sales: List[SaleCreate]
+
+class SaleBatchResult(BaseModel):
+    index: int  # Posição da venda no lote enviado
+    status: str  # accepted, rejected
+    sale_id: Optional[int] = None
+    reason: Optional[str] = None
+
+class SaleBatchResponse(BaseModel):
+    accepted: int
+    rejected: int
+    results: List[SaleBatchResult]
+
 # Stock Movement schemas
 class StockMovementBase(BaseModel):
     product_id: int
@@ -187,12 +205,21 @@ class StockMovementCreate(StockMovementBase):
 
 class StockMovement(StockMovementBase):
     id: int
-    user_id: int
+    user_id: Optional[int] = None
+    stock_change: float
+    sale_id: Optional[int] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class StockAsOf(BaseModel):
+    product_id: int
+    as_of: datetime
+    quantity: float
+    snapshot_at: Optional[datetime] = None  # Snapshot usado como ponto de partida
+    movements_replayed: int
+
 # --- Location Schemas ---
 class LocationBase(BaseModel):
     name: str
@@ -249,6 +276,29 @@ class ProductLocationUpdate(BaseModel):
     max_quantity: Optional[float] = None
     notes: Optional[str] = None
 
+# --- Stock Transfer Schemas ---
+class StockTransferLine(BaseModel):
+    product_id: int
+    from_location_id: Optional[int] = None  # None: estoque do produto sem localização
+    to_location_id: Optional[int] = None
+    quantity: float
+
+class StockTransfer(StockTransferLine):
+    reason: Optional[str] = None
+
+class StockTransferBatch(BaseModel):
+    items: List[StockTransferLine]
+    reason: Optional[str] = None
+
+class StockTransferBalance(BaseModel):
+    product_id: int
+    location_id: int
+    quantity: float  # Quantidade na localização depois da transferência
+
+class StockTransferResponse(BaseModel):
+    transferred: int
+    balances: List[StockTransferBalance]
+
 # --- Supplier Box Schemas ---
 class SupplierBoxBase(BaseModel):
     supplier_id: int
@@ -350,4 +400,52 @@ class Payment(PaymentBase):
     user: Optional["User"] = None
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+# --- Account Receivable listing (payload enxuto da listagem) ---
+class SaleSummary(BaseModel):
+    id: int
+    total_amount: float
+    payment_method: str
+    status: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class AccountPayment(BaseModel):
+    id: int
+    amount: float
+    payment_method: str
+    payment_date: datetime
+    notes: Optional[str] = None
+    created_by: int
+    user: Optional["User"] = None
+    
+    class Config:
+        from_attributes = True
+
+class AccountReceivableListItem(AccountReceivableBase):
+    id: int
+    paid_amount: float
+    status: str
+    paid_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    sale: Optional[SaleSummary] = None
+    customer: Optional["Customer"] = None
+    payments: List[AccountPayment] = []
+    
+    class Config:
+        from_attributes = True
+
+class ProductSearchResult(BaseModel):
+    id: int
+    name: str
+    category: Optional[str] = None
+    price: float
+    unit: str
+    stock_quantity: float
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,152 @@
+"""
+Busca de clientes e produtos para o autocomplete do PDV.
+
+No PostgreSQL a busca usa índices GIN de trigramas (pg_trgm) sobre o nome sem
+acentos e em minúsculas, e um índice de prefixo sobre os dígitos do CPF
+(criados pela migration 0007), então '%termo%' não faz varredura sequencial.
+No SQLite (testes/dev) não há trigramas: a busca usa um índice em memória de
+prefixos de palavras, reconstruído quando clientes ou produtos são alterados.
+"""
+import bisect
+import heapq
+import unicodedata
+from sqlalchemy import event, select, func, or_, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from .models import Customer, Product
+
+def normalize(text) -> str:
+    """Minúsculas e sem acentos, igual a search_normalize() no PostgreSQL"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def digits(text) -> str:
+    return "".join(char for char in text or "" if char.isdigit())
+
+# --- PostgreSQL ---
+
+def _rank(column, term: str):
+    # Começa com o termo > tem uma palavra que começa com o termo > similaridade
+    return (
+        case((column.startswith(term, autoescape=True), 2), (column.contains(" " + term, autoescape=True), 1), else_=0)
+        + func.similarity(column, term)
+    )
+
+async def _search_postgres(db: AsyncSession, model, text_columns, cpf_column, query: str, limit: int):
+    term = normalize(query.strip())
+    normalized = [func.search_normalize(column) for column in text_columns]
+    conditions = [column.contains(term, autoescape=True) for column in normalized]
+    # Tolerância a erros de digitação (operador % do pg_trgm, também usa o índice)
+    conditions += [column.op("%")(term) for column in normalized]
+    rank = _rank(normalized[0], term)
+    if cpf_column is not None and digits(query):
+        cpf_digits = func.regexp_replace(cpf_column, "[^0-9]", "", "g")
+        conditions.append(cpf_digits.startswith(digits(query)))
+        rank = rank + case((cpf_digits.startswith(digits(query)), 3), else_=0)
+    return (await db.scalars(
+        select(model)
+        .filter(model.is_active == True, or_(*conditions))
+        .order_by(rank.desc(), model.name, model.id)
+        .limit(limit)
+    )).all()
+
+# --- Índice em memória (SQLite) ---
+
+class MemorySearchIndex:
+    """Índice de prefixos: lista ordenada de (palavra, id) consultada com bisect"""
+
+    def __init__(self, model, text_columns, cpf_column=None):
+        self.model = model
+        self.text_columns = text_columns
+        self.cpf_column = cpf_column
+        self.stale = True
+        self._names = {}
+        self._tokens = []
+        self._cpfs = []
+
+    async def _build(self, db: AsyncSession):
+        columns = [self.model.id, *self.text_columns]
+        if self.cpf_column is not None:
+            columns.append(self.cpf_column)
+        rows = (await db.execute(select(*columns).filter(self.model.is_active == True))).all()
+
+        names, tokens, cpfs = {}, [], []
+        for row in rows:
+            names[row[0]] = normalize(row[1])
+            for text in row[1:len(self.text_columns) + 1]:
+                tokens.extend((token, row[0]) for token in normalize(text).split())
+            if self.cpf_column is not None and digits(row[-1]):
+                cpfs.append((digits(row[-1]), row[0]))
+        self._names, self._tokens, self._cpfs = names, sorted(tokens), sorted(cpfs)
+        self.stale = False
+
+    @staticmethod
+    def _prefixed(entries, prefix):
+        start = bisect.bisect_left(entries, (prefix,))
+        for key, object_id in entries[start:]:
+            if not key.startswith(prefix):
+                break
+            yield object_id
+
+    async def search(self, db: AsyncSession, query: str, limit: int):
+        if self.stale:
+            await self._build(db)
+        words = normalize(query).split()
+        scores = {}
+        if words:
+            # Todas as palavras da busca precisam ser prefixo de alguma palavra do registro
+            matches = None
+            for word in words:
+                found = set(self._prefixed(self._tokens, word))
+                matches = found if matches is None else matches & found
+            term = " ".join(words)
+            for object_id in matches:
+                scores[object_id] = 2 if self._names[object_id].startswith(term) else 1
+        if digits(query):
+            for object_id in self._prefixed(self._cpfs, digits(query)):
+                scores[object_id] = 3
+
+        ranked = heapq.nsmallest(limit, scores, key=lambda object_id: (-scores[object_id], self._names[object_id], object_id))
+        if not ranked:
+            return []
+        objects = {
+            obj.id: obj
+            for obj in await db.scalars(select(self.model).filter(self.model.id.in_(ranked)))
+        }
+        return [objects[object_id] for object_id in ranked if object_id in objects]
+
+customer_index = MemorySearchIndex(Customer, [Customer.name], Customer.cpf)
+product_index = MemorySearchIndex(Product, [Product.name, Product.category])
+
+def _track_change(index):
+    def listener(mapper, connection, target):
+        object_session(target).info.setdefault("stale_search_indexes", set()).add(index)
+    return listener
+
+for _model, _index in ((Customer, customer_index), (Product, product_index)):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _track_change(_index))
+
+@event.listens_for(Session, "after_commit")
+def _mark_indexes_stale(session):
+    # Só depois do commit: antes disso uma reconstrução ainda leria os dados antigos
+    for index in session.info.pop("stale_search_indexes", ()):
+        index.stale = True
+
+@event.listens_for(Session, "after_rollback")
+def _discard_tracked_changes(session):
+    session.info.pop("stale_search_indexes", None)
+
+# --- API ---
+
+async def search_customers(db: AsyncSession, query: str, limit: int):
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, Customer, [Customer.name], Customer.cpf, query, limit)
+    return await customer_index.search(db, query, limit)
+
+async def search_products(db: AsyncSession, query: str, limit: int):
+    if db.bind.dialect.name == "postgresql":
+        return await _search_postgres(db, Product, [Product.name, Product.category], None, query, limit)
+    return await product_index.search(db, query, limit)
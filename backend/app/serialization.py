@@ -0,0 +1,25 @@
+"""
+Serialização rápida das respostas grandes.
+
+Pelo caminho padrão do FastAPI, cada linha ORM é validada pelo response_model,
+convertida em dicts/listas Python (jsonable) e só então codificada em JSON.
+model_response valida as linhas ORM com um TypeAdapter e gera o JSON direto no
+pydantic-core, sem a estrutura intermediária. Os endpoints continuam
+declarando response_model para a documentação.
+"""
+from functools import lru_cache
+from typing import Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+
+@lru_cache(maxsize=None)
+def _adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+def model_response(schema, data, response: Optional[Response] = None) -> Response:
+    """Resposta JSON de `data` (objetos ORM) validada com `schema`, ex.: List[Sale].
+    Os headers definidos no `response` injetado no endpoint são preservados."""
+    adapter = _adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
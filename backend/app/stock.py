@@ -0,0 +1,111 @@
+"""
+Razão (ledger) do estoque: toda alteração de Product.stock_quantity grava uma
+movimentação em stock_movements, na mesma transação, com o efeito assinado
+no estoque (stock_change). As movimentações só são inseridas, nunca alteradas.
+
+stock_snapshots guarda periodicamente (snapshot_stock.py, pelo cron) o
+estoque de cada produto em um instante. O estoque em qualquer data é o
+snapshot mais recente até ela mais as movimentações entre os dois, sem
+percorrer o histórico inteiro do produto; check_stock.py confere (e corrige
+com --fix) stock_quantity contra o ledger.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, insert, update, func, and_, or_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .cache import version_bump
+from .catalog import catalog_version
+from .models import Product, StockMovement, StockSnapshot
+
+# Tipos de movimentação e o sinal do efeito no estoque total do produto
+# (transferências só mudam a localização; ajustes manuais são só registro)
+MOVEMENT_SIGNS = {"entrada": 1, "saída": -1, "venda": -1, "ajuste": 0, "transferência": 0}
+# Atraso do snapshot em relação ao relógio: transações ainda abertas gravam
+# movimentações com created_at anterior ao commit
+SNAPSHOT_DELAY = timedelta(minutes=5)
+# Diferença de arredondamento aceita ao comparar quantidades
+STOCK_TOLERANCE = 0.001
+
+def stock_change(movement_type: str, quantity: float) -> float:
+    """Efeito de uma movimentação no estoque do produto, pelo tipo"""
+    return MOVEMENT_SIGNS.get(movement_type, 0) * quantity
+
+async def record_movements(db: AsyncSession, rows):
+    """Insere as movimentações (dicts com product_id, movement_type, quantity, reason...)
+    com um único INSERT; o stock_change vem do tipo quando não é informado"""
+    rows = [
+        dict(row, stock_change=row.get("stock_change", stock_change(row["movement_type"], row["quantity"])))
+        for row in rows
+    ]
+    if rows:
+        await db.execute(insert(StockMovement), rows)
+
+def _stock_as_of(at: Optional[datetime], *filters):
+    """Estoque de cada produto em at (None: estoque atual) a partir do ledger:
+    último snapshot até at mais as movimentações posteriores a ele"""
+    latest = select(
+        StockSnapshot.product_id,
+        func.max(StockSnapshot.taken_at).label("taken_at")
+    ).group_by(StockSnapshot.product_id)
+    if at is not None:
+        latest = latest.filter(StockSnapshot.taken_at <= at)
+    latest = latest.subquery()
+    snapshot = select(StockSnapshot.product_id, StockSnapshot.quantity, StockSnapshot.taken_at).join(
+        latest, and_(latest.c.product_id == StockSnapshot.product_id, latest.c.taken_at == StockSnapshot.taken_at)
+    ).subquery()
+
+    movements = [
+        StockMovement.product_id == Product.id,
+        or_(snapshot.c.taken_at.is_(None), StockMovement.created_at > snapshot.c.taken_at),
+    ]
+    if at is not None:
+        movements.append(StockMovement.created_at <= at)
+    return select(
+        Product.id.label("product_id"),
+        (func.coalesce(snapshot.c.quantity, 0) + func.coalesce(func.sum(StockMovement.stock_change), 0)).label("quantity"),
+        snapshot.c.taken_at.label("snapshot_at"),
+        func.count(StockMovement.id).label("movements_replayed")
+    ).outerjoin(snapshot, snapshot.c.product_id == Product.id).outerjoin(
+        StockMovement, and_(*movements)
+    ).filter(*filters).group_by(Product.id, snapshot.c.quantity, snapshot.c.taken_at)
+
+async def stock_as_of(db: AsyncSession, product_ids, at: datetime):
+    """Linhas (product_id, quantity, snapshot_at, movements_replayed) dos produtos em at"""
+    return (await db.execute(
+        _stock_as_of(at, Product.id.in_(list(product_ids))).order_by(Product.id)
+    )).all()
+
+def take_snapshots(db: Session, now: Optional[datetime] = None) -> int:
+    """Grava o snapshot dos produtos com movimentações desde o último snapshot;
+    retorna quantos snapshots foram gravados"""
+    taken_at = (now or datetime.now()) - SNAPSHOT_DELAY
+    stock = _stock_as_of(taken_at).having(func.count(StockMovement.id) > 0).subquery()
+    result = db.execute(
+        insert(StockSnapshot).from_select(
+            ["product_id", "quantity", "taken_at"],
+            select(stock.c.product_id, stock.c.quantity, literal(taken_at, StockSnapshot.taken_at.type))
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+def check_stock(db: Session, fix: bool = False):
+    """Lista os produtos cujo stock_quantity difere do estoque calculado pelo ledger;
+    com fix=True, grava o valor do ledger"""
+    ledger = _stock_as_of(None).subquery()
+    mismatches = db.execute(
+        select(Product.id.label("product_id"), Product.name, Product.stock_quantity, ledger.c.quantity)
+        .join(ledger, ledger.c.product_id == Product.id)
+        .filter(func.abs(func.coalesce(Product.stock_quantity, 0) - ledger.c.quantity) > STOCK_TOLERANCE)
+        .order_by(Product.id)
+    ).all()
+    if fix and mismatches:
+        db.execute(
+            update(Product),
+            [{"id": row.product_id, "stock_quantity": row.quantity} for row in mismatches]
+        )
+        # Os workers da API recarregam o catálogo com o estoque corrigido
+        db.execute(version_bump(db, catalog_version.name))
+        db.commit()
+    return mismatches
@@ -0,0 +1,181 @@
+"""
+Alertas de estoque baixo mantidos incrementalmente.
+
+Quem altera quantidades (vendas, movimentações, transferências, cadastro de
+produtos e de localizações) chama check_stock_alerts com os produtos
+alterados, na mesma transação: só as quantidades desses produtos são
+comparadas com o mínimo (min_stock no total do produto, min_quantity em cada
+localização), abrindo os alertas que cruzaram o mínimo e resolvendo os que
+voltaram acima dele, sem varrer o estoque inteiro.
+
+Quando algum alerta muda, a versão "stock_alerts" de cache_versions é
+incrementada. Os streams SSE (stock_alert_events) são acordados na hora
+pelos alertas deste worker e, para os dos outros workers, conferem a versão
+a cada cache_version_check_seconds. Cada stream compara os alertas abertos
+com os que já enviou, então sempre chega ao estado atual mesmo que perca uma
+notificação.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, insert, update, null, union_all, case, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import bump_version, read_version
+from .config import settings
+from .database import AsyncSessionLocal
+from .events import SSE_KEEPALIVE_SECONDS, sse_message
+from .models import Location, Product, ProductLocation, StockAlert
+
+ALERTS_VERSION = "stock_alerts"
+
+# Streams SSE abertos neste worker (acordados a cada alteração de alertas)
+_subscribers = set()
+
+def _low_stock(product_ids):
+    """Produtos (total) e localizações no mínimo ou abaixo dele"""
+    products = select(
+        Product.id.label("product_id"),
+        null().label("location_id"),
+        Product.stock_quantity.label("quantity"),
+        Product.min_stock.label("threshold")
+    ).filter(
+        Product.id.in_(product_ids),
+        Product.is_active == True,
+        Product.min_stock > 0,
+        Product.stock_quantity <= Product.min_stock
+    )
+    locations = select(
+        ProductLocation.product_id,
+        ProductLocation.location_id,
+        ProductLocation.quantity,
+        ProductLocation.min_quantity
+    ).join(Product, Product.id == ProductLocation.product_id).filter(
+        ProductLocation.product_id.in_(product_ids),
+        Product.is_active == True,
+        ProductLocation.min_quantity > 0,
+        ProductLocation.quantity <= ProductLocation.min_quantity
+    )
+    return union_all(products, locations)
+
+async def check_stock_alerts(db: AsyncSession, product_ids, now: Optional[datetime] = None) -> bool:
+    """Abre e resolve os alertas dos produtos informados; retorna se algum alerta mudou.
+    Chamar antes do commit e, se mudou, notify_stock_alerts() depois dele"""
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return False
+    low = {(row.product_id, row.location_id): row for row in await db.execute(_low_stock(product_ids))}
+    open_alerts = {
+        (row.product_id, row.location_id): row.id
+        for row in await db.execute(
+            select(StockAlert.id, StockAlert.product_id, StockAlert.location_id)
+            .filter(StockAlert.product_id.in_(product_ids), StockAlert.resolved_at.is_(None))
+        )
+    }
+
+    opened = [
+        {"product_id": product_id, "location_id": location_id, "quantity": row.quantity or 0, "threshold": row.threshold}
+        for (product_id, location_id), row in sorted(low.items(), key=lambda item: (item[0][0], item[0][1] or 0))
+        if (product_id, location_id) not in open_alerts
+    ]
+    resolved = [alert_id for key, alert_id in open_alerts.items() if key not in low]
+    if opened:
+        await db.execute(insert(StockAlert), opened)
+    if resolved:
+        await db.execute(
+            update(StockAlert).where(StockAlert.id.in_(resolved))
+            .values(resolved_at=now or datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+    if opened or resolved:
+        await bump_version(db, ALERTS_VERSION)
+        return True
+    return False
+
+def notify_stock_alerts():
+    """Acorda os streams SSE deste worker; chamar depois do commit"""
+    for event in _subscribers:
+        event.set()
+
+def alerts_query():
+    return select(
+        StockAlert.id,
+        StockAlert.product_id,
+        Product.name.label("product_name"),
+        Product.unit,
+        StockAlert.location_id,
+        Location.name.label("location_name"),
+        StockAlert.quantity,
+        case(
+            (StockAlert.location_id.is_(None), Product.stock_quantity),
+            else_=ProductLocation.quantity
+        ).label("current_quantity"),
+        StockAlert.threshold,
+        StockAlert.opened_at,
+        StockAlert.resolved_at
+    ).join(Product, Product.id == StockAlert.product_id).outerjoin(
+        Location, Location.id == StockAlert.location_id
+    ).outerjoin(ProductLocation, and_(
+        ProductLocation.product_id == StockAlert.product_id,
+        ProductLocation.location_id == StockAlert.location_id
+    ))
+
+def alert_json(row) -> dict:
+    return {
+        "id": row.id,
+        "product_id": row.product_id,
+        "product_name": row.product_name,
+        "unit": row.unit,
+        "location_id": row.location_id,
+        "location_name": row.location_name,
+        "quantity": row.quantity,
+        "current_quantity": row.current_quantity,
+        "threshold": row.threshold,
+        "opened_at": row.opened_at,
+        "resolved_at": row.resolved_at
+    }
+
+async def _read_open_alerts() -> dict:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            alerts_query().filter(StockAlert.resolved_at.is_(None)).order_by(StockAlert.id)
+        )).all()
+    return {row.id: alert_json(row) for row in rows}
+
+async def _read_version() -> int:
+    async with AsyncSessionLocal() as db:
+        return await read_version(db, ALERTS_VERSION)
+
+async def stock_alert_events(request, check_interval: Optional[float] = None):
+    """Stream SSE: os alertas abertos ao conectar (evento snapshot) e depois
+    um evento opened ou resolved por alerta que muda"""
+    check_interval = settings.cache_version_check_seconds if check_interval is None else check_interval
+    wakeup = asyncio.Event()
+    _subscribers.add(wakeup)
+    try:
+        version = await _read_version()
+        sent = await _read_open_alerts()
+        yield sse_message("snapshot", list(sent.values()))
+        idle = 0.0
+        while not await request.is_disconnected():
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=check_interval)
+            except asyncio.TimeoutError:
+                idle += check_interval
+                current = await _read_version()
+                if current == version:
+                    if idle >= SSE_KEEPALIVE_SECONDS:
+                        idle = 0.0
+                        yield ": keepalive\n\n"
+                    continue
+            wakeup.clear()
+            idle = 0.0
+            version = await _read_version()
+            alerts = await _read_open_alerts()
+            for alert_id in sorted(set(sent) - set(alerts)):
+                yield sse_message("resolved", {"id": alert_id, "product_id": sent[alert_id]["product_id"],
+                                        "location_id": sent[alert_id]["location_id"]})
+            for alert_id in sorted(set(alerts) - set(sent)):
+                yield sse_message("opened", alerts[alert_id])
+            sent = alerts
+    finally:
+        _subscribers.discard(wakeup)
@@ -0,0 +1,126 @@
+"""
+Visão geral do estoque por localização (tela do depósito), agregada no banco.
+
+Sem limit, a resposta traz todas as localizações e produtos (o que a tela do
+depósito espera); com limit e products_limit, é paginada por cursor. Cada
+página traz as localizações ativas com os totais calculados em SQL
+(itens, quantidade, itens abaixo do mínimo e valor pelo preço de custo) e os
+primeiros produtos de cada uma, em duas queries. As páginas ficam em cache
+(por worker) até a próxima alteração de estoque nas localizações (versão
+"stock" em cache_versions) ou no cadastro de produtos e fornecedores (versão
+"products"). As vendas baixam apenas o estoque total do produto e não
+invalidam a visão geral.
+"""
+from typing import Optional
+from sqlalchemy import select, func, case, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import TTLCache, VersionStamp
+from .config import settings
+from .models import Location, ProductLocation, Product, Supplier
+
+OVERVIEW_CACHE_SIZE = 256
+
+overview_cache = TTLCache(maxsize=OVERVIEW_CACHE_SIZE, ttl=settings.stock_overview_cache_ttl_seconds)
+stock_version = VersionStamp("stock", overview_cache, settings.cache_version_check_seconds)
+# Nome, unidade, custo e fornecedor dos produtos vêm do cadastro
+overview_catalog_version = VersionStamp("products", overview_cache, settings.cache_version_check_seconds)
+
+def _location_totals(location_type, after_id, limit: Optional[int]):
+    below_min = and_(ProductLocation.min_quantity > 0, ProductLocation.quantity <= ProductLocation.min_quantity)
+    query = select(
+        Location.id,
+        Location.name,
+        Location.location_type,
+        Location.temperature,
+        func.count(ProductLocation.id).label("item_count"),
+        func.coalesce(func.sum(ProductLocation.quantity), 0).label("total_quantity"),
+        func.count(case((below_min, 1))).label("below_min_count"),
+        func.coalesce(func.sum(ProductLocation.quantity * func.coalesce(Product.cost_price, 0)), 0).label("stock_value")
+    ).outerjoin(ProductLocation, ProductLocation.location_id == Location.id).outerjoin(
+        Product, Product.id == ProductLocation.product_id
+    ).filter(Location.is_active == True)
+    if location_type:
+        query = query.filter(Location.location_type == location_type)
+    if after_id is not None:
+        query = query.filter(Location.id > after_id)
+    query = query.group_by(Location.id).order_by(Location.id)
+    return query.limit(limit) if limit is not None else query
+
+def _location_products(location_ids, products_limit: Optional[int]):
+    """Os primeiros products_limit produtos (por nome) de cada localização, em uma query
+    (todos com products_limit None)"""
+    position = func.row_number().over(
+        partition_by=ProductLocation.location_id,
+        order_by=(Product.name, ProductLocation.id)
+    ).label("position")
+    ranked = select(
+        ProductLocation.location_id,
+        Product.id,
+        Product.name,
+        Supplier.name.label("supplier"),
+        ProductLocation.quantity,
+        ProductLocation.min_quantity,
+        ProductLocation.max_quantity,
+        Product.unit,
+        ProductLocation.notes,
+        position
+    ).join(Product, Product.id == ProductLocation.product_id).outerjoin(
+        Supplier, Supplier.id == Product.supplier_id
+    ).filter(ProductLocation.location_id.in_(location_ids)).subquery()
+    query = select(ranked).order_by(ranked.c.location_id, ranked.c.position)
+    return query.filter(ranked.c.position <= products_limit) if products_limit is not None else query
+
+async def stock_overview(db: AsyncSession, location_type=None, after_id=None,
+                         limit: Optional[int] = None, products_limit: Optional[int] = None):
+    """Uma página da visão geral (localizações em ordem de id depois de after_id);
+    sem limit e products_limit, todas as localizações com todos os produtos"""
+    await stock_version.sync(db)
+    await overview_catalog_version.sync(db)
+    key = (location_type, after_id, limit, products_limit)
+    page = overview_cache.get(key)
+    if page is not None:
+        return page
+
+    locations = (await db.execute(_location_totals(location_type, after_id, limit))).all()
+    products = {location.id: [] for location in locations}
+    if locations and (products_limit is None or products_limit > 0):
+        for row in await db.execute(_location_products(list(products), products_limit)):
+            products[row.location_id].append({
+                "id": row.id,
+                "name": row.name,
+                "supplier": row.supplier,
+                "quantity": row.quantity,
+                "min_quantity": row.min_quantity,
+                "max_quantity": row.max_quantity,
+                "unit": row.unit,
+                "notes": row.notes
+            })
+    page = [
+        {
+            "location": {
+                "id": location.id,
+                "name": location.name,
+                "type": location.location_type,
+                "temperature": location.temperature
+            },
+            "totals": {
+                "item_count": location.item_count,
+                "total_quantity": location.total_quantity,
+                "below_min_count": location.below_min_count,
+                "stock_value": round(location.stock_value, 2)
+            },
+            "products": products[location.id]
+        }
+        for location in locations
+    ]
+    overview_cache.set(key, page)
+    return page
+
+async def mark_stock_changed(db: AsyncSession):
+    """Incrementa a versão do estoque por localização na transação atual; chamar antes do commit"""
+    await stock_version.bump(db)
+
+def invalidate_stock_overview():
+    """Descarta a visão geral em cache deste worker; chamar depois do commit"""
+    overview_cache.clear()
+    stock_version.recheck()
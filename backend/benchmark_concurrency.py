@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência: dispara vendas (POST /sales) em paralelo com
+requisições de relatório contra uma API já em execução e mede a latência
+de cada tipo de requisição.
+
+Para comparar antes/depois, rode o mesmo comando contra as duas versões
+da API usando o mesmo banco de dados inicializado com init_db.py:
+
+    python benchmark_concurrency.py --sales 200 --reports 50 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def print_stats(label, latencies, errors, elapsed):
+    if not latencies:
+        print(f"{label}: nenhuma requisição concluída ({errors} erros)")
+        return
+    print(
+        f"{label}: {len(latencies)} ok, {errors} erros, "
+        f"{len(latencies) / elapsed:.1f} req/s, "
+        f"p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"max={max(latencies) * 1000:.1f}ms"
+    )
+
+async def login(client, username, password):
+    response = await client.post("/auth/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        headers = await login(client, args.username, args.password)
+
+        customers = (await client.get("/customers/", headers=headers)).json()
+        products = (await client.get("/products/", headers=headers)).json()
+        if not customers or not products:
+            raise SystemExit("Banco sem clientes/produtos: rode init_db.py antes do benchmark")
+
+        # Repete produtos quando o catálogo tem menos produtos que --items
+        cart = [
+            {"product_id": products[i % len(products)]["id"], "quantity": 0.01}
+            for i in range(args.items)
+        ]
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        results = {"sale": ([], [0]), "report": ([], [0])}
+
+        async def timed(kind, method, path, **kwargs):
+            latencies, errors = results[kind]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, headers=headers, **kwargs)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[0] += 1
+
+        tasks = []
+        for i in range(args.sales):
+            sale = {
+                "payment_method": "fiado" if i % 3 == 0 else "dinheiro",
+                "customer_id": customers[i % len(customers)]["id"],
+                "items": cart,
+            }
+            tasks.append(timed("sale", "POST", "/sales/", json=sale))
+        for _ in range(args.reports):
+            tasks.append(timed("report", "GET", args.report_path))
+
+        # Intercala vendas e relatórios para simular caixas e back office ao mesmo tempo
+        tasks = tasks[::2] + tasks[1::2]
+
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    print(f"Tempo total: {elapsed:.2f}s")
+    print_stats("POST /sales", results["sale"][0], results["sale"][1][0], elapsed)
+    print_stats(f"GET {args.report_path}", results["report"][0], results["report"][1][0], elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="Admin@2024!")
+    parser.add_argument("--sales", type=int, default=200, help="número de vendas a criar")
+    parser.add_argument("--reports", type=int, default=50, help="número de requisições de relatório")
+    parser.add_argument("--items", type=int, default=4, help="itens por venda")
+    parser.add_argument("--concurrency", type=int, default=20, help="requisições simultâneas")
+    parser.add_argument("--report-path", default="/sales/grouped-by-customer")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
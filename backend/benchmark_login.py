@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de "troca de turno": dispara logins (POST /auth/token) em paralelo
+contra uma API já em execução enquanto mede a latência de requisições leves
+(GET /health) feitas ao mesmo tempo. Com o bcrypt no event loop as
+requisições leves esperam atrás dos logins; com o pool dedicado não.
+
+    python benchmark_login.py --logins 40 --pings 200 --concurrency 40
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmark_concurrency import print_stats
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        results = {"login": ([], [0]), "ping": ([], [0])}
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def timed(kind, method, path, **kwargs):
+            latencies, errors = results[kind]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[0] += 1
+
+        async def pings():
+            # Requisições leves espaçadas durante toda a rajada de logins
+            for _ in range(args.pings):
+                await timed("ping", "GET", "/health")
+                await asyncio.sleep(args.ping_interval)
+
+        credentials = {"username": args.username, "password": args.password}
+        tasks = [timed("login", "POST", "/auth/token", data=credentials) for _ in range(args.logins)]
+
+        start = time.perf_counter()
+        await asyncio.gather(pings(), *tasks)
+        elapsed = time.perf_counter() - start
+
+    print(f"Tempo total: {elapsed:.2f}s")
+    print_stats("POST /auth/token", results["login"][0], results["login"][1][0], elapsed)
+    print_stats("GET /health", results["ping"][0], results["ping"][1][0], elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="Admin@2024!")
+    parser.add_argument("--logins", type=int, default=40, help="número de logins simultâneos")
+    parser.add_argument("--pings", type=int, default=200, help="número de GET /health durante os logins")
+    parser.add_argument("--ping-interval", type=float, default=0.01, help="intervalo entre pings (s)")
+    parser.add_argument("--concurrency", type=int, default=40, help="requisições simultâneas")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark de serialização/compressão das respostas grandes.
+
+Cria um banco SQLite temporário com vendas de exemplo e mede, dentro do
+processo (TestClient, sem rede), o tempo e o tamanho de GET /sales e
+GET /accounts-receivable com cada Accept-Encoding:
+
+    python benchmark_serialization.py --sales 2000 --items 10 --limit 1000
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+def seed(SessionLocal, models, get_password_hash, sales, items):
+    db = SessionLocal()
+    admin = models.User(username="admin", email="admin@hortifruti.com", full_name="Admin Geral",
+                        hashed_password=get_password_hash("Admin@2024!"), role="admin", is_active=True)
+    supplier = models.Supplier(name="Fazenda Sol Nascente", cnpj="11.222.333/0001-44")
+    customer = models.Customer(name="João Silva", cpf="111.222.333-44")
+    db.add_all([admin, supplier, customer])
+    db.flush()
+    products = [
+        models.Product(name=f"Produto {i}", price=1 + i, cost_price=i, unit="kg",
+                       stock_quantity=10**6, supplier_id=supplier.id)
+        for i in range(items)
+    ]
+    db.add_all(products)
+    db.flush()
+    for i in range(sales):
+        sale = models.Sale(customer_id=customer.id, seller_id=admin.id, total_amount=items,
+                           payment_method="fiado", status="pending")
+        db.add(sale)
+        db.flush()
+        db.add_all([
+            models.SaleItem(sale_id=sale.id, product_id=product.id, quantity=1,
+                            unit_price=product.price, total_price=product.price)
+            for product in products
+        ])
+        db.add(models.AccountReceivable(sale_id=sale.id, customer_id=customer.id, amount=items,
+                                        due_date=datetime.now(), status="pending"))
+    db.commit()
+    db.close()
+    return "admin"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=2000, help="vendas no banco")
+    parser.add_argument("--items", type=int, default=10, help="itens por venda")
+    parser.add_argument("--limit", type=int, default=1000, help="limit das listagens")
+    parser.add_argument("--repeat", type=int, default=10, help="repetições por medição")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+    from fastapi.testclient import TestClient
+    from app import models
+    from app.auth import create_access_token, get_password_hash
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+
+    Base.metadata.create_all(bind=engine)
+    username = seed(SessionLocal, models, get_password_hash, args.sales, args.items)
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': username})}"}
+
+    with TestClient(app) as client:
+        for path in ("/sales/", "/accounts-receivable/"):
+            for encoding in ("identity", "gzip", "br"):
+                latencies = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    response = client.get(path, params={"limit": args.limit},
+                                          headers={**headers, "Accept-Encoding": encoding})
+                    latencies.append(time.perf_counter() - start)
+                    response.raise_for_status()
+                size = len(response.read()) if encoding == "identity" else int(response.headers.get("content-length", 0))
+                print(f"GET {path} ({encoding}): p50={statistics.median(latencies) * 1000:.1f}ms "
+                      f"max={max(latencies) * 1000:.1f}ms tamanho={size / 1024:.0f}KiB")
+
+if __name__ == "__main__":
+    main()
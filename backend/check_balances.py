@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Script para conferir o saldo devedor mantido de cada cliente (customer_balances)
+contra a soma das contas a receber. Pensado para rodar toda noite pelo cron:
+
+    python check_balances.py          # só lista as diferenças (sai com código 1 se houver)
+    python check_balances.py --fix    # lista e corrige os saldos
+"""
+
+import argparse
+import sys
+from app.database import SessionLocal
+from app.balances import check_balances
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="corrige os saldos divergentes")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        mismatches = check_balances(db, fix=args.fix)
+    finally:
+        db.close()
+
+    for row in mismatches:
+        print(
+            f"Cliente {row.customer_id}: em aberto {row.stored_open_amount} (esperado {row.open_amount}), "
+            f"vencido {row.stored_overdue_amount} (esperado {row.overdue_amount})"
+        )
+    if not mismatches:
+        print("Saldos dos clientes conferidos: nenhuma diferença")
+    elif args.fix:
+        print(f"{len(mismatches)} saldos corrigidos")
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Script para conferir o estoque gravado de cada produto (stock_quantity) contra
+o estoque refeito pelo ledger de movimentações. Pensado para rodar toda noite
+pelo cron, depois do snapshot_stock.py:
+
+    python check_stock.py          # só lista as diferenças (sai com código 1 se houver)
+    python check_stock.py --fix    # lista e grava o estoque do ledger
+"""
+
+import argparse
+import sys
+from app.database import SessionLocal
+from app.stock import check_stock
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="grava o estoque calculado pelo ledger")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        mismatches = check_stock(db, fix=args.fix)
+    finally:
+        db.close()
+
+    for row in mismatches:
+        print(f"Produto {row.product_id} ({row.name}): estoque {row.stock_quantity} (ledger {row.quantity})")
+    if not mismatches:
+        print("Estoque conferido com o ledger: nenhuma diferença")
+    elif args.fix:
+        print(f"{len(mismatches)} produtos corrigidos")
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Configuração dos testes: usa um banco SQLite local (aiosqlite na API,
+sqlite3 nos fixtures) no lugar do PostgreSQL.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="hortifruti_test_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+# Os testes chamam a manutenção de contas vencidas diretamente
+os.environ["OVERDUE_CHECK_INTERVAL_SECONDS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.database import Base, SessionLocal, engine, upgrade_database
+from app.models import User, Supplier, Customer, Product
+from app.auth import get_password_hash, create_access_token, user_cache_version
+from app.catalog import catalog_version
+from app.stock_overview import stock_version, overview_catalog_version
+from app.dashboard import snapshot_cache
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        upgrade_database(connection)
+    user_cache_version.reset()
+    catalog_version.reset()
+    stock_version.reset()
+    overview_catalog_version.reset()
+    snapshot_cache.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def seed(db):
+    """Cria um admin, um vendedor, um fornecedor, dois clientes e três produtos"""
+    admin = User(username="admin", email="admin@hortifruti.com", full_name="Admin Geral",
+                 hashed_password=get_password_hash("Admin@2024!"), role="admin", is_active=True)
+    seller = User(username="vendedor1", email="vendedor1@hortifruti.com", full_name="Vendedor Um",
+                  hashed_password=get_password_hash("Vendedor@123"), role="vendedor", is_active=True)
+    supplier = Supplier(name="Fazenda Sol Nascente", cnpj="11.222.333/0001-44")
+    db.add_all([admin, seller, supplier])
+    db.commit()
+
+    customers = [
+        Customer(name="João Silva", cpf="111.222.333-44"),
+        Customer(name="Maria Oliveira", cpf="444.555.666-77"),
+    ]
+    products = [
+        Product(name="Maçã Gala", price=5.50, cost_price=3.5, unit="kg", stock_quantity=100, supplier_id=supplier.id),
+        Product(name="Banana Prata", price=4.00, cost_price=2.5, unit="kg", stock_quantity=150, supplier_id=supplier.id),
+        Product(name="Alface Crespa", price=2.50, cost_price=1.5, unit="unidade", stock_quantity=200, supplier_id=supplier.id),
+    ]
+    db.add_all(customers + products)
+    db.commit()
+    return {"admin": admin, "seller": seller, "supplier": supplier, "customers": customers, "products": products}
+
+@pytest.fixture
+def client(seed):
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def admin_headers(seed):
+    token = create_access_token(data={"sub": seed["admin"].username})
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture
+def seller_headers(seed):
+    token = create_access_token(data={"sub": seed["seller"].username})
+    return {"Authorization": f"Bearer {token}"}
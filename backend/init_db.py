@@ -5,13 +5,16 @@ Script para inicializar o banco de dados com dados de exemplo
 
 import asyncio
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
-from app.models import Base, User, Supplier, Customer, Product
+from sqlalchemy import text
+from app.database import SessionLocal, engine, upgrade_database
+from app.models import Base, User, Supplier, Customer, Product, StockMovement
 from app.auth import get_password_hash
 
 def init_db():
     Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+        upgrade_database(connection)
     
     db = SessionLocal()
     
@@ -57,6 +60,13 @@ def init_db():
         Product(name="Tomate Italiano", description="Tomate para molhos", price=7.00, unit="kg", stock_quantity=80.0, supplier_id=supplier2.id, cost_price=4.5),
     ]
     db.add_all(products)
+    db.flush()
+    # Estoque inicial registrado no ledger de estoque (app/stock.py)
+    db.add_all([
+        StockMovement(product_id=product.id, user_id=admin_user.id, movement_type="entrada",
+                      quantity=product.stock_quantity, stock_change=product.stock_quantity, reason="Estoque inicial")
+        for product in products
+    ])
 
     # --- Criação de Clientes ---
     customers = [
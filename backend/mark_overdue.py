@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Script para marcar como vencidas (overdue) as contas a receber em aberto
+com vencimento já passado.
+
+A API já faz isso em segundo plano (OVERDUE_CHECK_INTERVAL_SECONDS); o script
+serve para rodar pelo cron com o agendador da API desativado (intervalo 0):
+
+    python mark_overdue.py                 # uma execução
+    python mark_overdue.py --interval 60   # a cada 60 segundos
+"""
+
+import argparse
+import asyncio
+from app.database import async_engine
+from app.overdue import run_overdue_check, stats
+
+async def run(interval):
+    try:
+        while True:
+            await run_overdue_check()
+            print(f"{stats['last_rows_updated']} contas marcadas como vencidas em {stats['last_duration_seconds']:.3f}s")
+            if not interval:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, help="repetir a cada N segundos")
+    args = parser.parse_args()
+    asyncio.run(run(args.interval))
+
+if __name__ == "__main__":
+    main()
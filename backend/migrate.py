@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Script para aplicar as migrations pendentes do banco (alembic upgrade head).
+
+Faz parte do deploy: rode uma vez, antes de subir a API, e não em cada worker.
+Bancos criados antes das migrations são reconhecidos e atualizados:
+
+    python migrate.py
+"""
+
+from app.database import engine, upgrade_database
+
+def main():
+    with engine.begin() as connection:
+        upgrade_database(connection)
+
+    print("Migrations aplicadas com sucesso!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Ambiente das migrations do Alembic.
+
+Pela linha de comando (alembic upgrade head) conecta na DATABASE_URL das
+configurações; na inicialização da API recebe a conexão já aberta em
+config.attributes["connection"] (ver app.database.upgrade_database).
+"""
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from app.config import settings
+from app.models import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    """Gera o SQL das migrations sem conectar no banco (alembic upgrade head --sql)"""
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite não tem ALTER TABLE completo: alterações de coluna recriam a tabela
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+    engine = create_engine(settings.database_url)
+    try:
+        with engine.connect() as connection:
+            do_run_migrations(connection)
+    finally:
+        engine.dispose()
+
+if config.attributes.get("connection") is None and config.config_file_name is not None:
+    # Só configura o logging pela linha de comando (na API o uvicorn já configurou)
+    fileConfig(config.config_file_name)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
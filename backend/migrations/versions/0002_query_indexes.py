@@ -0,0 +1,52 @@
+"""query indexes
+
+Índices das consultas mais frequentes (listagens por vendedor e período,
+itens por venda, contas por cliente/status/vencimento, pagamentos por conta,
+movimentações por produto) e índices parciais sobre os registros ativos.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 02:09:18.042879
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_ONLY = {"postgresql_where": sa.text("is_active"), "sqlite_where": sa.text("is_active = 1")}
+
+INDEXES = [
+    ("ix_sales_seller_id_created_at", "sales", ["seller_id", "created_at"], {}),
+    ("ix_sales_created_at", "sales", ["created_at"], {}),
+    ("ix_sales_customer_id", "sales", ["customer_id"], {}),
+    ("ix_sale_items_sale_id", "sale_items", ["sale_id"], {}),
+    ("ix_sale_items_product_id", "sale_items", ["product_id"], {}),
+    ("ix_accounts_receivable_customer_id_status_due_date", "accounts_receivable", ["customer_id", "status", "due_date"], {}),
+    ("ix_accounts_receivable_status_due_date", "accounts_receivable", ["status", "due_date"], {}),
+    ("ix_accounts_receivable_sale_id", "accounts_receivable", ["sale_id"], {}),
+    ("ix_payments_account_receivable_id_payment_date", "payments", ["account_receivable_id", "payment_date"], {}),
+    ("ix_stock_movements_product_id_created_at", "stock_movements", ["product_id", "created_at"], {}),
+    ("ix_customers_active_id", "customers", ["id"], ACTIVE_ONLY),
+    ("ix_suppliers_active_id", "suppliers", ["id"], ACTIVE_ONLY),
+    ("ix_locations_active_id", "locations", ["id"], ACTIVE_ONLY),
+    ("ix_supplier_boxes_active_created_at", "supplier_boxes", ["created_at"], ACTIVE_ONLY),
+]
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: bancos criados com create_all já podem ter parte dos índices
+    for name, table, columns, options in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True, **options)
+
+
+def downgrade() -> None:
+    for name, table, columns, options in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
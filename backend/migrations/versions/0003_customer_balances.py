@@ -0,0 +1,58 @@
+"""customer balances
+
+Saldo devedor de cada cliente (customer_balances), preenchido a partir das
+contas a receber existentes, e limite de crédito opcional dos clientes.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 02:41:27.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+INSERT INTO customer_balances (customer_id, open_amount, overdue_amount, last_payment_at)
+SELECT
+    a.customer_id,
+    SUM(a.amount - COALESCE(a.paid_amount, 0)),
+    SUM(CASE WHEN a.status = 'overdue' THEN a.amount - COALESCE(a.paid_amount, 0) ELSE 0 END),
+    (SELECT MAX(p.payment_date) FROM payments p
+     JOIN accounts_receivable pa ON pa.id = p.account_receivable_id
+     WHERE pa.customer_id = a.customer_id)
+FROM accounts_receivable a
+WHERE a.status IN ('pending', 'partial', 'overdue')
+GROUP BY a.customer_id
+"""
+
+
+def upgrade() -> None:
+    op.create_table('customer_balances',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('open_amount', sa.Float(), nullable=False),
+    sa.Column('overdue_amount', sa.Float(), nullable=False),
+    sa.Column('last_payment_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['customers.id'], ),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('credit_limit', sa.Float(), nullable=True))
+
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_column('credit_limit')
+
+    op.drop_table('customer_balances')
@@ -0,0 +1,72 @@
+"""stock ledger
+
+Efeito assinado de cada movimentação no estoque (stock_change), venda que
+originou a movimentação e snapshots periódicos do estoque (stock_snapshots).
+As movimentações existentes recebem o stock_change pelo tipo, e cada produto
+cujo estoque não bate com o histórico recebe um ajuste de saldo inicial
+(as vendas antigas não geravam movimentação).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 03:12:40.118352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHANGES = """
+UPDATE stock_movements SET stock_change = CASE movement_type
+    WHEN 'entrada' THEN quantity
+    WHEN 'saída' THEN -quantity
+    ELSE 0
+END
+"""
+
+OPENING_BALANCES = """
+INSERT INTO stock_movements (product_id, movement_type, quantity, stock_change, reason)
+SELECT p.id, 'ajuste', ABS(COALESCE(p.stock_quantity, 0) - COALESCE(m.total, 0)),
+       COALESCE(p.stock_quantity, 0) - COALESCE(m.total, 0), 'Saldo inicial do ledger de estoque'
+FROM products p
+LEFT JOIN (SELECT product_id, SUM(stock_change) AS total FROM stock_movements GROUP BY product_id) m
+    ON m.product_id = p.id
+WHERE COALESCE(p.stock_quantity, 0) <> COALESCE(m.total, 0)
+"""
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stock_change', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('sale_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_stock_movements_sale_id', 'sales', ['sale_id'], ['id'])
+
+    op.create_table('stock_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_snapshots_product_id_taken_at', 'stock_snapshots', ['product_id', 'taken_at'], unique=True)
+
+    op.execute(BACKFILL_CHANGES)
+    op.execute(OPENING_BALANCES)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_snapshots_product_id_taken_at', table_name='stock_snapshots')
+    op.drop_table('stock_snapshots')
+
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_stock_movements_sale_id', type_='foreignkey')
+        batch_op.drop_column('sale_id')
+        batch_op.drop_column('stock_change')
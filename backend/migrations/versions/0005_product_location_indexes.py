@@ -0,0 +1,31 @@
+"""product location indexes
+
+Índices de product_locations por localização (visão geral do estoque) e por
+produto e localização (transferências).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 03:58:06.274419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_product_locations_location_id', 'product_locations', ['location_id'], unique=False)
+    op.create_index('ix_product_locations_product_id_location_id', 'product_locations', ['product_id', 'location_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_locations_product_id_location_id', table_name='product_locations')
+    op.drop_index('ix_product_locations_location_id', table_name='product_locations')
@@ -0,0 +1,57 @@
+"""stock alerts
+
+Alertas de estoque baixo (stock_alerts), abertos e resolvidos conforme as
+quantidades cruzam o mínimo. Já abre os alertas dos produtos e localizações
+que estão no mínimo ou abaixo dele.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 04:31:52.603187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_ONLY = {"postgresql_where": sa.text("resolved_at IS NULL"), "sqlite_where": sa.text("resolved_at IS NULL")}
+
+BACKFILL = """
+INSERT INTO stock_alerts (product_id, location_id, quantity, threshold)
+SELECT id, NULL, COALESCE(stock_quantity, 0), min_stock FROM products
+WHERE is_active = TRUE AND min_stock > 0 AND COALESCE(stock_quantity, 0) <= min_stock
+UNION ALL
+SELECT pl.product_id, pl.location_id, COALESCE(pl.quantity, 0), pl.min_quantity FROM product_locations pl
+JOIN products p ON p.id = pl.product_id
+WHERE p.is_active = TRUE AND pl.min_quantity > 0 AND COALESCE(pl.quantity, 0) <= pl.min_quantity
+"""
+
+
+def upgrade() -> None:
+    op.create_table('stock_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('location_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Float(), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=False),
+    sa.Column('opened_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_alerts_open_product_id', 'stock_alerts', ['product_id'], unique=False, **OPEN_ONLY)
+
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_alerts_open_product_id', table_name='stock_alerts')
+    op.drop_table('stock_alerts')
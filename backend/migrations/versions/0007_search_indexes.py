@@ -0,0 +1,65 @@
+"""search indexes
+
+Extensões (pg_trgm, unaccent), a função search_normalize e os índices da
+busca do autocomplete (app/search.py), só no PostgreSQL; no SQLite a busca
+usa um índice em memória. Antes eram criados pela API em toda inicialização.
+Os comandos são idempotentes: bancos que já têm os índices não mudam. Criar
+as extensões exige superusuário (ou o dono do banco com extensões confiáveis);
+se o DBA já as criou, a migration não precisa dessas permissões.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 09:12:40.518327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() não é IMMUTABLE e por isso não pode ser usada em índice de expressão
+    "CREATE OR REPLACE FUNCTION search_normalize(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent'::regdictionary, lower($1)) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+    "CREATE INDEX IF NOT EXISTS ix_customers_name_search ON customers "
+    "USING gin (search_normalize(name) gin_trgm_ops) WHERE is_active",
+    "CREATE INDEX IF NOT EXISTS ix_customers_cpf_digits ON customers "
+    "(regexp_replace(cpf, '[^0-9]', '', 'g') text_pattern_ops) WHERE is_active",
+    "CREATE INDEX IF NOT EXISTS ix_products_name_search ON products "
+    "USING gin (search_normalize(name) gin_trgm_ops) WHERE is_active",
+    "CREATE INDEX IF NOT EXISTS ix_products_category_search ON products "
+    "USING gin (search_normalize(category) gin_trgm_ops) WHERE is_active",
+]
+
+SEARCH_INDEXES = [
+    "ix_customers_name_search",
+    "ix_customers_cpf_digits",
+    "ix_products_name_search",
+    "ix_products_category_search",
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for statement in SEARCH_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for index in SEARCH_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+    # As extensões ficam: podem ser usadas por outros objetos do banco
+    op.execute("DROP FUNCTION IF EXISTS search_normalize(text)")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular as tabelas de rollup de vendas (backfill).
+
+Sem argumentos recalcula todo o histórico; com --start/--end recalcula
+apenas os dias do intervalo (inclusive):
+
+    python rebuild_rollups.py --start 2024-01-01 --end 2024-01-31
+"""
+
+import argparse
+from datetime import date
+from app.database import SessionLocal, engine, upgrade_database
+from app.rollups import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="último dia (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    # Cria as tabelas de rollup em bancos que ainda não as têm
+    with engine.begin() as connection:
+        upgrade_database(connection)
+
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, args.start, args.end)
+    finally:
+        db.close()
+
+    print("Rollups de vendas recalculados com sucesso!")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 import uvicorn
 from app.main import app
+from migrate import main as migrate
 
 if __name__ == "__main__":
+    # Em desenvolvimento há um só processo: aplica as migrations antes de subir
+    migrate()
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
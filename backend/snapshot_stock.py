@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Script para gravar o snapshot do estoque dos produtos que tiveram
+movimentações desde o último snapshot. As consultas de estoque em uma data
+partem do snapshot mais recente, então basta rodar pelo cron (por exemplo,
+uma vez por dia):
+
+    python snapshot_stock.py
+"""
+
+import argparse
+from app.database import SessionLocal
+from app.stock import take_snapshots
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = take_snapshots(db)
+    finally:
+        db.close()
+
+    print(f"{count} snapshots de estoque gravados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app.database import async_engine
+from app.models import Sale, AccountReceivable, Payment
+from app.overdue import run_overdue_check, stats as overdue_stats
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+def _create_accounts(db, seed, count, payments_per_account=2):
+    accounts = []
+    for i in range(count):
+        sale = Sale(customer_id=seed["customers"][i % 2].id, seller_id=seed["admin"].id,
+                    total_amount=100, payment_method="fiado", status="pending")
+        db.add(sale)
+        db.flush()
+        account = AccountReceivable(sale_id=sale.id, customer_id=sale.customer_id, amount=100,
+                                    paid_amount=10 * payments_per_account,
+                                    due_date=datetime.now() + timedelta(days=i), status="partial")
+        db.add(account)
+        db.flush()
+        for _ in range(payments_per_account):
+            db.add(Payment(account_receivable_id=account.id, amount=10, payment_method="pix",
+                           created_by=seed["admin"].id))
+        accounts.append(account)
+    db.commit()
+    return accounts
+
+def test_accounts_receivable_listing_includes_payments(client, db, seed, admin_headers):
+    _create_accounts(db, seed, 3)
+
+    accounts = client.get("/accounts-receivable/", headers=admin_headers).json()
+    assert len(accounts) == 3
+    assert all(len(account["payments"]) == 2 for account in accounts)
+    assert accounts[0]["payments"][0]["user"]["full_name"] == "Admin Geral"
+    assert accounts[0]["sale"]["payment_method"] == "fiado"
+    assert accounts[0]["customer"]["name"] == "João Silva"
+
+def test_accounts_receivable_listing_uses_constant_number_of_queries(client, db, seed, admin_headers):
+    _create_accounts(db, seed, 40)
+    # Aquece o cache de usuários para que as duas medições façam as mesmas queries
+    client.get("/auth/me", headers=admin_headers)
+
+    counts = []
+    for limit in (5, 40):
+        with count_statements() as statements:
+            response = client.get("/accounts-receivable/", headers=admin_headers, params={"limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+
+def test_overdue_check_marks_only_open_past_due_accounts(client, db, seed, admin_headers):
+    accounts = _create_accounts(db, seed, 4, payments_per_account=0)
+    due_dates = [timedelta(days=-10), timedelta(days=-1), timedelta(days=-1), timedelta(days=5)]
+    statuses = ["pending", "partial", "paid", "pending"]
+    for account, delta, status in zip(accounts, due_dates, statuses):
+        account.due_date = datetime.now() + delta
+        account.status = status
+    db.commit()
+
+    assert asyncio.run(run_overdue_check()) == 2
+    assert overdue_stats["last_rows_updated"] == 2
+    assert asyncio.run(run_overdue_check()) == 0
+
+    db.expire_all()
+    assert [account.status for account in accounts] == ["overdue", "overdue", "paid", "pending"]
+    summary = client.get("/accounts-receivable/summary/overdue", headers=admin_headers).json()
+    assert summary["overdue_count"] == 2
+    assert summary["total_overdue_amount"] == 200
+
+def test_overdue_summary_is_aggregated_and_paginated(client, db, seed, admin_headers, seller_headers):
+    accounts = _create_accounts(db, seed, 5, payments_per_account=1)
+    for days, account in zip([30, 10, 20, 5, 1], accounts):
+        account.due_date = datetime.now() - timedelta(days=days)
+        account.status = "overdue"
+    db.commit()
+
+    response = client.get("/accounts-receivable/summary/overdue", headers=admin_headers, params={"limit": 3})
+    summary = response.json()
+    assert summary["overdue_count"] == 5
+    assert summary["total_overdue_amount"] == 5 * 90
+    assert [(customer["customer_name"], customer["accounts_count"], customer["remaining"])
+            for customer in summary["customers"]] == [("João Silva", 3, 270), ("Maria Oliveira", 2, 180)]
+    assert [account["days_overdue"] for account in summary["accounts"]] == [30, 20, 10]
+    assert summary["accounts"][0]["customer_name"] == "João Silva"
+
+    next_page = client.get("/accounts-receivable/summary/overdue", headers=admin_headers,
+                           params={"limit": 3, "cursor": response.headers["X-Next-Cursor"]}).json()
+    assert [account["days_overdue"] for account in next_page["accounts"]] == [5, 1]
+
+    # As vendas foram feitas pelo admin: o vendedor não vê nenhuma conta
+    seller_summary = client.get("/accounts-receivable/summary/overdue", headers=seller_headers).json()
+    assert seller_summary["overdue_count"] == 0
+    assert seller_summary["total_overdue_amount"] == 0
+    assert seller_summary["customers"] == []
+
+def _open_accounts(db, seed, amounts):
+    accounts = []
+    for days, amount in enumerate(amounts):
+        sale = Sale(customer_id=seed["customers"][0].id, seller_id=seed["admin"].id,
+                    total_amount=amount, payment_method="fiado", status="pending")
+        db.add(sale)
+        db.flush()
+        accounts.append(AccountReceivable(sale_id=sale.id, customer_id=sale.customer_id, amount=amount, paid_amount=0,
+                                          due_date=datetime.now() + timedelta(days=days + 1), status="pending"))
+    db.add_all(accounts)
+    db.commit()
+    return accounts
+
+def test_customer_payment_is_allocated_fifo(client, db, seed, admin_headers):
+    accounts = _open_accounts(db, seed, [30, 50, 40])
+    customer_id = seed["customers"][0].id
+
+    response = client.post(f"/accounts-receivable/customer/{customer_id}/payments", headers=admin_headers,
+                           json={"amount": 60, "payment_method": "pix"})
+    assert response.status_code == 201
+    assert response.json()["amount"] == 30
+
+    db.expire_all()
+    assert [(account.paid_amount, account.status) for account in accounts] == [(30, "paid"), (30, "partial"), (0, "pending")]
+    assert db.get(Sale, accounts[0].sale_id).status == "completed"
+    assert db.get(Sale, accounts[1].sale_id).status == "pending"
+
+    response = client.post(f"/accounts-receivable/customer/{customer_id}/payments", headers=admin_headers,
+                           json={"amount": 61, "payment_method": "pix"})
+    assert response.status_code == 400
+
+def test_concurrent_payments_never_over_allocate(client, db, seed, admin_headers):
+    accounts = _open_accounts(db, seed, [50, 50])
+    customer_id = seed["customers"][0].id
+
+    def pay(path):
+        return client.post(path, headers=admin_headers, json={"amount": 30, "payment_method": "dinheiro"}).status_code
+
+    paths = [f"/accounts-receivable/customer/{customer_id}/payments"] * 6 + [f"/accounts-receivable/{accounts[1].id}/payments"] * 4
+    with ThreadPoolExecutor(max_workers=len(paths)) as executor:
+        statuses = list(executor.map(pay, paths))
+
+    assert set(statuses) <= {201, 400, 409}
+    db.expire_all()
+    payments = db.query(Payment).all()
+    assert sum(account.paid_amount for account in accounts) == sum(payment.amount for payment in payments)
+    assert sum(payment.amount for payment in payments) == 30 * statuses.count(201)
+    assert all(account.paid_amount <= account.amount for account in accounts)
@@ -0,0 +1,54 @@
+from passlib.context import CryptContext
+from app.auth import user_cache_version
+from app.config import settings
+from app.models import User, CacheVersion
+from test_accounts_receivable import count_statements
+
+def test_authenticated_requests_reuse_cached_user(client, seed, admin_headers):
+    client.get("/auth/me", headers=admin_headers)
+
+    with count_statements() as statements:
+        response = client.get("/auth/me", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "admin"
+    assert not any("FROM users" in statement for statement in statements)
+
+def test_user_changes_invalidate_cached_user(client, seed, admin_headers, seller_headers):
+    assert client.get("/auth/me", headers=seller_headers).json()["full_name"] == "Vendedor Um"
+
+    response = client.put(f"/users/{seed['seller'].id}", headers=admin_headers, json={"full_name": "Vendedor 1"})
+    assert response.status_code == 200
+    assert client.get("/auth/me", headers=seller_headers).json()["full_name"] == "Vendedor 1"
+
+    assert client.delete(f"/users/{seed['seller'].id}", headers=admin_headers).status_code == 204
+    assert client.get("/auth/me", headers=seller_headers).status_code == 400
+
+def test_version_stamp_invalidates_cache_changed_by_other_worker(client, db, seed, seller_headers, monkeypatch):
+    monkeypatch.setattr(user_cache_version, "check_interval", 0)
+    assert client.get("/auth/me", headers=seller_headers).status_code == 200
+
+    # Outro worker desativa o vendedor e incrementa a versão do cache de usuários
+    db.query(User).filter(User.id == seed["seller"].id).update({"is_active": False})
+    db.add(CacheVersion(name="users", version=1))
+    db.commit()
+
+    assert client.get("/auth/me", headers=seller_headers).status_code == 400
+
+def test_login_rehashes_password_when_work_factor_changes(client, db, seed):
+    seller = seed["seller"]
+    seller.hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("Vendedor@123")
+    db.commit()
+
+    response = client.post("/auth/token", data={"username": "vendedor1", "password": "Vendedor@123"})
+    assert response.status_code == 200
+    db.refresh(seller)
+    assert seller.hashed_password.startswith(f"$2b${settings.bcrypt_rounds:02d}$")
+
+    response = client.post("/auth/token", data={"username": "vendedor1", "password": "errada"})
+    assert response.status_code == 401
+
+def test_login_is_rejected_when_password_pool_is_saturated(client, seed, monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+    response = client.post("/auth/token", data={"username": "admin", "password": "Admin@2024!"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime, timedelta
+from app.balances import check_balances
+from app.models import AccountReceivable, CustomerBalance
+from app.overdue import run_overdue_check
+
+def _fiado(client, headers, seed, quantity, customer=0):
+    return client.post("/sales/", headers=headers, json={
+        "payment_method": "fiado",
+        "customer_id": seed["customers"][customer].id,
+        "items": [{"product_id": seed["products"][0].id, "quantity": quantity}],
+    })
+
+def _balance(client, headers, seed, customer=0):
+    return client.get(f"/accounts-receivable/customer/{seed['customers'][customer].id}/balance", headers=headers).json()
+
+def test_balance_follows_sales_payments_and_overdue(client, db, seed, admin_headers):
+    customer_id = seed["customers"][0].id
+    assert _balance(client, admin_headers, seed)["open_amount"] == 0
+
+    _fiado(client, admin_headers, seed, 2)
+    _fiado(client, admin_headers, seed, 4)
+    assert _balance(client, admin_headers, seed)["open_amount"] == 33
+
+    response = client.post(f"/accounts-receivable/customer/{customer_id}/payments", headers=admin_headers,
+                           json={"amount": 15, "payment_method": "pix"})
+    assert response.status_code == 201
+    balance = _balance(client, admin_headers, seed)
+    assert balance["open_amount"] == 18
+    assert balance["last_payment_at"] is not None
+
+    account = db.query(AccountReceivable).filter(AccountReceivable.paid_amount == 4).one()
+    account.due_date = datetime.now() - timedelta(days=3)
+    db.commit()
+    asyncio.run(run_overdue_check())
+    assert _balance(client, admin_headers, seed)["overdue_amount"] == 18
+
+    response = client.post(f"/accounts-receivable/{account.id}/payments", headers=admin_headers,
+                           json={"amount": 8, "payment_method": "dinheiro"})
+    assert response.status_code == 201
+    balance = _balance(client, admin_headers, seed)
+    assert (balance["open_amount"], balance["overdue_amount"]) == (10, 10)
+
+    db.expire_all()
+    assert check_balances(db) == []
+
+def test_credit_limit_is_enforced_at_checkout(client, db, seed, admin_headers):
+    customer_id = seed["customers"][0].id
+    client.put(f"/customers/{customer_id}", headers=admin_headers, json={"credit_limit": 20})
+
+    assert _fiado(client, admin_headers, seed, 2).status_code == 201
+    response = _fiado(client, admin_headers, seed, 2)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Credit limit exceeded"
+    assert _balance(client, admin_headers, seed)["available_credit"] == 9
+
+    # Outros clientes e vendas à vista não são afetados
+    assert _fiado(client, admin_headers, seed, 10, customer=1).status_code == 201
+    batch = client.post("/sales/batch", headers=admin_headers, json={"sales": [
+        {"payment_method": "fiado", "customer_id": customer_id, "items": [{"product_id": seed["products"][1].id, "quantity": 2}]},
+        {"payment_method": "fiado", "customer_id": customer_id, "items": [{"product_id": seed["products"][1].id, "quantity": 1}]},
+        {"payment_method": "pix", "customer_id": customer_id, "items": [{"product_id": seed["products"][1].id, "quantity": 5}]},
+    ]}).json()
+    assert [result["status"] for result in batch["results"]] == ["accepted", "rejected", "accepted"]
+    assert batch["results"][1]["reason"] == "Credit limit exceeded"
+    assert _balance(client, admin_headers, seed)["open_amount"] == 19
+
+def test_concurrent_first_fiado_sales_never_exceed_the_credit_limit(client, db, seed, admin_headers):
+    from concurrent.futures import ThreadPoolExecutor
+    # Cliente sem saldo gravado: a primeira venda fiado é a que cria a linha
+    customer_id = seed["customers"][0].id
+    client.put(f"/customers/{customer_id}", headers=admin_headers, json={"credit_limit": 20})
+    assert db.get(CustomerBalance, customer_id) is None
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        statuses = list(executor.map(lambda _: _fiado(client, admin_headers, seed, 2).status_code, range(6)))
+
+    assert statuses.count(201) == 1
+    assert set(statuses) == {201, 400}
+    assert _balance(client, admin_headers, seed)["open_amount"] == 11
+
+def test_check_balances_finds_and_fixes_drift(client, db, seed, admin_headers):
+    _fiado(client, admin_headers, seed, 2)
+    balance = db.get(CustomerBalance, seed["customers"][0].id)
+    balance.open_amount = 100
+    db.commit()
+
+    mismatches = check_balances(db, fix=True)
+    assert [(row.customer_id, row.open_amount, row.stored_open_amount) for row in mismatches] == [(seed["customers"][0].id, 11, 100)]
+    db.expire_all()
+    assert db.get(CustomerBalance, seed["customers"][0].id).open_amount == 11
+    assert check_balances(db) == []
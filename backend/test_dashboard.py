@@ -0,0 +1,133 @@
+import asyncio
+import orjson
+from sqlalchemy import event, select
+from app.database import AsyncSessionLocal, async_engine
+from app.dashboard import dashboard_events
+from app.events import EventBus
+from app.routers.dashboard import stream_dashboard
+
+class _ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+def _parse(message):
+    event, data = message.strip().split("\n")
+    return event.removeprefix("event: "), orjson.loads(data.removeprefix("data: "))
+
+def test_dashboard_stream_pushes_sales_and_stock_after_the_snapshot(client, seed, admin_headers):
+    apple = seed["products"][0]
+
+    def sell():
+        return client.post("/sales/", headers=admin_headers, json={
+            "payment_method": "dinheiro", "customer_id": seed["customers"][0].id,
+            "items": [{"product_id": apple.id, "quantity": 3}],
+        }).json()
+
+    async def scenario():
+        events = dashboard_events(_ConnectedRequest(), seed["admin"])
+        try:
+            event, snapshot = _parse(await anext(events))
+            assert event == "snapshot"
+            assert snapshot["daily_summary"]["total_count"] == 0
+            assert snapshot["overdue"] == {"overdue_count": 0, "total_overdue_amount": 0}
+
+            sale = await asyncio.to_thread(sell)
+            event, data = _parse(await asyncio.wait_for(anext(events), timeout=5))
+            assert event == "sale_created"
+            assert [(s["id"], s["total_amount"], s["status"]) for s in data["sales"]] == [(sale["id"], 16.5, "completed")]
+            event, data = _parse(await asyncio.wait_for(anext(events), timeout=5))
+            assert (event, data) == ("stock_changed", {"products": [{"id": apple.id, "stock_quantity": 97}]})
+        finally:
+            await events.aclose()
+
+    asyncio.run(scenario())
+    # Um snapshot novo já inclui a venda
+    async def reconnect():
+        events = dashboard_events(_ConnectedRequest(), seed["seller"])
+        try:
+            return _parse(await anext(events))
+        finally:
+            await events.aclose()
+    event, snapshot = asyncio.run(reconnect())
+    # O vendedor não vê a venda do admin nem as contas vencidas
+    assert (snapshot["daily_summary"]["total_count"], snapshot["overdue"]) == (0, None)
+
+def test_seller_stream_only_carries_own_sales_and_no_payments(client, seed, admin_headers, seller_headers):
+    apple = seed["products"][0]
+    customer = seed["customers"][0].id
+
+    def sell(headers, payment_method):
+        return client.post("/sales/", headers=headers, json={
+            "payment_method": payment_method, "customer_id": customer,
+            "items": [{"product_id": apple.id, "quantity": 1}],
+        }).json()
+
+    def activity():
+        sell(admin_headers, "dinheiro")
+        own = sell(seller_headers, "fiado")
+        account = client.get("/accounts-receivable/", headers=admin_headers).json()[0]
+        paid = client.post(f"/accounts-receivable/{account['id']}/payments", headers=admin_headers,
+                           json={"amount": 2, "payment_method": "dinheiro"})
+        assert paid.status_code == 201
+        return own
+
+    async def scenario():
+        events = dashboard_events(_ConnectedRequest(), seed["seller"], resync_interval=0.5)
+        try:
+            assert _parse(await anext(events))[0] == "snapshot"
+            own = await asyncio.to_thread(activity)
+            received = []
+            # Os eventos já publicados saem antes do próximo snapshot
+            while True:
+                event, data = _parse(await asyncio.wait_for(anext(events), timeout=5))
+                if event == "snapshot":
+                    return own, received, data
+                received.append((event, data))
+        finally:
+            await events.aclose()
+
+    own, received, snapshot = asyncio.run(scenario())
+    assert [event for event, _ in received] == ["stock_changed", "sale_created", "stock_changed"]
+    assert [sale["id"] for sale in received[1][1]["sales"]] == [own["id"]]
+    assert snapshot["daily_summary"]["total_count"] == 1
+
+def test_slow_subscriber_is_dropped_without_blocking_the_publisher():
+    bus = EventBus(queue_size=1)
+
+    async def scenario():
+        slow = bus.subscribe()
+        fast = bus.subscribe()
+        bus.publish("stock_changed", {"products": []})
+        assert await fast.get(timeout=1) == ("stock_changed", {"products": []})
+        bus.publish("sale_created", {"sales": []})
+        return slow, fast
+
+    slow, fast = asyncio.run(scenario())
+    assert (slow.dropped, fast.dropped) == (True, False)
+    assert (bus.subscribers, bus.dropped_subscribers, bus.published) == (1, 1, 2)
+
+def test_open_stream_does_not_hold_the_request_connection(client, seed):
+    checked_out = []
+    # O SQLite dos testes usa NullPool (sem checkedout()): conta pelos eventos do pool
+    on_checkout = lambda *args: checked_out.append(1)
+    on_checkin = lambda *args: checked_out.pop()
+    event.listen(async_engine.sync_engine, "checkout", on_checkout)
+    event.listen(async_engine.sync_engine, "checkin", on_checkin)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            # Transação aberta pela autenticação na sessão da requisição
+            await db.scalar(select(1))
+            assert len(checked_out) == 1
+            response = await stream_dashboard(_ConnectedRequest(), db, seed["seller"])
+            try:
+                assert len(checked_out) == 0
+                assert response.media_type == "text/event-stream"
+            finally:
+                await response.body_iterator.aclose()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        event.remove(async_engine.sync_engine, "checkout", on_checkout)
+        event.remove(async_engine.sync_engine, "checkin", on_checkin)
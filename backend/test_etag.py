@@ -0,0 +1,63 @@
+import pytest
+
+@pytest.mark.parametrize("path", ["/customers/", "/suppliers/", "/locations/", "/supplier-boxes/", "/products/"])
+def test_list_endpoints_answer_304_when_unchanged(client, seed, admin_headers, path):
+    first = client.get(path, headers=admin_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get(path, headers={**admin_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    # Outra página/filtro tem outro ETag
+    other = client.get(path, headers={**admin_headers, "If-None-Match": etag}, params={"limit": 1})
+    assert other.status_code == 200
+
+def test_etag_changes_when_rows_change(client, seed, admin_headers):
+    customer = seed["customers"][0]
+    listing = client.get("/customers/", headers=admin_headers).headers["etag"]
+    detail = client.get(f"/customers/{customer.id}", headers=admin_headers).headers["etag"]
+
+    response = client.put(f"/customers/{customer.id}", headers=admin_headers, json={"phone": "11911112222"})
+    assert response.status_code == 200
+
+    changed = client.get("/customers/", headers={**admin_headers, "If-None-Match": listing})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != listing
+    changed = client.get(f"/customers/{customer.id}", headers={**admin_headers, "If-None-Match": detail})
+    assert changed.status_code == 200
+    assert changed.json()["phone"] == "11911112222"
+
+    created = client.post("/customers/", headers=admin_headers, json={"name": "Novo Cliente", "cpf": "555.666.777-88"})
+    assert created.status_code == 200
+    latest = client.get("/customers/", headers={**admin_headers, "If-None-Match": listing})
+    assert latest.status_code == 200
+    assert len(latest.json()) == 3
+
+def test_product_etag_changes_after_sale(client, seed, admin_headers):
+    apple = seed["products"][0]
+    etag = client.get(f"/products/{apple.id}", headers=admin_headers).headers["etag"]
+    client.post("/sales/", headers=admin_headers, json={
+        "payment_method": "dinheiro", "customer_id": seed["customers"][0].id,
+        "items": [{"product_id": apple.id, "quantity": 1}],
+    })
+    response = client.get(f"/products/{apple.id}", headers={**admin_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["stock_quantity"] == 99
+
+def test_product_etag_does_not_depend_on_the_worker(client, seed, admin_headers):
+    from app.catalog import ProductCatalog, catalog_version, product_catalog
+    path = f"/products/{seed['products'][0].id}"
+
+    def new_worker():
+        ProductCatalog.__init__(product_catalog, product_catalog.ttl)
+        catalog_version.reset()
+
+    new_worker()
+    etag = client.get(path, headers=admin_headers).headers["etag"]
+    # Outro worker (ou o mesmo reiniciado) carrega a mesma versão do catálogo
+    new_worker()
+    response = client.get(path, headers={**admin_headers, "If-None-Match": etag})
+    assert response.status_code == 304
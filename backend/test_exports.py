@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from datetime import datetime
+from app.models import Sale, StockMovement
+
+def _sale(client, headers, seed, payment_method="pix"):
+    response = client.post("/sales/", headers=headers, json={
+        "payment_method": payment_method,
+        "customer_id": seed["customers"][0].id,
+        "items": [{"product_id": seed["products"][0].id, "quantity": 2}, {"product_id": seed["products"][1].id, "quantity": 1}],
+    })
+    assert response.status_code == 201
+    return response.json()
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+def test_export_sales_csv(client, seed, admin_headers):
+    sale = _sale(client, admin_headers, seed)
+    response = client.get("/exports/sales", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="vendas.csv"'
+    rows = _csv(response)
+    assert len(rows) == 1
+    assert rows[0]["id"] == str(sale["id"])
+    assert rows[0]["customer_name"] == "João Silva"
+    assert rows[0]["seller_name"] == "Admin Geral"
+    assert float(rows[0]["total_amount"]) == 15.0
+
+    items = _csv(client.get("/exports/sales?items=true", headers=admin_headers))
+    assert [row["product_name"] for row in items] == ["Maçã Gala", "Banana Prata"]
+    assert [float(row["total_price"]) for row in items] == [11.0, 4.0]
+
+def test_export_sales_ndjson_filters_by_date_and_seller(client, seed, db, admin_headers, seller_headers):
+    old = _sale(client, seller_headers, seed)
+    recent = _sale(client, seller_headers, seed)
+    _sale(client, admin_headers, seed)
+    db.get(Sale, old["id"]).created_at = datetime(2024, 3, 9, 23, 59, 59)
+    db.get(Sale, recent["id"]).created_at = datetime(2024, 3, 10, 18, 30)
+    db.commit()
+
+    response = client.get("/exports/sales?format=ndjson&end_date=2024-03-10", headers=seller_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [old["id"], recent["id"]]
+
+    response = client.get("/exports/sales?format=ndjson&start_date=2024-03-10&end_date=2024-03-10", headers=admin_headers)
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [recent["id"]]
+
+    assert client.get("/exports/sales?start_date=2024-03-11&end_date=2024-03-10", headers=admin_headers).status_code == 400
+    assert client.get("/exports/sales?format=xml", headers=admin_headers).status_code == 422
+
+def test_export_accounts_receivable(client, seed, admin_headers, seller_headers):
+    sale = _sale(client, seller_headers, seed, payment_method="fiado")
+    _sale(client, admin_headers, seed, payment_method="fiado")
+
+    rows = _csv(client.get("/exports/accounts-receivable", headers=seller_headers))
+    assert [row["sale_id"] for row in rows] == [str(sale["id"])]
+    assert float(rows[0]["remaining"]) == 15.0
+    assert len(_csv(client.get("/exports/accounts-receivable", headers=admin_headers))) == 2
+
+def test_export_stock_movements_is_admin_only(client, seed, db, admin_headers, seller_headers):
+    db.add(StockMovement(product_id=seed["products"][0].id, user_id=seed["admin"].id,
+                         movement_type="entrada", quantity=10, reason="Compra"))
+    db.commit()
+
+    assert client.get("/exports/stock-movements", headers=seller_headers).status_code == 403
+    response = client.get("/exports/stock-movements?format=ndjson", headers=admin_headers)
+    movement = json.loads(response.text)
+    assert movement["product_name"] == "Maçã Gala"
+    assert movement["username"] == "admin"
+    assert movement["quantity"] == 10
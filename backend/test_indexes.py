@@ -0,0 +1,74 @@
+"""
+Confere com EXPLAIN QUERY PLAN que as consultas mais frequentes usam os
+índices criados pelas migrations, e que as migrations geram o mesmo schema
+dos models, e que a inicialização só confere a revisão do banco.
+"""
+import os
+import tempfile
+import pytest
+from datetime import date
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, select
+from app.database import check_database_revision, upgrade_database
+from app.filters import date_range
+from app.models import Base, Sale, SaleItem, AccountReceivable, Payment, StockMovement, Customer, ProductLocation
+
+def _plan(db, query) -> str:
+    compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    rows = db.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN " + str(compiled),
+        tuple(params[name] for name in compiled.positiontup)
+    ).all()
+    return " | ".join(row[-1] for row in rows)
+
+def test_hot_queries_use_indexes(db):
+    period = date_range(Sale.created_at, date(2024, 3, 1), date(2024, 3, 31))
+    plans = {
+        "ix_sales_seller_id_created_at": select(Sale).filter(Sale.seller_id == 2, *period)
+            .order_by(Sale.created_at.desc(), Sale.id.desc()).limit(100),
+        "ix_sales_created_at": select(Sale).filter(*period).order_by(Sale.created_at.desc()).limit(100),
+        "ix_sale_items_sale_id": select(SaleItem).filter(SaleItem.sale_id.in_([1, 2, 3])),
+        "ix_accounts_receivable_customer_id_status_due_date": select(AccountReceivable).filter(
+            AccountReceivable.customer_id == 1, AccountReceivable.status == "pending"
+        ).order_by(AccountReceivable.due_date),
+        "ix_payments_account_receivable_id_payment_date": select(Payment)
+            .filter(Payment.account_receivable_id == 1).order_by(Payment.payment_date),
+        "ix_stock_movements_product_id_created_at": select(StockMovement).filter(
+            StockMovement.product_id == 1, *date_range(StockMovement.created_at, date(2024, 3, 1), None)
+        ),
+        "ix_customers_active_id": select(Customer).filter(Customer.is_active == True, Customer.id > 100)
+            .order_by(Customer.id).limit(100),
+        "ix_product_locations_location_id": select(ProductLocation).filter(ProductLocation.location_id.in_([1, 2])),
+        "ix_product_locations_product_id_location_id": select(ProductLocation)
+            .filter(ProductLocation.product_id.in_([1, 2])),
+    }
+    for index, query in plans.items():
+        assert index in _plan(db, query), index
+
+def test_migrations_match_models():
+    path = os.path.join(tempfile.mkdtemp(prefix="hortifruti_migrations_"), "migrated.db")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.begin() as connection:
+            upgrade_database(connection)
+        with engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+    finally:
+        engine.dispose()
+
+def test_startup_only_checks_the_revision():
+    path = os.path.join(tempfile.mkdtemp(prefix="hortifruti_migrations_"), "pending.db")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        # A inicialização não aplica migrations: recusa o banco desatualizado
+        with engine.connect() as connection:
+            with pytest.raises(RuntimeError, match="python migrate.py"):
+                check_database_revision(connection)
+        with engine.begin() as connection:
+            upgrade_database(connection)
+        with engine.connect() as connection:
+            check_database_revision(connection)
+    finally:
+        engine.dispose()
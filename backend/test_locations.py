@@ -0,0 +1,152 @@
+from app.models import Product, ProductLocation, StockMovement
+from test_accounts_receivable import count_statements
+
+def _locations(client, headers, *names):
+    return [
+        client.post("/locations/", headers=headers, json={"name": name, "location_type": "camara_fria"}).json()["id"]
+        for name in names
+    ]
+
+def _stored(db, product_id):
+    db.expire_all()
+    return {row.location_id: row.quantity for row in db.query(ProductLocation).filter(ProductLocation.product_id == product_id)}
+
+def test_transfers_move_stock_between_locations_atomically(client, db, seed, admin_headers):
+    apple = seed["products"][0]
+    cold, deposit = _locations(client, admin_headers, "Câmara Fria 1", "Depósito")
+
+    # Estoque sem localização (100 no seed) guardado na câmara fria
+    response = client.post("/locations/transfer", headers=admin_headers, json={
+        "product_id": apple.id, "to_location_id": cold, "quantity": 60
+    })
+    assert response.status_code == 200
+    assert response.json()["balances"] == [{"product_id": apple.id, "location_id": cold, "quantity": 60}]
+
+    response = client.post("/locations/transfers", headers=admin_headers, json={"reason": "Reorganização", "items": [
+        {"product_id": apple.id, "from_location_id": cold, "to_location_id": deposit, "quantity": 20},
+        {"product_id": apple.id, "from_location_id": cold, "to_location_id": deposit, "quantity": 10},
+        {"product_id": apple.id, "from_location_id": deposit, "quantity": 5},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["transferred"] == 3
+    assert _stored(db, apple.id) == {cold: 30, deposit: 25}
+    assert db.get(Product, apple.id).stock_quantity == 100
+    movements = db.query(StockMovement).filter(StockMovement.movement_type == "transferência").order_by(StockMovement.id).all()
+    assert [(m.from_location_id, m.to_location_id, m.quantity, m.stock_change) for m in movements] == [
+        (None, cold, 60, 0), (cold, deposit, 20, 0), (cold, deposit, 10, 0), (deposit, None, 5, 0)
+    ]
+
+    # Uma linha inválida rejeita o lote inteiro
+    response = client.post("/locations/transfers", headers=admin_headers, json={"items": [
+        {"product_id": apple.id, "from_location_id": cold, "to_location_id": deposit, "quantity": 30},
+        {"product_id": apple.id, "from_location_id": cold, "to_location_id": deposit, "quantity": 1},
+    ]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Line 1: Insufficient stock for Maçã Gala"
+    assert _stored(db, apple.id) == {cold: 30, deposit: 25}
+
+def test_large_transfer_uses_a_fixed_number_of_statements(client, db, seed, admin_headers):
+    locations = _locations(client, admin_headers, "Câmara Fria 1", "Câmara Fria 2", "Depósito")
+    items = [
+        {"product_id": seed["products"][i % 3].id, "to_location_id": locations[i % 2], "quantity": 0.5}
+        for i in range(300)
+    ]
+    with count_statements() as statements:
+        response = client.post("/locations/transfers", headers=admin_headers, json={"items": items})
+    assert response.status_code == 200
+    # Locais, produtos, quantidades, inserts das quantidades e das movimentações,
+    # alertas de estoque baixo (2) e versão do estoque
+    assert len(statements) <= 8
+    assert sum(_stored(db, seed["products"][0].id).values()) == 50
+
+def test_location_quantity_edits_keep_product_total_in_sync(client, db, seed, admin_headers):
+    banana = seed["products"][1]
+    cold, = _locations(client, admin_headers, "Câmara Fria 1")
+    response = client.post(f"/locations/{cold}/products", headers=admin_headers, json={
+        "product_id": banana.id, "location_id": cold, "quantity": 10
+    })
+    assert response.status_code == 201
+    product_location_id = response.json()["id"]
+    # Os 10 vêm do estoque sem localização (150 no seed): o total não muda
+    db.expire_all()
+    assert db.get(Product, banana.id).stock_quantity == 150
+    client.put(f"/locations/{cold}/products/{product_location_id}", headers=admin_headers, json={"quantity": 4})
+    db.expire_all()
+    assert db.get(Product, banana.id).stock_quantity == 144
+    changes = [(m.movement_type, m.stock_change) for m in db.query(StockMovement).filter(StockMovement.product_id == banana.id)]
+    assert changes == [("transferência", 0), ("ajuste", -6)]
+
+    # Retirar o produto da localização mantém a quantidade no estoque do produto
+    assert client.delete(f"/locations/{cold}/products/{product_location_id}", headers=admin_headers).status_code == 204
+    db.expire_all()
+    assert db.get(Product, banana.id).stock_quantity == 144
+    assert client.get(f"/products/{banana.id}", headers=admin_headers).json()["stock_quantity"] == 144
+
+def test_placing_stock_in_a_location_only_adjusts_the_excess(client, db, seed, admin_headers):
+    apple = seed["products"][0]
+    cold, deposit = _locations(client, admin_headers, "Câmara Fria 1", "Depósito")
+    response = client.post(f"/locations/{cold}/products", headers=admin_headers, json={
+        "product_id": apple.id, "location_id": cold, "quantity": 70
+    })
+    assert response.status_code == 201
+    product_location_id = response.json()["id"]
+    # Restam 30 sem localização: 20 cabem no depósito sem mudar o total
+    client.post(f"/locations/{deposit}/products", headers=admin_headers, json={
+        "product_id": apple.id, "location_id": deposit, "quantity": 20
+    })
+    db.expire_all()
+    assert db.get(Product, apple.id).stock_quantity == 100
+
+    # Dos 25 a mais na câmara, 10 saem do que sobrou sem localização e 15 são excedente
+    client.put(f"/locations/{cold}/products/{product_location_id}", headers=admin_headers, json={"quantity": 95})
+    db.expire_all()
+    assert db.get(Product, apple.id).stock_quantity == 115
+    assert sum(_stored(db, apple.id).values()) == 115
+    movements = db.query(StockMovement).filter(StockMovement.product_id == apple.id).order_by(StockMovement.id).all()
+    assert [(m.movement_type, m.to_location_id, m.quantity, m.stock_change) for m in movements] == [
+        ("transferência", cold, 70, 0), ("transferência", deposit, 20, 0),
+        ("transferência", cold, 10, 0), ("ajuste", cold, 15, 15),
+    ]
+
+def test_stock_overview_is_aggregated_paginated_and_cached(client, db, seed, admin_headers):
+    apple, banana, lettuce = seed["products"]
+    cold, deposit, freezer = _locations(client, admin_headers, "Câmara Fria 1", "Depósito", "Congelador")
+    client.put(f"/locations/{deposit}", headers=admin_headers, json={"location_type": "deposito"})
+    orphan = Product(name="Abacaxi", price=6.0, cost_price=4.0, unit="unidade", stock_quantity=2)
+    db.add(orphan)
+    db.flush()
+    db.add(ProductLocation(product_id=orphan.id, location_id=cold, quantity=2))
+    db.commit()
+    for product, location, quantity, min_quantity in [
+        (apple, cold, 10, 20), (banana, cold, 30, 5), (lettuce, deposit, 40, 0)
+    ]:
+        client.post(f"/locations/{location}/products", headers=admin_headers, json={
+            "product_id": product.id, "location_id": location, "quantity": quantity, "min_quantity": min_quantity
+        })
+
+    first = client.get("/locations/stock/overview", headers=admin_headers, params={"limit": 2, "products_limit": 2})
+    page = first.json()
+    assert [item["location"]["id"] for item in page] == [cold, deposit]
+    assert page[0]["totals"] == {"item_count": 3, "total_quantity": 42, "below_min_count": 1, "stock_value": 118.0}
+    # Produto sem fornecedor não quebra a visão geral
+    assert [(p["name"], p["supplier"]) for p in page[0]["products"]] == [("Abacaxi", None), ("Banana Prata", "Fazenda Sol Nascente")]
+    rest = client.get("/locations/stock/overview", headers=admin_headers,
+                      params={"limit": 2, "products_limit": 2, "cursor": first.headers["x-next-cursor"]})
+    assert [(item["location"]["id"], item["totals"]["item_count"]) for item in rest.json()] == [(freezer, 0)]
+    # Sem limit (tela do depósito): todas as localizações e todos os produtos, sem cursor
+    everything = client.get("/locations/stock/overview", headers=admin_headers)
+    assert "x-next-cursor" not in everything.headers
+    assert [len(item["products"]) for item in everything.json()] == [3, 1, 0]
+    deposits = client.get("/locations/stock/overview", headers=admin_headers, params={"location_type": "deposito"})
+    assert [item["location"]["id"] for item in deposits.json()] == [deposit]
+
+    with count_statements() as statements:
+        cached = client.get("/locations/stock/overview", headers=admin_headers, params={"limit": 2, "products_limit": 2})
+    assert cached.json() == page
+    assert not any("product_locations" in statement for statement in statements)
+
+    client.post("/locations/transfer", headers=admin_headers, json={
+        "product_id": lettuce.id, "from_location_id": deposit, "to_location_id": cold, "quantity": 15
+    })
+    updated = client.get("/locations/stock/overview", headers=admin_headers, params={"limit": 2, "products_limit": 2}).json()
+    assert [item["totals"]["total_quantity"] for item in updated] == [57, 25]
@@ -0,0 +1,46 @@
+import re
+from app.config import settings
+
+def _sample(text, name, **labels):
+    """Valor da série name com exatamente os rótulos informados (0 se não existe)"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = re.escape(f"hortifruti_{name}" + (f"{{{label_text}}}" if labels else "")) + r" (\S+)"
+    match = re.search(f"^{pattern}$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+def test_metrics_expose_route_latency_db_statements_and_sales(client, seed, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_public", True)
+    before = client.get("/metrics").text
+    apple, banana, _ = seed["products"]
+    sale = client.post("/sales/", headers=admin_headers, json={
+        "payment_method": "dinheiro", "customer_id": seed["customers"][0].id,
+        "items": [{"product_id": apple.id, "quantity": 1}, {"product_id": banana.id, "quantity": 2}],
+    }).json()
+    client.get(f"/sales/{sale['id']}", headers=admin_headers)
+    client.get("/sales/999999", headers=admin_headers)
+    text = client.get("/metrics").text
+
+    route = {"method": "GET", "route": "/sales/{sale_id}"}
+    # As duas consultas caem no mesmo template de rota, sem uma série por id
+    assert _sample(text, "http_request_duration_seconds_count", **route) == 2
+    assert _sample(text, "http_request_duration_seconds_bucket", **route, le="+Inf") == 2
+    assert _sample(text, "http_responses_total", **route, status=200) == 1
+    assert _sample(text, "http_responses_total", **route, status=404) == 1
+    assert _sample(text, "http_request_db_statements_total", method="POST", route="/sales/") > 0
+    assert _sample(text, "db_statements_total") > _sample(before, "db_statements_total")
+
+    assert _sample(text, "sales_total") - _sample(before, "sales_total") == 1
+    assert _sample(text, "sale_items_sum") - _sample(before, "sale_items_sum") == 2
+    assert _sample(text, "sales_amount_total") - _sample(before, "sales_amount_total") == sale["total_amount"]
+    # A própria coleta está em andamento
+    assert _sample(text, "http_requests_in_flight") == 1
+
+def test_metrics_require_a_token_by_default(client, monkeypatch):
+    # Sem token e sem METRICS_PUBLIC as métricas ficam fechadas
+    assert client.get("/metrics").status_code == 403
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "# TYPE hortifruti_http_request_duration_seconds histogram" in response.text
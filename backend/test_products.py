@@ -0,0 +1,44 @@
+from app.catalog import product_catalog
+from test_accounts_receivable import count_statements
+
+def test_product_catalog_is_served_from_memory_until_version_changes(client, seed, admin_headers):
+    apple = seed["products"][0]
+    first = client.get("/products/", headers=admin_headers)
+    version = first.headers["x-catalog-version"]
+    assert [p["name"] for p in first.json()] == ["Maçã Gala", "Banana Prata", "Alface Crespa"]
+
+    with count_statements() as statements:
+        assert client.get("/products/", headers=admin_headers).json() == first.json()
+        assert client.get(f"/products/{apple.id}", headers=admin_headers).json()["supplier"]["name"] == "Fazenda Sol Nascente"
+    assert not any("FROM products" in statement for statement in statements)
+
+    response = client.put(f"/products/{apple.id}", headers=admin_headers, json={"price": 6.0})
+    assert response.status_code == 200
+    updated = client.get("/products/", headers=admin_headers)
+    assert updated.headers["x-catalog-version"] != version
+    assert updated.json()[0]["price"] == 6.0
+
+    # Vendas ajustam o estoque do catálogo sem mudar a versão
+    client.post("/sales/", headers=admin_headers, json={
+        "payment_method": "dinheiro", "customer_id": seed["customers"][0].id,
+        "items": [{"product_id": apple.id, "quantity": 5}],
+    })
+    after_sale = client.get(f"/products/{apple.id}", headers=admin_headers)
+    assert after_sale.json()["stock_quantity"] == 95
+    assert after_sale.headers["x-catalog-version"] == updated.headers["x-catalog-version"]
+
+    catalog = client.get("/products/catalog/version", headers=admin_headers).json()
+    assert catalog["version"] == int(updated.headers["x-catalog-version"])
+    assert (catalog["hits"], catalog["misses"]) == (product_catalog.hits, product_catalog.misses)
+
+def test_product_catalog_paginates_and_hides_inactive_products(client, seed, admin_headers):
+    apple, banana, lettuce = seed["products"]
+    assert client.delete(f"/products/{banana.id}", headers=admin_headers).status_code == 204
+
+    page = client.get("/products/", headers=admin_headers, params={"limit": 1})
+    assert [p["id"] for p in page.json()] == [apple.id]
+    rest = client.get("/products/", headers=admin_headers, params={"limit": 1, "cursor": page.headers["x-next-cursor"]})
+    assert [p["id"] for p in rest.json()] == [lettuce.id]
+
+    assert client.get(f"/products/{banana.id}", headers=admin_headers).json()["is_active"] is False
+    assert client.get("/products/9999", headers=admin_headers).status_code == 404
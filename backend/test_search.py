@@ -0,0 +1,30 @@
+from app.models import Customer
+
+def test_search_customers_by_name_without_accents_and_by_cpf(client, db, seed, admin_headers):
+    db.add_all([
+        Customer(name="Joana Souza", cpf="999.888.777-66"),
+        Customer(name="Antônio João Pereira", cpf="123.456.789-00"),
+        Customer(name="Inativo João", cpf="000.000.000-00", is_active=False),
+    ])
+    db.commit()
+
+    names = [c["name"] for c in client.get("/search/customers", headers=admin_headers, params={"q": "joao"}).json()]
+    # Nome começando com o termo vem antes de nome que só contém uma palavra com o prefixo
+    assert names == ["João Silva", "Antônio João Pereira"]
+
+    names = [c["name"] for c in client.get("/search/customers", headers=admin_headers, params={"q": "Jo"}).json()]
+    assert names == ["Joana Souza", "João Silva", "Antônio João Pereira"]
+
+    by_cpf = client.get("/search/customers", headers=admin_headers, params={"q": "123.45"}).json()
+    assert [c["name"] for c in by_cpf] == ["Antônio João Pereira"]
+
+    assert client.get("/search/customers", headers=admin_headers, params={"q": ""}).status_code == 422
+
+def test_search_products_sees_changes(client, seed, admin_headers):
+    apple = seed["products"][0]
+    assert [p["name"] for p in client.get("/search/products", headers=admin_headers, params={"q": "maca"}).json()] == ["Maçã Gala"]
+
+    response = client.put(f"/products/{apple.id}", headers=admin_headers, json={"name": "Maçã Fuji"})
+    assert response.status_code == 200
+    results = client.get("/search/products", headers=admin_headers, params={"q": "fuji", "limit": 5}).json()
+    assert [(p["id"], p["name"]) for p in results] == [(apple.id, "Maçã Fuji")]
@@ -0,0 +1,41 @@
+from test_sales import _cart, _sell
+
+def _seed_sales(client, seed, headers, count):
+    for i in range(count):
+        _sell(client, headers, seed["customers"][i % 2].id, _cart(seed, 1, 1, 1))
+
+def test_sales_listing_fast_path_matches_schema(client, seed, admin_headers):
+    _seed_sales(client, seed, admin_headers, 3)
+    sales = client.get("/sales/", headers=admin_headers, params={"limit": 2})
+    assert sales.headers["content-type"] == "application/json"
+    assert "x-next-cursor" in sales.headers
+    body = sales.json()
+    assert len(body) == 2
+    assert body[0]["items"][0]["product"]["supplier"]["name"] == "Fazenda Sol Nascente"
+    assert body[0]["seller"]["username"] == "admin"
+    assert body[0]["created_at"] == client.get(f"/sales/{body[0]['id']}", headers=admin_headers).json()["created_at"]
+
+def test_large_responses_are_compressed_by_negotiation(client, seed, admin_headers):
+    _seed_sales(client, seed, admin_headers, 5)
+
+    for encoding in ("br", "gzip"):
+        response = client.get("/sales/", headers={**admin_headers, "Accept-Encoding": encoding})
+        assert response.headers["content-encoding"] == encoding
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert len(response.json()) == 5
+
+    compressed = client.get("/sales/", headers={**admin_headers, "Accept-Encoding": "gzip"})
+    plain = client.get("/sales/", headers={**admin_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert compressed.json() == plain.json()
+
+    # Respostas pequenas não são comprimidas
+    health = client.get("/health", headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in health.headers
+
+def test_ndjson_stream_is_compressed_incrementally(client, seed, admin_headers):
+    _seed_sales(client, seed, admin_headers, 2)
+    response = client.get("/sales/grouped-by-customer", headers={**admin_headers, "Accept-Encoding": "gzip"},
+                          params={"format": "ndjson"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.text.splitlines()) == 2
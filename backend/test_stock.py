@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from app.models import CacheVersion, Product, StockMovement, StockSnapshot
+from app.stock import SNAPSHOT_DELAY, check_stock, take_snapshots
+
+def test_every_stock_change_is_recorded_in_the_ledger(client, db, seed, admin_headers):
+    response = client.post("/products/", headers=admin_headers, json={
+        "name": "Manga Palmer", "price": 8.0, "cost_price": 5.0, "stock_quantity": 50,
+        "unit": "kg", "supplier_id": seed["supplier"].id,
+    })
+    product_id = response.json()["id"]
+    sale = client.post("/sales/", headers=admin_headers, json={
+        "payment_method": "dinheiro", "customer_id": seed["customers"][0].id,
+        "items": [{"product_id": product_id, "quantity": 5}],
+    }).json()
+    response = client.post(f"/products/{product_id}/stock-movement", headers=admin_headers, json={
+        "product_id": product_id, "movement_type": "saída", "quantity": 3, "reason": "Perda",
+    })
+    assert response.status_code == 200
+    assert response.json()["stock_change"] == -3
+    client.put(f"/products/{product_id}", headers=admin_headers, json={"stock_quantity": 40})
+
+    movements = client.get(f"/products/{product_id}/stock-movements", headers=admin_headers).json()
+    assert [(m["movement_type"], m["stock_change"]) for m in movements] == [
+        ("entrada", 50), ("venda", -5), ("saída", -3), ("ajuste", -2)
+    ]
+    assert movements[1]["sale_id"] == sale["id"]
+    page = client.get(f"/products/{product_id}/stock-movements", headers=admin_headers, params={"limit": 3})
+    rest = client.get(f"/products/{product_id}/stock-movements", headers=admin_headers,
+                      params={"limit": 3, "cursor": page.headers["x-next-cursor"]})
+    assert [m["id"] for m in page.json() + rest.json()] == [m["id"] for m in movements]
+
+    response = client.post(f"/products/{product_id}/stock-movement", headers=admin_headers, json={
+        "product_id": product_id, "movement_type": "venda", "quantity": 1, "reason": "Manual",
+    })
+    assert response.status_code == 400
+    assert product_id not in [row.product_id for row in check_stock(db)]
+
+def test_stock_as_of_replays_from_the_nearest_snapshot(client, db, seed, admin_headers):
+    apple = seed["products"][0]
+    start = datetime(2024, 3, 1, 8, 0)
+    db.add_all([
+        StockMovement(product_id=apple.id, movement_type="entrada", quantity=100, stock_change=100,
+                      reason="Estoque inicial", created_at=start),
+        StockMovement(product_id=apple.id, movement_type="venda", quantity=30, stock_change=-30,
+                      reason="Venda", created_at=start + timedelta(days=1)),
+        StockMovement(product_id=apple.id, movement_type="venda", quantity=20, stock_change=-20,
+                      reason="Venda", created_at=start + timedelta(days=3)),
+    ])
+    db.commit()
+    assert take_snapshots(db, now=start + timedelta(days=2) + SNAPSHOT_DELAY) == 1
+    assert take_snapshots(db, now=start + timedelta(days=2, hours=1) + SNAPSHOT_DELAY) == 0
+
+    def as_of(moment):
+        response = client.get(f"/products/{apple.id}/stock", headers=admin_headers,
+                              params={"as_of": moment.isoformat()})
+        assert response.status_code == 200
+        return response.json()
+
+    assert as_of(start - timedelta(hours=1))["quantity"] == 0
+    assert as_of(start + timedelta(hours=1))["quantity"] == 100
+    at_snapshot = as_of(start + timedelta(days=2, hours=12))
+    assert (at_snapshot["quantity"], at_snapshot["movements_replayed"]) == (70, 0)
+    assert at_snapshot["snapshot_at"].startswith("2024-03-03")
+    latest = as_of(start + timedelta(days=4))
+    assert (latest["quantity"], latest["movements_replayed"]) == (50, 1)
+
+    # stock_quantity (100 no seed) é refeito a partir do ledger
+    assert [(row.product_id, row.quantity) for row in check_stock(db) if row.product_id == apple.id] == [(apple.id, 50)]
+    catalog = db.get(CacheVersion, "products")
+    version = catalog.version if catalog else 0
+    check_stock(db, fix=True)
+    db.expire_all()
+    assert db.get(Product, apple.id).stock_quantity == 50
+    # Os workers da API são avisados pela versão do catálogo
+    assert db.get(CacheVersion, "products").version == version + 1
+    assert db.query(StockSnapshot).count() == 1
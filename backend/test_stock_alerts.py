@@ -0,0 +1,70 @@
+import asyncio
+import orjson
+from app.stock_alerts import stock_alert_events
+
+def _sell(client, headers, seed, product, quantity):
+    return client.post("/sales/", headers=headers, json={
+        "payment_method": "dinheiro", "customer_id": seed["customers"][0].id,
+        "items": [{"product_id": product.id, "quantity": quantity}],
+    })
+
+def _move(client, headers, product, movement_type, quantity):
+    return client.post(f"/products/{product.id}/stock-movement", headers=headers, json={
+        "product_id": product.id, "movement_type": movement_type, "quantity": quantity, "reason": "Teste",
+    })
+
+def test_alerts_open_and_resolve_when_quantities_cross_the_minimum(client, seed, admin_headers):
+    apple, banana, _ = seed["products"]
+    client.put(f"/products/{apple.id}", headers=admin_headers, json={"min_stock": 20})
+    assert client.get("/stock-alerts/", headers=admin_headers).json() == []
+
+    _sell(client, admin_headers, seed, apple, 85)
+    alerts = client.get("/stock-alerts/", headers=admin_headers).json()
+    assert [(a["product_id"], a["location_id"], a["quantity"], a["threshold"]) for a in alerts] == [(apple.id, None, 15, 20)]
+    # Outra venda não abre um segundo alerta
+    _sell(client, admin_headers, seed, apple, 1)
+    assert len(client.get("/stock-alerts/", headers=admin_headers).json()) == 1
+
+    _move(client, admin_headers, apple, "entrada", 50)
+    assert client.get("/stock-alerts/", headers=admin_headers).json() == []
+    history = client.get("/stock-alerts/", headers=admin_headers, params={"include_resolved": True}).json()
+    assert history[0]["resolved_at"] is not None
+
+    location = client.post("/locations/", headers=admin_headers, json={"name": "Câmara Fria 1"}).json()["id"]
+    client.post(f"/locations/{location}/products", headers=admin_headers, json={
+        "product_id": banana.id, "location_id": location, "quantity": 12, "min_quantity": 10
+    })
+    client.post("/locations/transfer", headers=admin_headers, json={
+        "product_id": banana.id, "from_location_id": location, "quantity": 4
+    })
+    low = client.get("/locations/stock/low-stock", headers=admin_headers).json()
+    assert [(item["product"]["id"], item["location"]["id"], item["current_quantity"], item["min_quantity"]) for item in low] == [
+        (banana.id, location, 8, 10)
+    ]
+
+class _ConnectedRequest:
+    async def is_disconnected(self):
+        return False
+
+def _parse(message):
+    event, data = message.strip().split("\n")
+    return event.removeprefix("event: "), orjson.loads(data.removeprefix("data: "))
+
+def test_alert_stream_pushes_opened_and_resolved_events(client, seed, admin_headers):
+    apple = seed["products"][0]
+    client.put(f"/products/{apple.id}", headers=admin_headers, json={"min_stock": 20})
+
+    async def scenario():
+        events = stock_alert_events(_ConnectedRequest(), check_interval=0.01)
+        try:
+            assert _parse(await anext(events)) == ("snapshot", [])
+            await asyncio.to_thread(_sell, client, admin_headers, seed, apple, 90)
+            event, alert = _parse(await asyncio.wait_for(anext(events), timeout=5))
+            assert (event, alert["product_id"], alert["current_quantity"]) == ("opened", apple.id, 10)
+            await asyncio.to_thread(_move, client, admin_headers, apple, "entrada", 30)
+            event, resolved = _parse(await asyncio.wait_for(anext(events), timeout=5))
+            assert (event, resolved["id"]) == ("resolved", alert["id"])
+        finally:
+            await events.aclose()
+
+    asyncio.run(scenario())
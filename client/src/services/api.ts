@@ -158,6 +158,17 @@ export const getCustomers = async (params?: {
   return response.data;
 };
 
+// Autocomplete do PDV (busca indexada no servidor)
+export const searchCustomers = async (q: string, limit = 10): Promise<Customer[]> => {
+  const response = await api.get('/search/customers', { params: { q, limit } });
+  return response.data;
+};
+
+export const searchProducts = async (q: string, limit = 10): Promise<Product[]> => {
+  const response = await api.get('/search/products', { params: { q, limit } });
+  return response.data;
+};
+
 export const getUsers = async (): Promise<User[]> => {
   const response = await api.get('/users');
   return response.data;
@@ -170,6 +181,8 @@ export const getSalesByCustomer = async (params?: {
   start_date?: string;
   end_date?: string;
   status?: string;
+  skip?: number;
+  limit?: number;
 }): Promise<SalesByCustomer[]> => {
   const response = await api.get('/sales/grouped-by-customer', { params });
   return response.data;